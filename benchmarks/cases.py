@@ -0,0 +1,484 @@
+import json
+from inspect import isawaitable
+from random import Random
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from benchmarks.data import PRICE_UNITS, VOLUME_UNITS
+from httpx import AsyncClient
+from sqlalchemy.orm import Session
+
+from src.database.crud.order import CRUDOrder
+from src.database.crud.organisation import CRUDOrganisation
+from src.database.crud.product import CRUDProduct
+from src.database.models.base import OrderTypeEnum, OrganisationTypeEnum
+from src.database.models.order import Order
+from src.database.models.organisation import Organisation
+from src.database.models.product import Product
+from src.database.schemas.analytics import OrderGroupBy
+from src.database.schemas.order import OrderCreate, OrderUpdate
+
+# Records sent to the bulk and import endpoints per request
+BATCH_RECORDS = 100
+
+Prepare = Callable[[], Awaitable[Any]]
+Run = Callable[[Any], Awaitable[Any]]
+
+
+class BenchmarkError(Exception):
+    """
+    Raised by a benchmark whose operation failed, e.g. an unexpected status code.
+    """
+
+
+class Case:
+    """
+    A benchmarked operation. Every iteration awaits `prepare`, untimed, and then times
+    `run` called with what `prepare` returned.
+
+    Keyword arguments:
+        kind -- "endpoint" or "crud"
+        name -- Name of the operation, e.g. "GET /api/order/{order_id}"
+        run -- Coroutine function running the operation once
+        prepare -- Coroutine function returning the argument of `run`, e.g. the URL
+                   of a random record or a record created for `run` to delete
+        heavy -- Whether the operation reads whole tables, such cases run fewer
+                 iterations
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        name: str,
+        run: Run,
+        prepare: Optional[Prepare] = None,
+        heavy: bool = False,
+    ):
+        self.kind = kind
+        self.name = name
+        self.run = run
+        self.prepare = prepare
+        self.heavy = heavy
+
+
+class Records:
+    """
+    Random picks among a sample of the dataset's records, and new records to create.
+
+    Keyword arguments:
+        samples -- Sampled rows, see `benchmarks.data.sample_records`
+        orders -- Number of orders in the dataset
+        seed -- Seed of the picks
+    """
+
+    def __init__(self, samples: Dict[str, List[Any]], orders: int, seed: int = 0):
+        self.samples = samples
+        self.orders = orders
+        self.random = Random(seed)
+        self.created = 0
+
+    def product(self) -> Any:
+        return self.random.choice(self.samples["products"])
+
+    def product_id(self) -> int:
+        return int(self.product().id)
+
+    def organisation_id(self) -> int:
+        return int(self.random.choice(self.samples["organisations"]).id)
+
+    def order_id(self) -> int:
+        return int(self.random.choice(self.samples["orders"]).id)
+
+    def search_text(self) -> str:
+        """
+        What a user would have typed so far of an organisation's or a product's name.
+        """
+        if self.random.random() < 0.5:
+            name = self.random.choice(self.samples["organisations"]).Name
+        else:
+            name = self.product().Variety
+        return str(name)[: self.random.randint(2, 8)]
+
+    def unique(self) -> str:
+        self.created += 1
+        return f"benchmark {self.random.getrandbits(64):x} {self.created}"
+
+    def new_product(self) -> Dict[str, Any]:
+        product = self.product()
+        return {
+            "Category": product.Category,
+            "Variety": self.unique(),
+            "Packaging": product.Packaging,
+        }
+
+    def new_organisation(self) -> Dict[str, Any]:
+        return {
+            "Name": self.unique(),
+            "Type": self.random.choice(list(OrganisationTypeEnum)).value,
+        }
+
+    def new_products(self) -> List[Dict[str, Any]]:
+        """
+        ProductOrderType dictionaries of existing products.
+        """
+        products = []
+        for _ in range(self.random.randint(1, 5)):
+            product = self.product()
+            volume = self.random.randint(1, 100)
+            price = self.random.randint(1, 1000)
+            products.append(
+                {
+                    "Category": product.Category,
+                    "Variety": product.Variety,
+                    "Packaging": product.Packaging,
+                    "Volume": f"{volume} {self.random.choice(VOLUME_UNITS)}",
+                    "Price_per_unit": f"{price} {self.random.choice(PRICE_UNITS)}",
+                }
+            )
+        return products
+
+    def new_order(self) -> Dict[str, Any]:
+        return {
+            "Type": self.random.choice(list(OrderTypeEnum)).value,
+            "References": self.order_id() if self.random.random() < 0.1 else None,
+            "Products": self.new_products(),
+            "Organisation_id": self.organisation_id(),
+        }
+
+
+def _ndjson(records: Sequence[Dict[str, Any]]) -> bytes:
+    return "".join(json.dumps(record) + "\n" for record in records).encode()
+
+
+def _request(client: AsyncClient, method: str, status: int) -> Run:
+    async def run(request: Dict[str, Any]) -> None:
+        response = await client.request(method, **request)
+        if response.status_code != status:
+            raise BenchmarkError(
+                f"{method} {request['url']} returned {response.status_code}: "
+                f"{response.text[:200]}"
+            )
+
+    return run
+
+
+def endpoint_cases(client: AsyncClient, records: Records) -> List[Case]:
+    """
+    Benchmarks of every endpoint of the app.
+
+    Keyword arguments:
+        client -- Client of the app, e.g. AsyncClient(app=app)
+        records -- Records of the loaded dataset
+    Return: The cases, in the order of the routers
+    """
+
+    def case(
+        name: str,
+        prepare: Callable[[], Any],
+        status: int = 200,
+        heavy: bool = False,
+    ) -> Case:
+        async def prepare_request() -> Any:
+            request = prepare()
+            return await request if isawaitable(request) else request
+
+        return Case(
+            "endpoint",
+            name,
+            _request(client, name.split()[0], status),
+            prepare_request,
+            heavy,
+        )
+
+    async def created(path: str, record: Dict[str, Any]) -> int:
+        response = await client.post(path, json=record)
+        if response.status_code != 201:
+            raise BenchmarkError(f"POST {path} returned {response.status_code}")
+        return int(response.json()["id"])
+
+    async def new_product_url() -> Dict[str, Any]:
+        product_id = await created("/api/product", records.new_product())
+        return {"url": f"/api/product/{product_id}"}
+
+    async def new_organisation_url() -> Dict[str, Any]:
+        organisation_id = await created("/api/organisation", records.new_organisation())
+        return {"url": f"/api/organisation/{organisation_id}"}
+
+    async def new_order_url() -> Dict[str, Any]:
+        order_id = await created("/api/order", records.new_order())
+        return {"url": f"/api/order/{order_id}"}
+
+    async def updated_product() -> Dict[str, Any]:
+        return {**await new_product_url(), "json": {"Variety": records.unique()}}
+
+    async def updated_organisation() -> Dict[str, Any]:
+        return {**await new_organisation_url(), "json": {"Name": records.unique()}}
+
+    async def updated_order() -> Dict[str, Any]:
+        return {**await new_order_url(), "json": {"Products": records.new_products()}}
+
+    def imported(path: str, new: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "url": path,
+            "content": _ndjson([new() for _ in range(BATCH_RECORDS)]),
+            "headers": {"content-type": "application/x-ndjson"},
+        }
+
+    return [
+        # Products
+        case(
+            "POST /api/product",
+            lambda: {"url": "/api/product", "json": records.new_product()},
+            status=201,
+        ),
+        case(
+            f"POST /api/product/import ({BATCH_RECORDS} records)",
+            lambda: imported("/api/product/import", records.new_product),
+            status=201,
+        ),
+        case(
+            "GET /api/product/export",
+            lambda: {"url": "/api/product/export"},
+            heavy=True,
+        ),
+        case(
+            "GET /api/product/{product_id}",
+            lambda: {"url": f"/api/product/{records.product_id()}"},
+        ),
+        case("GET /api/product", lambda: {"url": "/api/product"}),
+        case(
+            "GET /api/product?category={category}",
+            lambda: {
+                "url": "/api/product",
+                "params": {"category": records.product().Category},
+            },
+        ),
+        case("DELETE /api/product/{product_id}", new_product_url),
+        case("PUT /api/product/{product_id}", updated_product, status=201),
+        # Organisations
+        case(
+            "POST /api/organisation",
+            lambda: {"url": "/api/organisation", "json": records.new_organisation()},
+            status=201,
+        ),
+        case(
+            f"POST /api/organisation/import ({BATCH_RECORDS} records)",
+            lambda: imported("/api/organisation/import", records.new_organisation),
+            status=201,
+        ),
+        case(
+            "GET /api/organisation/export",
+            lambda: {"url": "/api/organisation/export"},
+            heavy=True,
+        ),
+        case(
+            "GET /api/organisation/{organisation_id}",
+            lambda: {"url": f"/api/organisation/{records.organisation_id()}"},
+        ),
+        case(
+            "GET /api/organisation/{organisation_id}/catalog",
+            lambda: {"url": f"/api/organisation/{records.organisation_id()}/catalog"},
+        ),
+        case("GET /api/organisation", lambda: {"url": "/api/organisation"}),
+        case("DELETE /api/organisation/{organisation_id}", new_organisation_url),
+        case(
+            "PUT /api/organisation/{organisation_id}",
+            updated_organisation,
+            status=201,
+        ),
+        # Orders
+        case(
+            "POST /api/order",
+            lambda: {"url": "/api/order", "json": records.new_order()},
+            status=201,
+        ),
+        case(
+            f"POST /api/order/bulk ({BATCH_RECORDS} orders)",
+            lambda: {
+                "url": "/api/order/bulk",
+                "json": [records.new_order() for _ in range(BATCH_RECORDS)],
+            },
+            status=201,
+        ),
+        case(
+            f"POST /api/order/import ({BATCH_RECORDS} records)",
+            lambda: imported("/api/order/import", records.new_order),
+            status=201,
+        ),
+        case(
+            "GET /api/order/export",
+            lambda: {"url": "/api/order/export"},
+            heavy=True,
+        ),
+        case(
+            "GET /api/order/{order_id}",
+            lambda: {"url": f"/api/order/{records.order_id()}"},
+        ),
+        case(
+            "GET /api/order/{order_id}/chain",
+            lambda: {"url": f"/api/order/{records.order_id()}/chain"},
+        ),
+        case("GET /api/order", lambda: {"url": "/api/order"}),
+        case(
+            "GET /api/order?limit=100",
+            lambda: {"url": "/api/order", "params": {"limit": 100}},
+        ),
+        case(
+            "GET /api/order?skip={half of the orders}",
+            lambda: {"url": "/api/order", "params": {"skip": records.orders // 2}},
+        ),
+        case("DELETE /api/order/{order_id}", new_order_url),
+        case("PUT /api/order/{order_id}", updated_order, status=201),
+        # Search and analytics
+        case(
+            "GET /api/search?q={text}",
+            lambda: {"url": "/api/search", "params": {"q": records.search_text()}},
+        ),
+        case(
+            "GET /api/analytics/orders?group_by=organisation",
+            lambda: {"url": "/api/analytics/orders"},
+            heavy=True,
+        ),
+        case(
+            "GET /api/analytics/orders?organisation_id={id}&group_by=category",
+            lambda: {
+                "url": "/api/analytics/orders",
+                "params": {
+                    "organisation_id": records.organisation_id(),
+                    "group_by": "category",
+                },
+            },
+        ),
+        # Database
+        case("GET /api/database/pool", lambda: {"url": "/api/database/pool"}),
+        case("GET /api/database/cache", lambda: {"url": "/api/database/cache"}),
+    ]
+
+
+def crud_cases(session_factory: Callable[[], Session], records: Records) -> List[Case]:
+    """
+    Benchmarks of the CRUD methods behind the endpoints, each run in a new session.
+
+    Keyword arguments:
+        session_factory -- Factory of database sessions, e.g. SessionLocal
+        records -- Records of the loaded dataset
+    Return: The cases, per CRUD class
+    """
+    product_crud = CRUDProduct(Product)  # type: ignore
+    organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
+    order_crud = CRUDOrder(Order)  # type: ignore
+
+    def case(
+        name: str,
+        call: Callable[[Session, Any], Any],
+        prepare: Optional[Callable[[], Any]] = None,
+        heavy: bool = False,
+    ) -> Case:
+        async def run(argument: Any) -> None:
+            with session_factory() as db:
+                call(db, argument)
+
+        async def prepare_argument() -> Any:
+            return prepare() if prepare is not None else None
+
+        return Case("crud", name, run, prepare_argument, heavy)
+
+    def new_order_id() -> int:
+        with session_factory() as db:
+            order, _ = order_crud.create_new_order(
+                db, OrderCreate(**records.new_order())
+            )
+            return int(order.id)
+
+    def update_order(db: Session, id: int) -> None:
+        # Loading the order is part of updating it, as in the PUT endpoint
+        order = order_crud.get(db, id)
+        assert order is not None
+        order_crud.update(
+            db, order, OrderUpdate.parse_obj({"Products": records.new_products()})
+        )
+
+    return [
+        # Products
+        case(
+            "CRUDProduct.get", lambda db, _: product_crud.get(db, records.product_id())
+        ),
+        case(
+            "CRUDProduct.get_dict",
+            lambda db, _: product_crud.get_dict(db, records.product_id()),
+        ),
+        case("CRUDProduct.get_multi", lambda db, _: product_crud.get_multi(db)),
+        case(
+            "CRUDProduct.get_multi_dicts",
+            lambda db, _: product_crud.get_multi_dicts(db),
+        ),
+        case(
+            "CRUDProduct.get_many_filtered",
+            lambda db, _: product_crud.get_many_filtered(
+                db, category=records.product().Category
+            ),
+        ),
+        case(
+            "CRUDProduct.search",
+            lambda db, _: product_crud.search(db, records.search_text()),
+        ),
+        # Organisations
+        case(
+            "CRUDOrganisation.get",
+            lambda db, _: organisation_crud.get(db, records.organisation_id()),
+        ),
+        case(
+            "CRUDOrganisation.get_dict",
+            lambda db, _: organisation_crud.get_dict(db, records.organisation_id()),
+        ),
+        case(
+            "CRUDOrganisation.get_multi_dicts",
+            lambda db, _: organisation_crud.get_multi_dicts(db),
+        ),
+        case(
+            "CRUDOrganisation.get_catalog",
+            lambda db, _: organisation_crud.get_catalog(db, records.organisation_id()),
+        ),
+        case(
+            "CRUDOrganisation.search",
+            lambda db, _: organisation_crud.search(db, records.search_text()),
+        ),
+        # Orders
+        case("CRUDOrder.get", lambda db, _: order_crud.get(db, records.order_id())),
+        case(
+            "CRUDOrder.get_dict",
+            lambda db, _: order_crud.get_dict(db, records.order_id()),
+        ),
+        case("CRUDOrder.get_multi", lambda db, _: order_crud.get_multi(db)),
+        case("CRUDOrder.get_multi_dicts", lambda db, _: order_crud.get_multi_dicts(db)),
+        case(
+            "CRUDOrder.get_chains",
+            lambda db, _: order_crud.get_chains(db, [records.order_id()]),
+        ),
+        case(
+            "CRUDOrder.get_totals(organisation)",
+            lambda db, _: order_crud.get_totals(db, [OrderGroupBy.organisation]),
+            heavy=True,
+        ),
+        case(
+            "CRUDOrder.get_totals(organisation_id, category)",
+            lambda db, _: order_crud.get_totals(
+                db, [OrderGroupBy.category], organisation_id=records.organisation_id()
+            ),
+        ),
+        case(
+            "CRUDOrder.create_new_order",
+            lambda db, order_in: order_crud.create_new_order(db, order_in),
+            lambda: OrderCreate(**records.new_order()),
+        ),
+        case(
+            f"CRUDOrder.create_many_orders ({BATCH_RECORDS} orders)",
+            lambda db, orders_in: order_crud.create_many_orders(db, orders_in),
+            lambda: [OrderCreate(**records.new_order()) for _ in range(BATCH_RECORDS)],
+        ),
+        case("CRUDOrder.update", update_order, new_order_id),
+        case(
+            "CRUDOrder.remove",
+            lambda db, id: order_crud.remove(db, id=id),
+            new_order_id,
+        ),
+    ]
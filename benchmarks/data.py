@@ -0,0 +1,324 @@
+import csv
+import io
+from random import Random
+from time import perf_counter
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import Engine, text, true
+
+from src.database.models.base import Base, OrderTypeEnum, OrganisationTypeEnum
+from src.database.models.order_line import parse_amount
+from src.database.models.organisation_product import catalog_updates
+
+CATEGORIES = (
+    "apple",
+    "apricot",
+    "avocado",
+    "banana",
+    "blueberry",
+    "cherry",
+    "grape",
+    "grapefruit",
+    "kiwi",
+    "lemon",
+    "lime",
+    "mango",
+    "melon",
+    "nectarine",
+    "orange",
+    "papaya",
+    "peach",
+    "pear",
+    "pineapple",
+    "plum",
+    "raspberry",
+    "strawberry",
+)
+VARIETY_WORDS = (
+    "early",
+    "golden",
+    "royal",
+    "sweet",
+    "red",
+    "green",
+    "late",
+    "wild",
+    "giant",
+    "baby",
+    "organic",
+    "premium",
+)
+PACKAGINGS = (
+    "1kg punnet",
+    "5kg crate",
+    "10kg box",
+    "18kg pallet",
+    "25kg sack",
+    "1 ton bulk bag",
+)
+ORGANISATION_WORDS = (
+    "acme",
+    "orchard",
+    "valley",
+    "harvest",
+    "fresh",
+    "global",
+    "farms",
+    "growers",
+    "produce",
+    "trading",
+    "market",
+    "supply",
+)
+ORGANISATION_SUFFIXES = ("Ltd", "LLC", "Co", "Group", "Cooperative", "GmbH")
+VOLUME_UNITS = ("kg", "ton", "box", "pallet")
+PRICE_UNITS = ("USD/kg", "USD/ton", "EUR/kg", "GBP/box")
+# Number of products per order and their weights: most orders have a few lines
+LINE_COUNTS = (1, 2, 3, 4, 5, 6, 8, 10, 15, 20)
+LINE_COUNT_WEIGHTS = (20, 22, 18, 12, 9, 6, 5, 4, 2, 2)
+# Share of the orders amending an earlier order through References
+REFERENCE_RATE = 0.1
+# Share of the quantities that don't start with a number
+UNPARSED_RATE = 0.02
+# Rows generated and copied at a time
+COPY_BATCH_SIZE = 50_000
+
+
+class Dataset:
+    """
+    Deterministic synthetic data: `size` orders of organisations and products, their
+    numbers derived from `size`, the same rows for the same size and seed. As in real
+    trade a few organisations place many of the orders and a few products appear on
+    many of the order lines, see `_rank`.
+
+    Keyword arguments:
+        size -- Number of orders, e.g. 10_000, 100_000 or 1_000_000
+        seed -- Seed of the random number generator
+    """
+
+    def __init__(self, size: int, seed: int = 0):
+        self.size = size
+        self.seed = seed
+        self.organisations = max(size // 100, 10)
+        self.products = max(size // 20, len(CATEGORIES))
+
+    def _random(self, table: str) -> Random:
+        # Every table has its own generator so each is reproducible on its own
+        return Random(f"{self.seed}:{self.size}:{table}")
+
+    def iter_products(self) -> Iterator[Tuple[int, str, str, str]]:
+        """
+        Rows of the products table: (id, Category, Variety, Packaging).
+        """
+        random = self._random("products")
+        for id in range(1, self.products + 1):
+            category = CATEGORIES[id % len(CATEGORIES)]
+            words = random.sample(VARIETY_WORDS, 2)
+            # The ID makes the (Category, Variety, Packaging) natural key unique
+            variety = f"{words[0]} {words[1]} {category} {id}"
+            yield id, category, variety, random.choice(PACKAGINGS)
+
+    def iter_organisations(self) -> Iterator[Tuple[int, str, str]]:
+        """
+        Rows of the organisations table: (id, Name, Type).
+        """
+        random = self._random("organisations")
+        types = [type.value for type in OrganisationTypeEnum]
+        for id in range(1, self.organisations + 1):
+            words = random.sample(ORGANISATION_WORDS, 2)
+            suffix = random.choice(ORGANISATION_SUFFIXES)
+            name = f"{words[0].title()} {words[1].title()} {suffix} {id}"
+            yield id, name, random.choice(types)
+
+    def _quantity(self, random: Random, units: Sequence[str], maximum: int) -> str:
+        if random.random() < UNPARSED_RATE:
+            return f"about {random.randint(1, maximum)} {random.choice(units)}"
+        return f"{random.randint(1, maximum * 100) / 100} {random.choice(units)}"
+
+    def iter_orders(
+        self,
+    ) -> Iterator[Tuple[Tuple[Any, ...], List[Tuple[Any, ...]]]]:
+        """
+        Rows of the orders table, (id, Type, References, Organisation_id), each with the
+        rows of its order lines: (Order_id, Line_number, Product_id, Volume,
+        Price_per_unit, Volume_amount, Price_per_unit_amount).
+        """
+        random = self._random("orders")
+        types = [type.value for type in OrderTypeEnum]
+        for id in range(1, self.size + 1):
+            organisation_id = _rank(random, self.organisations)
+            references = None
+            if id > 1 and random.random() < REFERENCE_RATE:
+                references = random.randint(max(id - 1000, 1), id - 1)
+            order: Tuple[Any, ...] = (
+                id,
+                random.choice(types),
+                references,
+                organisation_id,
+            )
+            count = random.choices(LINE_COUNTS, LINE_COUNT_WEIGHTS)[0]
+            product_ids = {_rank(random, self.products) for _ in range(count)}
+            lines: List[Tuple[Any, ...]] = []
+            for line_number, product_id in enumerate(sorted(product_ids)):
+                volume = self._quantity(random, VOLUME_UNITS, 100)
+                price = self._quantity(random, PRICE_UNITS, 1000)
+                lines.append(
+                    (
+                        id,
+                        line_number,
+                        product_id,
+                        volume,
+                        price,
+                        parse_amount(volume),
+                        parse_amount(price),
+                    )
+                )
+            yield order, lines
+
+    def iter_order_lines(self) -> Iterator[Tuple[Any, ...]]:
+        """
+        Rows of the order_lines table, see `iter_orders`.
+        """
+        for _, lines in self.iter_orders():
+            yield from lines
+
+
+def _rank(random: Random, count: int) -> int:
+    """
+    Log-uniformly distributed rank from 1 to count: the first ranks are drawn far more
+    often than the last ones, e.g. the busiest organisations or most traded products.
+    """
+    return min(int(count ** random.random()), count)
+
+
+def _copy(
+    connection: Any, table: str, columns: Sequence[str], rows: Iterable[Any]
+) -> int:
+    """
+    COPY rows into a table in batches of COPY_BATCH_SIZE.
+    """
+    columns_sql = ", ".join(f'"{column}"' for column in columns)
+    sql = f"COPY {table} ({columns_sql}) FROM STDIN WITH (FORMAT csv, ENCODING 'UTF8')"
+    count = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    with connection.cursor() as cursor:
+
+        def flush() -> None:
+            cursor.copy_expert(sql, io.BytesIO(buffer.getvalue().encode()))
+            buffer.seek(0)
+            buffer.truncate()
+
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+            if count % COPY_BATCH_SIZE == 0:
+                flush()
+        flush()
+    return count
+
+
+def load_dataset(engine: Engine, dataset: Dataset) -> dict[str, Any]:
+    """
+    Replace every table of the database with the rows of a dataset. The tables are
+    dropped and created again from the models, so only use a benchmark database.
+
+    Keyword arguments:
+        engine -- Engine of the benchmark database
+        dataset -- The dataset to load
+    Return: Number of rows loaded per table and the seconds the load took
+    """
+    start = perf_counter()
+    with engine.begin() as connection:
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rows = {}
+    raw_connection = engine.raw_connection()
+    try:
+        rows["products"] = _copy(
+            raw_connection,
+            "products",
+            ("id", "Category", "Variety", "Packaging"),
+            dataset.iter_products(),
+        )
+        rows["organisations"] = _copy(
+            raw_connection,
+            "organisations",
+            ("id", "Name", "Type"),
+            dataset.iter_organisations(),
+        )
+        rows["orders"] = _copy(
+            raw_connection,
+            "orders",
+            ("id", "Type", "References", "Organisation_id"),
+            (order for order, _ in dataset.iter_orders()),
+        )
+        rows["order_lines"] = _copy(
+            raw_connection,
+            "order_lines",
+            (
+                "Order_id",
+                "Line_number",
+                "Product_id",
+                "Volume",
+                "Price_per_unit",
+                "Volume_amount",
+                "Price_per_unit_amount",
+            ),
+            dataset.iter_order_lines(),
+        )
+        raw_connection.commit()
+    finally:
+        raw_connection.close()
+
+    with engine.begin() as connection:
+        # The rows were copied with their IDs, new ones must follow them
+        for table in ("products", "organisations", "orders"):
+            connection.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT max(id) FROM {table}))"
+                )
+            )
+        for statement in catalog_updates(true(), 1):
+            connection.execute(statement)
+        for table in ("organisation_products", "organisation_product_volumes"):
+            rows[table] = connection.scalar(text(f"SELECT count(*) FROM {table}"))
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(
+            text("VACUUM ANALYZE")
+        )
+    return {"rows": rows, "seconds": perf_counter() - start}
+
+
+def sample_records(engine: Engine, count: int, seed: int = 0) -> dict[str, List[Any]]:
+    """
+    Random existing records for the benchmarks to request.
+
+    Keyword arguments:
+        engine -- Engine of the benchmark database
+        count -- Number of records per table
+        seed -- Seed of the sample
+    Return: Rows keyed by "products" (id, Category, Variety, Packaging),
+            "organisations" (id, Name) and "orders" (id)
+    """
+    columns = {
+        "products": 'id, "Category", "Variety", "Packaging"',
+        "organisations": 'id, "Name"',
+        "orders": "id",
+    }
+    with engine.connect() as connection:
+        connection.execute(
+            text("SELECT setseed(:seed)"), {"seed": Random(seed).random()}
+        )
+        return {
+            table: list(
+                connection.execute(
+                    text(f"SELECT {sql} FROM {table} ORDER BY random() LIMIT :count"),
+                    {"count": count},
+                )
+            )
+            for table, sql in columns.items()
+        }
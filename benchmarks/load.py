@@ -0,0 +1,414 @@
+import argparse
+import asyncio
+import json
+import re
+from collections import Counter
+from random import Random
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from benchmarks.stats import summarise
+from httpx import AsyncClient, Limits
+
+DEFAULT_COLLECTION = "Products_and_Supplies_API.postman_collection.json"
+DEFAULT_BASE_URL = "http://localhost:8004"
+# Latency percentiles reported per route
+LOAD_PERCENTILES = (50, 95, 99, 99.9)
+
+VARIABLE = re.compile(r"{{\s*([^}\s]+)\s*}}")
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+class CollectionRequest:
+    """
+    A request of a Postman collection, ready to be sent to any base URL.
+
+    Keyword arguments:
+        name -- Folder and name of the request, e.g. "Products/Get many Products"
+        method -- HTTP method
+        url -- Path and query string of the request
+        headers -- Request headers
+        body -- Request body, if any
+    """
+
+    def __init__(
+        self,
+        name: str,
+        method: str,
+        url: str,
+        headers: Dict[str, str],
+        body: Optional[bytes],
+    ):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.route = route_of(method, url)
+        self.weight = 1.0
+
+
+def route_of(method: str, url: str) -> str:
+    """
+    Route of a request, its path with the numeric IDs replaced, e.g.
+    "GET /api/product/{id}" for GET /api/product/33?cursor=...
+
+    Keyword arguments:
+        method -- HTTP method
+        url -- Path, optionally with a query string
+    Return: The method and templated path
+    """
+    path = urlsplit(url).path
+    return f"{method} {ID_SEGMENT.sub('/{id}', path)}"
+
+
+def _substitute(text: str, variables: Dict[str, str]) -> str:
+    return VARIABLE.sub(lambda match: variables.get(match[1], match[0]), text)
+
+
+def load_collection(
+    path: str, variables: Optional[Dict[str, str]] = None
+) -> List[CollectionRequest]:
+    """
+    Read the requests of a Postman collection (format v2.1), depth first.
+
+    Keyword arguments:
+        path -- Path of the collection's JSON file
+        variables -- Values of {{variables}}, overriding the collection's own
+    Return: The requests, their URLs stripped of the scheme and host they were saved with
+    """
+    with open(path, encoding="utf-8") as file:
+        collection = json.load(file)
+    values = {
+        variable["key"]: str(variable.get("value", ""))
+        for variable in collection.get("variable", [])
+    }
+    values.update(variables or {})
+
+    requests = []
+
+    def walk(items: List[Dict[str, Any]], folder: str) -> None:
+        for item in items:
+            name = f"{folder}/{item['name']}" if folder else item["name"]
+            if "item" in item:
+                walk(item["item"], name)
+                continue
+            request = item["request"]
+            url = request["url"]
+            raw = url if isinstance(url, str) else url["raw"]
+            # Some URLs were saved quoted, as copied from a shell
+            parts = urlsplit(_substitute(raw, values).strip("'\" "))
+            headers = {
+                header["key"]: _substitute(header["value"], values)
+                for header in request.get("header", [])
+                if not header.get("disabled")
+            }
+            body = None
+            if request.get("body", {}).get("mode") == "raw":
+                body = _substitute(request["body"]["raw"], values).encode()
+                language = request["body"].get("options", {}).get("raw", {})
+                if language.get("language") == "json":
+                    headers.setdefault("Content-Type", "application/json")
+            requests.append(
+                CollectionRequest(
+                    name,
+                    request["method"].upper(),
+                    parts.path + (f"?{parts.query}" if parts.query else ""),
+                    headers,
+                    body,
+                )
+            )
+
+    walk(collection["item"], "")
+    return requests
+
+
+class RouteStatistics:
+    """
+    Latencies and outcomes of the requests sent to a route.
+    """
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.statuses: Counter[str] = Counter()
+        self.errors = 0
+
+    def observe(self, seconds: float, status: str, error: bool) -> None:
+        self.latencies.append(seconds)
+        self.statuses[status] += 1
+        self.errors += error
+
+    def report(self, seconds: float) -> Dict[str, Any]:
+        """
+        Summary of the route's requests over a run of `seconds`.
+        """
+        count = len(self.latencies)
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "throughput": count / seconds if seconds else 0.0,
+            "statuses": dict(self.statuses),
+            "latency": summarise(self.latencies, LOAD_PERCENTILES),
+        }
+
+
+class LoadGenerator:
+    """
+    Send a weighted mix of collection requests to an app and record their outcomes per
+    route. Responses with a status code of 400 or more and failed requests are errors.
+
+    Keyword arguments:
+        client -- Client of the app, its base URL set
+        requests -- The requests to pick from, in proportion to their weight
+        seed -- Seed of the picks
+    """
+
+    def __init__(
+        self, client: AsyncClient, requests: Sequence[CollectionRequest], seed: int = 0
+    ):
+        self.client = client
+        self.requests = [request for request in requests if request.weight > 0]
+        if not self.requests:
+            raise ValueError("No request to send, every weight is 0")
+        self.weights = [request.weight for request in self.requests]
+        self.random = Random(seed)
+        self.routes: Dict[str, RouteStatistics] = {}
+        self.total = RouteStatistics()
+
+    def pick(self) -> CollectionRequest:
+        return self.random.choices(self.requests, self.weights)[0]
+
+    async def send(self, request: CollectionRequest, start: float) -> None:
+        """
+        Send a request and record its latency from `start`, the perf_counter() time it
+        was meant to be sent at.
+        """
+        try:
+            response = await self.client.request(
+                request.method,
+                request.url,
+                headers=request.headers,
+                content=request.body,
+            )
+            status, error = str(response.status_code), response.status_code >= 400
+        except Exception as exception:
+            status, error = type(exception).__name__, True
+        seconds = perf_counter() - start
+        self.routes.setdefault(request.route, RouteStatistics()).observe(
+            seconds, status, error
+        )
+        self.total.observe(seconds, status, error)
+
+    async def closed_loop(
+        self, concurrency: int, duration: float, limit: Optional[int] = None
+    ) -> float:
+        """
+        Keep `concurrency` requests in flight, each worker sending its next request as
+        soon as the previous one completes.
+
+        Keyword arguments:
+            concurrency -- Number of workers
+            duration -- Seconds to send requests for
+            limit -- Stop after this many requests
+        Return: Seconds the run took
+        """
+        start = perf_counter()
+        sent = 0
+
+        async def worker() -> None:
+            nonlocal sent
+            while perf_counter() - start < duration and (limit is None or sent < limit):
+                sent += 1
+                await self.send(self.pick(), perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return perf_counter() - start
+
+    async def open_loop(
+        self,
+        rps: float,
+        concurrency: int,
+        duration: float,
+        limit: Optional[int] = None,
+        poisson: bool = True,
+    ) -> float:
+        """
+        Send requests at a target rate whatever the response times, as independent users
+        do. Latencies are measured from when each request was due, so requests queued
+        behind the `concurrency` limit count their wait (no coordinated omission).
+
+        Keyword arguments:
+            rps -- Target requests per second
+            concurrency -- Maximum number of requests in flight
+            duration -- Seconds to send requests for
+            limit -- Stop after this many requests
+            poisson -- Exponentially distributed gaps between requests instead of
+                       evenly spaced ones
+        Return: Seconds the run took
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        tasks: List[asyncio.Task[None]] = []
+        start = perf_counter()
+        due = start
+
+        async def send(request: CollectionRequest, due: float) -> None:
+            async with semaphore:
+                await self.send(request, due)
+
+        while due - start < duration and (limit is None or len(tasks) < limit):
+            delay = due - perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(self.pick(), due)))
+            due += self.random.expovariate(rps) if poisson else 1 / rps
+        await asyncio.gather(*tasks)
+        return perf_counter() - start
+
+    def report(self, seconds: float) -> Dict[str, Any]:
+        """
+        Summary of the run, in total and per route.
+        """
+        return {
+            "seconds": seconds,
+            "total": self.total.report(seconds),
+            "routes": {
+                route: statistics.report(seconds)
+                for route, statistics in sorted(self.routes.items())
+            },
+        }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """
+    The report of a run as a table, one row per route and a total row.
+    """
+    header = (
+        f"{'route':<40}{'requests':>10}{'errors':>9}{'rps':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'p99.9 ms':>10}"
+    )
+    lines = [header]
+    rows = [*report["routes"].items(), ("total", report["total"])]
+    for route, summary in rows:
+        latency = summary["latency"]
+        lines.append(
+            f"{route:<40}{summary['requests']:>10}"
+            f"{summary['error_rate']:>9.1%}{summary['throughput']:>9.1f}"
+            f"{latency['p50_ms']:>10.1f}{latency['p95_ms']:>10.1f}"
+            f"{latency['p99_ms']:>10.1f}{latency['p99.9_ms']:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def _key_value(text: str) -> tuple[str, str]:
+    key, separator, value = text.rpartition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Expected NAME=VALUE, got {text!r}")
+    return key, value
+
+
+async def _run(
+    args: argparse.Namespace, requests: List[CollectionRequest]
+) -> Dict[str, Any]:
+    limits = Limits(max_connections=args.concurrency)
+    async with AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        generator = LoadGenerator(client, requests, args.seed)
+        if args.rps:
+            seconds = await generator.open_loop(
+                args.rps,
+                args.concurrency,
+                args.duration,
+                args.requests,
+                not args.uniform,
+            )
+        else:
+            seconds = await generator.closed_loop(
+                args.concurrency, args.duration, args.requests
+            )
+        return generator.report(seconds)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line interface, e.g.
+    `python -m benchmarks.load --rps 200 --duration 60 --include GET`.
+    Replays the requests of the Postman collection against a running app and prints
+    the latency percentiles, error rate and throughput of each route.
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay the requests of a Postman collection as concurrent traffic"
+    )
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL)
+    parser.add_argument(
+        "--rps",
+        type=float,
+        help="Target requests per second of an open loop, by default closed loop",
+    )
+    parser.add_argument(
+        "--uniform",
+        action="store_true",
+        help="Space the open loop's requests evenly instead of as a Poisson process",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=10,
+        help="Closed loop workers, or maximum requests in flight of an open loop",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds")
+    parser.add_argument("--requests", type=int, help="Stop after this many requests")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds")
+    parser.add_argument(
+        "--include", help="Only send the requests whose 'METHOD folder/name' matches"
+    )
+    parser.add_argument(
+        "--exclude", help="Leave out the requests whose 'METHOD folder/name' matches"
+    )
+    parser.add_argument(
+        "--weight",
+        type=_key_value,
+        action="append",
+        default=[],
+        metavar="NAME=WEIGHT",
+        help=(
+            "Relative weight of the requests named NAME or folder/NAME, 1 by default. "
+            "Can be repeated"
+        ),
+    )
+    parser.add_argument(
+        "--variable",
+        type=_key_value,
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Value of a {{variable}} of the collection. Can be repeated",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    requests = load_collection(args.collection, dict(args.variable))
+    weights = {name: float(weight) for name, weight in args.weight}
+    for request in requests:
+        label = f"{request.method} {request.name}"
+        if args.include and not re.search(args.include, label):
+            request.weight = 0
+        elif args.exclude and re.search(args.exclude, label):
+            request.weight = 0
+        else:
+            short_name = request.name.rsplit("/", 1)[-1]
+            request.weight = weights.get(request.name, weights.get(short_name, 1.0))
+
+    report = asyncio.run(_run(args, requests))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+from datetime import datetime, timezone
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Sequence
+
+from benchmarks.cases import Case, Records, crud_cases, endpoint_cases
+from benchmarks.data import Dataset, load_dataset, sample_records
+from benchmarks.stats import summarise
+from pydantic import BaseModel
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+# Records of each table the benchmarks pick from
+SAMPLE_SIZE = 1000
+# Share of the iterations run by the cases reading whole tables
+HEAVY_RATE = 0.05
+
+
+class BenchmarkResult(BaseModel):
+    # Number of orders in the dataset
+    size: int
+    # "endpoint" or "crud"
+    kind: str
+    name: str
+    iterations: int
+    concurrency: int
+    errors: int
+    # The first error, if any
+    error: Optional[str]
+    # Operations per second, counting only the timed part of each iteration
+    throughput: float
+    # Mean, percentiles and max latency in milliseconds, e.g. {"p50_ms": 1.2, ...}
+    latency: Dict[str, float]
+
+
+async def run_case(
+    case: Case, size: int, iterations: int, warmup: int, concurrency: int = 1
+) -> BenchmarkResult:
+    """
+    Time the iterations of a case, after untimed warmup iterations.
+
+    Keyword arguments:
+        case -- The case to run
+        size -- Number of orders in the dataset, recorded in the result
+        iterations -- Number of timed iterations
+        warmup -- Number of untimed iterations run first
+        concurrency -- Number of iterations run at once
+    Return: BenchmarkResult of the timed iterations
+    """
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async def iterate(count: int, timed: bool) -> None:
+        for _ in range(count):
+            try:
+                argument = await case.prepare() if case.prepare is not None else None
+                start = perf_counter()
+                await case.run(argument)
+            except Exception as error:
+                if timed:
+                    errors.append(f"{type(error).__name__}: {error}")
+                continue
+            if timed:
+                latencies.append(perf_counter() - start)
+
+    await iterate(warmup, timed=False)
+    counts = [iterations // concurrency] * concurrency
+    counts[0] += iterations % concurrency
+    await asyncio.gather(*(iterate(count, timed=True) for count in counts))
+
+    busy = sum(latencies)
+    return BenchmarkResult(
+        size=size,
+        kind=case.kind,
+        name=case.name,
+        iterations=iterations,
+        concurrency=concurrency,
+        errors=len(errors),
+        error=errors[0] if errors else None,
+        throughput=len(latencies) * concurrency / busy if busy else 0.0,
+        latency=summarise(latencies),
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, check=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scaling_table(results: Sequence[BenchmarkResult], sizes: Sequence[int]) -> str:
+    """
+    Median latency of every case at each dataset size, one row per case.
+
+    Keyword arguments:
+        results -- The benchmark results
+        sizes -- The dataset sizes, in the order of the columns
+    Return: The table as text
+    """
+    p50: Dict[str, Dict[int, float]] = {}
+    for result in results:
+        p50.setdefault(result.name, {})[result.size] = result.latency["p50_ms"]
+    width = max([len(name) for name in p50] + [4])
+    lines = [
+        f"{'p50 ms':<{width}}" + "".join(f"{size:>12,}" for size in sizes),
+    ]
+    for name, latencies in p50.items():
+        cells = [
+            f"{latencies[size]:>12.2f}" if size in latencies else f"{'':>12}"
+            for size in sizes
+        ]
+        lines.append(f"{name:<{width}}" + "".join(cells))
+    return "\n".join(lines)
+
+
+async def _run(args: argparse.Namespace) -> Dict[str, Any]:
+    from httpx import AsyncClient
+    from sqlalchemy import text
+
+    from src.database.cache import get_cache, get_cache_statuses
+    from src.database.session import SessionLocal, async_engine, engine
+    from src.main import get_app
+
+    with engine.connect() as connection:
+        server_version = connection.scalar(text("SHOW server_version"))
+    report: Dict[str, Any] = {
+        "metadata": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "postgres": server_version,
+            "seed": args.seed,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+        },
+        "datasets": [],
+        "results": [],
+    }
+    pattern = re.compile(args.cases) if args.cases else None
+    results: List[BenchmarkResult] = []
+
+    for size in args.sizes:
+        dataset = Dataset(size, args.seed)
+        if not args.skip_load:
+            print(f"Loading {size:,} orders...", flush=True)
+            loaded = load_dataset(engine, dataset)
+            # The tables and their enum types were created again
+            engine.dispose()
+            await async_engine.dispose()
+            for namespace in get_cache_statuses():
+                get_cache(namespace).clear()
+            print(f"Loaded {loaded['rows']} in {loaded['seconds']:.1f}s", flush=True)
+            report["datasets"].append({"size": size, "seed": args.seed, **loaded})
+        records = Records(
+            sample_records(engine, SAMPLE_SIZE, args.seed), size, args.seed
+        )
+
+        async with AsyncClient(app=get_app(), base_url="http://benchmark") as client:
+            cases = []
+            if "endpoint" in args.kind:
+                cases += endpoint_cases(client, records)
+            if "crud" in args.kind:
+                cases += crud_cases(SessionLocal, records)
+            for case in cases:
+                if pattern is not None and not pattern.search(case.name):
+                    continue
+                iterations = args.iterations
+                if case.heavy:
+                    iterations = max(int(iterations * HEAVY_RATE), 3)
+                result = await run_case(
+                    case,
+                    size,
+                    iterations,
+                    min(args.warmup, iterations),
+                    args.concurrency if case.kind == "endpoint" else 1,
+                )
+                results.append(result)
+                line = (
+                    f"{size:>12,} {case.name:<60} "
+                    f"p50 {result.latency['p50_ms']:9.2f} ms "
+                    f"p99 {result.latency['p99_ms']:9.2f} ms "
+                    f"{result.throughput:9.1f}/s"
+                )
+                if result.errors:
+                    line += f" {result.errors} errors: {result.error}"
+                print(line, flush=True)
+
+    await async_engine.dispose()
+    report["results"] = [result.dict() for result in results]
+    print(scaling_table(results, args.sizes))
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line interface, e.g.
+    `python -m benchmarks --database-url postgresql://... --sizes 10000 100000`.
+    Loads each dataset size in turn, benchmarks every endpoint and CRUD method against
+    it and writes the results as JSON.
+    """
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark the endpoints and CRUD methods on synthetic datasets. "
+            "The tables of the database are dropped and created again."
+        )
+    )
+    parser.add_argument(
+        "--database-url",
+        required=True,
+        help="Database to load the datasets into, never a database in use",
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="Number of orders of each dataset",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Requests in flight at once for the endpoint benchmarks",
+    )
+    parser.add_argument(
+        "--kind", choices=["endpoint", "crud"], nargs="+", default=["endpoint", "crud"]
+    )
+    parser.add_argument("--cases", help="Only run the cases whose name matches")
+    parser.add_argument(
+        "--skip-load",
+        action="store_true",
+        help="Benchmark the data already loaded, e.g. to rerun a single size",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Keep the read-through cache enabled, by default every read hits the database",
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    args = parser.parse_args(argv)
+
+    # The settings are read from the environment when the app's modules are imported
+    os.environ["DATABASE_URL"] = args.database_url
+    if not args.cache:
+        os.environ["CACHE_MAX_SIZE"] = "0"
+    logging.disable(logging.WARNING)
+
+    report = asyncio.run(_run(args))
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
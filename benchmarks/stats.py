@@ -0,0 +1,40 @@
+from math import ceil
+from typing import Dict, Sequence
+
+# Percentiles reported for every benchmark
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Nearest-rank percentile of sorted values.
+
+    Keyword arguments:
+        values -- The values, sorted in ascending order
+        q -- The percentile, from 0 to 100, e.g. 99.9
+    Return: The smallest value greater than or equal to q percent of the values
+    """
+    if not values:
+        return 0.0
+    # Rounded so that e.g. the 99.9th percentile of 1000 values is the 999th one
+    rank = ceil(round(q * len(values) / 100, 9))
+    return values[min(max(rank, 1), len(values)) - 1]
+
+
+def summarise(
+    latencies: Sequence[float], percentiles: Sequence[float] = PERCENTILES
+) -> Dict[str, float]:
+    """
+    Summary statistics of latencies, in milliseconds.
+
+    Keyword arguments:
+        latencies -- The latencies in seconds
+        percentiles -- The percentiles to report, keyed e.g. "p99" or "p99.9"
+    Return: Dictionary of the mean, percentiles and max latency in milliseconds
+    """
+    values = sorted(latencies)
+    summary = {"mean_ms": sum(values) / len(values) * 1000 if values else 0.0}
+    for q in percentiles:
+        summary[f"p{q:g}_ms"] = percentile(values, q) * 1000
+    summary["max_ms"] = values[-1] * 1000 if values else 0.0
+    return summary
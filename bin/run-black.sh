@@ -1,2 +1,2 @@
 #!/usr/bin/env bash
-poetry run black $@ bin src tests --exclude="src/database/alembic"
\ No newline at end of file
+poetry run black $@ benchmarks bin src tests --exclude="src/database/alembic"
\ No newline at end of file
@@ -1,2 +1,2 @@
 #!/usr/bin/env bash
-poetry run flake8 --config ./setup.cfg src tests
\ No newline at end of file
+poetry run flake8 --config ./setup.cfg benchmarks src tests
\ No newline at end of file
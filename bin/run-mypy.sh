@@ -2,4 +2,4 @@
 
 set -e
 
-poetry run mypy src
\ No newline at end of file
+poetry run mypy benchmarks src
\ No newline at end of file
@@ -1,5 +1,6 @@
 import logging
 from functools import lru_cache
+from typing import Dict
 
 from pydantic import AnyUrl, BaseSettings
 
@@ -10,9 +11,31 @@ class Settings(BaseSettings):
     environment: str = "dev"
     testing: bool = bool(0)
     database_url: AnyUrl = None  # type: ignore
+    # Connection pool, see https://docs.sqlalchemy.org/en/20/core/pooling.html
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    database_pool_timeout: float = 30.0
+    database_pool_recycle: int = -1
+    database_pool_pre_ping: bool = False
+    # Read-through cache of records served by ID, a max size of 0 disables it
+    cache_max_size: int = 10_000
+    cache_ttl: float = 60.0
+    # Requests taking longer (in seconds) are logged with their SQL statements
+    slow_request_seconds: float = 1.0
+    # Logs are written to stdout by a background thread, see src/logs.py
+    log_level: str = "INFO"
+    # "json" for one JSON object per line, "text" for plain lines
+    log_format: str = "json"
+    # Records waiting to be written, more are dropped rather than block the app
+    log_queue_size: int = 10_000
+    # Share of the records below WARNING to keep by logger, e.g. {"uvicorn.access": 0.1}
+    log_sample_rates: Dict[str, float] = {}
+    # Responses stored for the retries of requests sent with an Idempotency-Key
+    idempotency_key_ttl: float = 86_400.0
+    idempotency_max_keys: int = 100_000
 
 
 @lru_cache()
-def get_settings() -> BaseSettings:
+def get_settings() -> Settings:
     log.info("Loading config settings from the environment...")
     return Settings()
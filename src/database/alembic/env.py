@@ -15,7 +15,9 @@ sys.path.append(str(PROJECT_DIR))
 from src.database.models.base import Base
 from src.database.models.product import Product
 from src.database.models.order import Order
+from src.database.models.order_line import OrderLine
 from src.database.models.organisation import Organisation
+from src.database.models.organisation_product import OrganisationProduct, OrganisationProductVolume
 
 PROJECT_DIR = Path(__file__).parent.parent.parent.parent
 dotenv.load_dotenv(PROJECT_DIR / ".env")
@@ -42,6 +44,15 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    """Leave the prefix search indexes out of autogenerate.
+
+    Alembic doesn't reflect the COLLATE of an expression index, so it would
+    drop and recreate the lower(column COLLATE "C") indexes on every revision.
+    """
+    return not (type_ == "index" and name.endswith("_prefix"))
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -58,6 +69,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -81,7 +93,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
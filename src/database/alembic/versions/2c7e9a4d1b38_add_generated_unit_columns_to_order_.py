@@ -0,0 +1,33 @@
+"""add generated unit columns to order_lines
+
+Revision ID: 2c7e9a4d1b38
+Revises: 8e1f4b7c2a53
+Create Date: 2026-10-18 21:47:19.032861
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c7e9a4d1b38'
+down_revision = '8e1f4b7c2a53'
+branch_labels = None
+depends_on = None
+
+# Text after the leading number of the quantity, NULL if its amount wasn't parsed
+UNIT = (
+    'CASE WHEN "{0}_amount" IS NOT NULL THEN btrim(regexp_replace('
+    '"{0}", \'^\\s*([-+]?(?:\\d+(?:\\.\\d*)?|\\.\\d+))\', \'\')) END'
+)
+
+
+def upgrade() -> None:
+    # Postgres fills in the existing rows
+    op.add_column('order_lines', sa.Column('Volume_unit', sa.String(), sa.Computed(UNIT.format('Volume')), nullable=True))
+    op.add_column('order_lines', sa.Column('Price_per_unit_unit', sa.String(), sa.Computed(UNIT.format('Price_per_unit')), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('order_lines', 'Price_per_unit_unit')
+    op.drop_column('order_lines', 'Volume_unit')
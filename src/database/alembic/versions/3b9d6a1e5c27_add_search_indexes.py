@@ -0,0 +1,33 @@
+"""add trigram and prefix indexes for search
+
+Revision ID: 3b9d6a1e5c27
+Revises: 7f2c5e8a9b61
+Create Date: 2026-10-18 16:48:03.551920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d6a1e5c27'
+down_revision = '7f2c5e8a9b61'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs searched by CRUDBase.search
+SEARCH_COLUMNS = [('organisations', 'Name'), ('products', 'Category'), ('products', 'Variety')]
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, column in SEARCH_COLUMNS:
+        op.create_index(f'ix_{table}_{column}_trgm', table, [column], unique=False, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'})
+        op.create_index(f'ix_{table}_{column}_prefix', table, [sa.text(f'lower("{column}" COLLATE "C")')], unique=False)
+
+
+def downgrade() -> None:
+    for table, column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_{table}_{column}_prefix', table_name=table)
+        op.drop_index(f'ix_{table}_{column}_trgm', table_name=table)
+    # pg_trgm is left installed, other objects of the database may use it
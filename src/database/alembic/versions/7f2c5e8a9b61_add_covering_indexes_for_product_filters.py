@@ -0,0 +1,34 @@
+"""add covering indexes for product filters
+
+Revision ID: 7f2c5e8a9b61
+Revises: e4a7c2b9d1f3
+Create Date: 2026-10-18 15:21:47.902115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7f2c5e8a9b61'
+down_revision = 'e4a7c2b9d1f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The unique index replaces the unique constraint (and the Category index, one of its
+    # prefixes), also covering the id so lookups by natural key are index-only scans
+    op.create_index('ix_products_Category_Variety_Packaging', 'products', ['Category', 'Variety', 'Packaging'], unique=True, postgresql_include=['id'])
+    op.drop_constraint('products_Category_Variety_Packaging_key', 'products', type_='unique')
+    op.drop_index('ix_products_Category', table_name='products')
+    op.create_index('ix_products_Variety_Packaging', 'products', ['Variety', 'Packaging'], unique=False, postgresql_include=['Category', 'id'])
+    op.create_index('ix_products_Packaging_Category', 'products', ['Packaging', 'Category'], unique=False, postgresql_include=['Variety', 'id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_products_Packaging_Category', table_name='products')
+    op.drop_index('ix_products_Variety_Packaging', table_name='products')
+    op.create_index('ix_products_Category', 'products', ['Category'], unique=False)
+    op.create_unique_constraint('products_Category_Variety_Packaging_key', 'products', ['Category', 'Variety', 'Packaging'])
+    op.drop_index('ix_products_Category_Variety_Packaging', table_name='products')
@@ -0,0 +1,32 @@
+"""lower search prefixes with the database collation
+
+Revision ID: 8e1f4b7c2a53
+Revises: 5d8a3f1c6e92
+Create Date: 2026-10-18 21:12:37.418205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e1f4b7c2a53'
+down_revision = '5d8a3f1c6e92'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs searched by CRUDBase.search
+SEARCH_COLUMNS = [('organisations', 'Name'), ('products', 'Category'), ('products', 'Variety')]
+
+
+def upgrade() -> None:
+    # lower() under the "C" collation only lower cases ASCII letters
+    for table, column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_{table}_{column}_prefix', table_name=table)
+        op.create_index(f'ix_{table}_{column}_prefix', table, [sa.text(f'(lower("{column}") COLLATE "C")')], unique=False)
+
+
+def downgrade() -> None:
+    for table, column in SEARCH_COLUMNS:
+        op.drop_index(f'ix_{table}_{column}_prefix', table_name=table)
+        op.create_index(f'ix_{table}_{column}_prefix', table, [sa.text(f'lower("{column}" COLLATE "C")')], unique=False)
@@ -0,0 +1,120 @@
+"""add order_lines table replacing orders.Products
+
+Revision ID: b3e1f0c7a2d4
+Revises: 42d94e9d825e
+Create Date: 2026-10-18 10:12:31.481207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.database.models.order import ProductType
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e1f0c7a2d4'
+down_revision = '42d94e9d825e'
+branch_labels = None
+depends_on = None
+
+# Leading number of a free text quantity, kept in step with order_line.LEADING_NUMBER
+LEADING_NUMBER = r"^\s*([-+]?(\d+(\.\d*)?|\.\d+))"
+
+
+def upgrade() -> None:
+    op.create_table('order_lines',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('Order_id', sa.Integer(), nullable=False),
+    sa.Column('Line_number', sa.Integer(), nullable=False),
+    sa.Column('Product_id', sa.Integer(), nullable=False),
+    sa.Column('Volume', sa.String(), nullable=False),
+    sa.Column('Price_per_unit', sa.String(), nullable=False),
+    sa.Column('Volume_amount', sa.Numeric(), nullable=True),
+    sa.Column('Price_per_unit_amount', sa.Numeric(), nullable=True),
+    sa.ForeignKeyConstraint(['Order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['Product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('Order_id', 'Line_number')
+    )
+    op.create_index(op.f('ix_order_lines_Product_id'), 'order_lines', ['Product_id'], unique=False)
+    op.create_index(op.f('ix_order_lines_Volume_amount'), 'order_lines', ['Volume_amount'], unique=False)
+    op.create_index(op.f('ix_order_lines_Price_per_unit_amount'), 'order_lines', ['Price_per_unit_amount'], unique=False)
+
+    # Split the comma-joined products of every order into order lines
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE legacy_order_lines ON COMMIT DROP AS
+        SELECT
+            orders.id AS "Order_id",
+            line.ordinality - 1 AS "Line_number",
+            split_part(line.product, ',', 1) AS "Category",
+            split_part(line.product, ',', 2) AS "Variety",
+            split_part(line.product, ',', 3) AS "Packaging",
+            split_part(line.product, ',', 4) AS "Volume",
+            split_part(line.product, ',', 5) AS "Price_per_unit"
+        FROM orders
+        CROSS JOIN LATERAL unnest(orders."Products") WITH ORDINALITY AS line(product, ordinality)
+        WHERE line.product IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO products ("Category", "Variety", "Packaging")
+        SELECT DISTINCT "Category", "Variety", "Packaging" FROM legacy_order_lines
+        ON CONFLICT DO NOTHING
+        """
+    )
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO order_lines (
+                "Order_id", "Line_number", "Product_id", "Volume", "Price_per_unit",
+                "Volume_amount", "Price_per_unit_amount"
+            )
+            SELECT
+                legacy."Order_id",
+                legacy."Line_number",
+                products.id,
+                legacy."Volume",
+                legacy."Price_per_unit",
+                (substring(legacy."Volume" FROM :leading_number))::numeric,
+                (substring(legacy."Price_per_unit" FROM :leading_number))::numeric
+            FROM legacy_order_lines AS legacy
+            JOIN products USING ("Category", "Variety", "Packaging")
+            """
+        ).bindparams(leading_number=LEADING_NUMBER)
+    )
+    op.drop_column('orders', 'Products')
+
+
+def downgrade() -> None:
+    op.add_column('orders', sa.Column('Products', sa.ARRAY(ProductType()), nullable=True))
+    op.execute(
+        """
+        UPDATE orders
+        SET "Products" = lines."Products"
+        FROM (
+            SELECT
+                order_lines."Order_id",
+                array_agg(
+                    concat_ws(
+                        ',',
+                        products."Category",
+                        products."Variety",
+                        products."Packaging",
+                        order_lines."Volume",
+                        order_lines."Price_per_unit"
+                    )
+                    ORDER BY order_lines."Line_number"
+                ) AS "Products"
+            FROM order_lines
+            JOIN products ON products.id = order_lines."Product_id"
+            GROUP BY order_lines."Order_id"
+        ) AS lines
+        WHERE orders.id = lines."Order_id"
+        """
+    )
+    op.drop_index(op.f('ix_order_lines_Price_per_unit_amount'), table_name='order_lines')
+    op.drop_index(op.f('ix_order_lines_Volume_amount'), table_name='order_lines')
+    op.drop_index(op.f('ix_order_lines_Product_id'), table_name='order_lines')
+    op.drop_table('order_lines')
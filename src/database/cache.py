@@ -0,0 +1,214 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.config import get_settings
+from src.database.schemas.cache import CacheStatus
+
+
+class CacheBackend(ABC):
+    """
+    Interface of the caches used by the CRUD classes to serve records by ID.
+    Implementations must be safe to share between threads and keep their counters in
+    `hits`, `misses`, `evictions` and `expirations`.
+    """
+
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Cached value of `key`, or None (counted as a miss) if absent or expired.
+        """
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Cache `value` under `key`.
+        """
+
+    @abstractmethod
+    def delete(self, key: Hashable) -> None:
+        """
+        Evict `key` if present.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Evict every key.
+        """
+
+    @abstractmethod
+    def status(self) -> CacheStatus:
+        """
+        Snapshot of the cache's size and counters.
+        """
+
+
+class InMemoryCache(CacheBackend):
+    """
+    Thread safe, in-process LRU cache whose entries expire `ttl` seconds after being set.
+
+    Keyword arguments:
+        max_size -- Maximum number of entries, the least recently used entry is evicted
+                    beyond that. 0 disables the cache
+        ttl -- Seconds an entry stays valid for
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def status(self) -> CacheStatus:
+        with self._lock:
+            return CacheStatus(
+                backend=type(self).__name__,
+                size=len(self._entries),
+                max_size=self.max_size,
+                ttl=self.ttl,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                expirations=self.expirations,
+            )
+
+
+def _in_memory_cache(namespace: str) -> CacheBackend:
+    settings = get_settings()
+    return InMemoryCache(max_size=settings.cache_max_size, ttl=settings.cache_ttl)
+
+
+_cache_factory: Callable[[str], CacheBackend] = _in_memory_cache
+_caches: Dict[str, CacheBackend] = {}
+_caches_lock = Lock()
+
+
+def get_cache(namespace: str) -> CacheBackend:
+    """
+    The cache of a namespace (a table name), created on first use.
+
+    Keyword arguments:
+        namespace -- Name of the cache, e.g. "products"
+    Return: The namespace's CacheBackend
+    """
+    with _caches_lock:
+        if namespace not in _caches:
+            _caches[namespace] = _cache_factory(namespace)
+        return _caches[namespace]
+
+
+def set_cache_factory(factory: Callable[[str], CacheBackend]) -> None:
+    """
+    Plug in another cache backend. Existing caches are dropped and every namespace is
+    created by `factory` from then on.
+
+    Keyword arguments:
+        factory -- Callable creating the CacheBackend of a namespace
+    """
+    global _cache_factory
+    with _caches_lock:
+        _cache_factory = factory
+        _caches.clear()
+
+
+def get_cache_statuses() -> Dict[str, CacheStatus]:
+    """
+    Snapshot of every cache in use.
+
+    Return: Dictionary of CacheStatus pydantic classes keyed by namespace
+    """
+    with _caches_lock:
+        caches = dict(_caches)
+    return {namespace: cache.status() for namespace, cache in sorted(caches.items())}
+
+
+# Cache entries a session's writes made stale, evicted again once it commits
+_STALE_ENTRIES_KEY = "stale_cache_entries"
+
+
+def _evict(cache: CacheBackend, key: Optional[Hashable]) -> None:
+    if key is None:
+        cache.clear()
+    else:
+        cache.delete(key)
+
+
+def evict_on_commit(
+    db: Session, cache: CacheBackend, key: Optional[Hashable] = None
+) -> None:
+    """
+    Evict a cache entry made stale by a write of the session, now and again once the
+    session's transaction commits: a concurrent request missing the cache in between
+    reads the row as last committed and caches it.
+
+    Keyword arguments:
+        db -- Database session making the write
+        cache -- The cache holding the entry
+        key -- Key of the entry, None to evict every entry of the cache
+    """
+    _evict(cache, key)
+    stale: Set[Tuple[CacheBackend, Optional[Hashable]]] = db.info.setdefault(
+        _STALE_ENTRIES_KEY, set()
+    )
+    stale.add((cache, key))
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed(db: Session) -> None:
+    for cache, key in db.info.pop(_STALE_ENTRIES_KEY, ()):
+        _evict(cache, key)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back(db: Session) -> None:
+    # The rows are as they were, the entries evicted before the write stay valid
+    db.info.pop(_STALE_ENTRIES_KEY, None)
@@ -1,14 +1,55 @@
-from typing import Any, Dict, Generic, List, TypeVar, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from pydantic import BaseModel
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    ColumnElement,
+    Row,
+    Select,
+    String,
+    any_,
+    case,
+    func,
+    literal,
+    literal_column,
+    null,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from src.database.cache import CacheBackend, evict_on_commit, get_cache
 from src.database.models.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# Shortest text fuzzy matched by `search`, shorter texts only match prefixes
+MIN_FUZZY_SEARCH_LENGTH = 3
+# Code points Postgres' chr rejects: the UTF-16 surrogates, then past the last one
+SURROGATES_START = 0xD800
+SURROGATES_END = 0xE000
+MAX_CODE_POINT = 0x10FFFF
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """
@@ -19,11 +60,98 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     CreateSchemaType -- Pydantic model class used to create new records
     UpdateSchemaType -- Pydantic model class used to update existing records
 
+    Every method has an awaitable counterpart prefixed with `a` (e.g. `aget`) taking an
+    AsyncSession. These run the synchronous method through `AsyncSession.run_sync`, so the
+    queries are awaited on the asyncio driver and never block the event loop.
+
+    The read endpoints use the projection methods (`project`, `get_dict`,
+    `get_multi_dicts`), which select only the columns they serialise into tuples and
+    dictionaries and leave the session's identity map empty. The other methods load ORM
+    instances for the writes.
+
+    `get_dict` and `get_versioned_dict` read through the cache of the model's table,
+    which `update` and `remove` invalidate. Subclasses extend `_invalidate` to evict the
+    records a write makes stale.
+
     Return: return_description
     """
 
+    # Columns matched by `search`, each with a pg_trgm GIN index and a prefix index
+    search_columns: Sequence[str] = ()
+    # Columns read by `get_multi_dicts`, in the order of the fields of the DBBase schema
+    dict_columns: Sequence[str] = ()
+
     def __init__(self, model: ModelType):
         self.model = model
+        self.cache: CacheBackend = get_cache(model.__tablename__)
+
+    def _invalidate(self, db: Session, db_obj: ModelType) -> None:
+        """
+        Evict the cached records made stale by writing db_obj, now and once the write is
+        committed, see `evict_on_commit`. Called before the write is committed, while
+        db_obj's attributes can still be read without a query.
+
+        Keyword arguments:
+            db -- Database session making the write
+            db_obj -- SQLAlchemy model class being updated or deleted
+        """
+        evict_on_commit(db, self.cache, db_obj.id)
+
+    def _load_deferred(self, db: Session, db_obj: ModelType) -> None:
+        """
+        Load the deferred attributes of db_obj that the endpoints return, which an async
+        session can't lazy load once it hands db_obj back. Nothing by default.
+
+        Keyword arguments:
+            db -- Database session
+            db_obj -- SQLAlchemy model class being returned
+        """
+
+    def _id_is(self, id: int) -> ColumnElement[bool]:
+        """
+        Filter clause matching the record with the given ID. The ID is bound as a BIGINT so
+        that the asyncpg driver treats an out of range ID as "no match" rather than an error.
+
+        Keyword arguments:
+            id -- ID of the record to match
+        Return: SQLAlchemy filter clause
+        """
+        return self.model.id == literal(id, BigInteger)  # type: ignore
+
+    def _id_in(self, ids: Iterable[int]) -> ColumnElement[bool]:
+        """
+        Filter clause matching the records with any of the given IDs, sent as a single
+        BIGINT array parameter however many IDs there are.
+
+        Keyword arguments:
+            ids -- IDs of the records to match
+        Return: SQLAlchemy filter clause
+        """
+        return self.model.id == any_(literal(list(ids), ARRAY(BigInteger)))  # type: ignore
+
+    @staticmethod
+    def _row_version(model: Base) -> ColumnElement[str]:
+        """
+        Identity and row version of a table's rows, e.g. "orders:42:1187". Postgres gives
+        every version of a row a new xmin (the ID of the transaction that wrote it).
+
+        Keyword arguments:
+            model -- SQLAlchemy model class of the table
+        Return: SQLAlchemy text expression
+        """
+        table = model.__tablename__
+        return func.concat(table, ":", model.id, ":", literal_column(f"{table}.xmin"))
+
+    def _version_parts(self, id: int) -> List[Select[Any]]:
+        """
+        Queries selecting the `_row_version` of every row a record is built from.
+        Subclasses add the rows of the relationships they serialise.
+
+        Keyword arguments:
+            id -- ID of the record
+        Return: List of SQLAlchemy select statements of a single text column
+        """
+        return [select(self._row_version(self.model)).where(self._id_is(id))]
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """
@@ -39,37 +167,322 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self._load_deferred(db, db_obj)
         return db_obj  # type: ignore
 
     def get(self, db: Session, id: int) -> ModelType | None:
         """
-        Retrieve a record from the database.
+        Retrieve a record from the database, e.g. to update or delete it.
+        Use `get_dict` to serialise a record.
 
         Keyword arguments:
             db -- Database session
             id -- ID of the record to retrieve
         Return: SQLAlchemy model class or None
         """
-        result = db.query(self.model).filter(self.model.id == id).first()
-        return result if result else None
+        return db.query(self.model).filter(self._id_is(id)).first()  # type: ignore
+
+    def project(
+        self,
+        db: Session,
+        columns: Sequence[str],
+        *,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        filters: Sequence[ColumnElement[bool]] = (),
+    ) -> List[Row[Any]]:
+        """
+        Retrieve some columns of records, ordered by ID, as lightweight named tuples.
+        No ORM instance is built nor added to the session's identity map, and only the
+        named columns are read, which lets an index-only scan answer narrow queries.
+
+        Keyword arguments:
+            db -- Database session
+            columns -- Names of the columns to select
+            skip -- Number of records to skip
+            limit -- Number of records to retrieve, all of them if None
+            after -- Only retrieve records with an ID greater than this one
+            filters -- Further filter clauses on the records
+        Return: List of rows with one attribute per column
+        """
+        filters = list(filters)
+        if after is not None:
+            filters.append(self.model.id > literal(after, BigInteger))
+        return db.execute(
+            select(*(getattr(self.model, name) for name in columns))
+            .where(*filters)
+            .order_by(self.model.id)
+            .offset(skip)
+            .limit(limit)
+        ).all()  # type: ignore
+
+    def get_versioned_dict(
+        self, db: Session, id: int
+    ) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Retrieve a record as a dictionary ready to be encoded as JSON along with its
+        `get_version`, both from the cache if present, so that a cache hit runs no query.
+        Otherwise the version is read first and the record by projecting its
+        `dict_columns`, then both are cached together.
+
+        Keyword arguments:
+            db -- Database session
+            id -- ID of the record to retrieve
+        Return: Tuple of the dictionary shaped as the DBBase schema and the version,
+                or None
+        """
+        cached = self.cache.get(id)
+        if cached is not None:
+            return cached  # type: ignore
+
+        # Read before the record: should a write commit in between, the version is
+        # older than the record and only costs the client a full response
+        version = self.get_version(db, id)
+        if version is None:
+            return None
+        rows = self.project(db, self.dict_columns, filters=[self._id_is(id)])
+        if not rows:
+            return None
+        versioned = (self.rows_to_dicts(db, rows)[0], version)
+        self.cache.set(id, versioned)
+        return versioned
+
+    def get_dict(self, db: Session, id: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a record as a dictionary ready to be encoded as JSON, see
+        `get_versioned_dict`.
+
+        Keyword arguments:
+            db -- Database session
+            id -- ID of the record to retrieve
+        Return: Dictionary shaped as the DBBase schema or None
+        """
+        versioned = self.get_versioned_dict(db, id)
+        return versioned[0] if versioned is not None else None
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 10
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[int] = None,
     ) -> List[ModelType]:
         """
-        Retrieve multiple records from the database.
+        Retrieve multiple records from the database, ordered by ID.
+        Pass the ID of the last record of the previous page as `after` to page through
+        the table with an index range scan (keyset pagination), so that deep pages cost
+        the same as the first one. `skip` is still applied after `after`.
 
         Keyword arguments:
             db -- Database session
             skip -- Number of records to skip
             limit -- Number of records to retrieve
+            after -- Only retrieve records with an ID greater than this one
         Return: List of SQLAlchemy model classes or None
         """
-        result = (
-            db.query(self.model).order_by(self.model.id).offset(skip).limit(limit).all()
-        )
+        query = db.query(self.model)
+        if after is not None:
+            query = query.filter(self.model.id > literal(after, BigInteger))
+        result = query.order_by(self.model.id).offset(skip).limit(limit).all()
         return result if result else None  # type: ignore
 
+    def rows_to_dicts(
+        self, db: Session, rows: Sequence[Row[Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build the records of `get_multi_dicts` from their `dict_columns` rows.
+        Subclasses override it to add the fields that aren't columns of the table.
+
+        Keyword arguments:
+            db -- Database session
+            rows -- Rows of the `dict_columns`, ordered by ID
+        Return: List of dictionaries shaped as the DBBase schema
+        """
+        return [dict(zip(self.dict_columns, row)) for row in rows]
+
+    def get_multi_dicts(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[int] = None,
+        filters: Sequence[ColumnElement[bool]] = (),
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve the same page of records as `get_multi`, as dictionaries ready to be
+        encoded as JSON. Only the `dict_columns` are projected, so neither the session's
+        identity map nor a pydantic schema has to process every row of large pages.
+
+        Keyword arguments:
+            db -- Database session
+            skip -- Number of records to skip
+            limit -- Number of records to retrieve
+            after -- Only retrieve records with an ID greater than this one
+            filters -- Further filter clauses on the records
+        Return: List of dictionaries shaped as the DBBase schema
+        """
+        rows = self.project(
+            db, self.dict_columns, skip=skip, limit=limit, after=after, filters=filters
+        )
+        return self.rows_to_dicts(db, rows)
+
+    def iter_batches(
+        self, db: Session, *, batch_size: int = 1000
+    ) -> Iterator[Sequence[ModelType]]:
+        """
+        Iterate over every record, ordered by ID, in batches read from a single
+        server-side cursor. Only one batch is held in memory at a time and, being a
+        single query, the records are read from one snapshot of the table.
+
+        Keyword arguments:
+            db -- Database session
+            batch_size -- Number of records fetched from the cursor at a time
+        Return: Iterator of batches of SQLAlchemy model classes
+        """
+        result = db.scalars(
+            select(self.model)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        yield from result.partitions()
+
+    def get_many_by_ids(self, db: Session, ids: Iterable[int]) -> List[ModelType]:
+        """
+        Retrieve the records with the given IDs in a single query, ordered by ID.
+        IDs that don't exist are ignored.
+
+        Keyword arguments:
+            db -- Database session
+            ids -- IDs of the records to retrieve
+        Return: List of SQLAlchemy model classes
+        """
+        return (  # type: ignore
+            db.query(self.model).filter(self._id_in(ids)).order_by(self.model.id).all()
+        )
+
+    def get_existing_ids(self, db: Session, ids: Iterable[int]) -> Set[int]:
+        """
+        Check which of the given IDs exist without loading the records.
+
+        Keyword arguments:
+            db -- Database session
+            ids -- IDs to look up
+        Return: Set of the IDs that exist
+        """
+        return set(db.scalars(select(self.model.id).where(self._id_in(ids))))
+
+    def get_version(self, db: Session, id: int) -> Optional[str]:
+        """
+        Fingerprint of a record's current state without loading it: a hash of the row
+        versions of every row the record is built from. It changes whenever one of those
+        rows is inserted, updated or deleted.
+
+        Keyword arguments:
+            db -- Database session
+            id -- ID of the record
+        Return: Hex digest or None if the record doesn't exist
+        """
+        parts = union_all(*self._version_parts(id)).subquery()
+        part = parts.c[0]
+        return db.scalar(
+            select(
+                func.md5(
+                    func.string_agg(
+                        part,
+                        aggregate_order_by(literal_column("','"), part),  # type: ignore
+                    )
+                )
+            )
+        )
+
+    def _search_statement(self, text: str, limit: int, fuzzy: bool) -> Select[Any]:
+        """
+        Query of `search`, ranking prefix matches and, if `fuzzy`, trigram matches.
+
+        Keyword arguments:
+            text -- Text to search
+            limit -- Maximum number of records to return
+            fuzzy -- Whether to include the matches of the trigram indexes
+        Return: SQLAlchemy select statement
+        """
+        # Lower cased by Postgres as the indexed columns are, Python's str.lower differs
+        # from it on some non-ASCII characters. Strings starting with term sort from term
+        # up to term with its last character incremented, bytewise. The code points of
+        # the UTF-16 surrogates have no character and are skipped, past the last code
+        # point there is no upper bound. Both bounds are constants the planner folds
+        # before looking up the index.
+        term = func.lower(literal(text, String))
+        last = func.ascii(func.right(term, 1))
+        upper = case(
+            (last == MAX_CODE_POINT, null()),
+            else_=func.left(term, -1, type_=String).concat(
+                func.chr(
+                    case((last == SURROGATES_START - 1, SURROGATES_END), else_=last + 1)
+                )
+            ),
+        )
+        table = self.model.__table__
+        columns = [table.c[name] for name in self.search_columns]
+
+        candidates = [
+            select(table.c.id, literal(True).label("prefix"))
+            .where(
+                key >= term.collate("C"),
+                or_(key < upper.collate("C"), upper.is_(None)),
+            )
+            .order_by(key)
+            .limit(limit)
+            for key in (func.lower(column).collate("C") for column in columns)
+        ]
+        # pg_trgm ignores case itself
+        if fuzzy:
+            candidates.extend(
+                select(table.c.id, literal(False).label("prefix"))
+                .where(column.op("%>")(text))
+                .order_by(func.word_similarity(text, column).desc())
+                .limit(limit)
+                for column in columns
+            )
+        matches = union_all(
+            *(candidate.subquery().select() for candidate in candidates)
+        ).subquery("matches")
+        prefix = func.bool_or(matches.c.prefix).label("prefix")
+        score = func.greatest(
+            *(func.word_similarity(text, column) for column in columns), 0
+        ).label("score")
+        return (
+            select(*table.c, prefix, score)
+            .join(matches, matches.c.id == table.c.id)
+            .group_by(table.c.id)
+            .order_by(prefix.desc(), score.desc(), table.c.id)
+            .limit(limit)
+        )
+
+    def search(self, db: Session, text: str, limit: int = 10) -> List[Row[Any]]:
+        """
+        Type-ahead search over the model's `search_columns`, ranked best match first.
+        Records with a column starting with the text (ignoring case) come first, found
+        with an ordered scan of the column's lower(column) COLLATE "C" index. Only when
+        they don't fill the page are fuzzy matches looked up in the column's pg_trgm GIN
+        index, ranked by how similar the text is to a word of the column. Each lookup is
+        limited to `limit` records per column.
+
+        Keyword arguments:
+            db -- Database session
+            text -- Text typed so far
+            limit -- Maximum number of records to return
+        Return: Rows of the table's columns with `prefix` (whether a column starts with
+                the text) and `score` (the best trigram word similarity, 0 to 1)
+        """
+        rows = list(db.execute(self._search_statement(text, limit, fuzzy=False)))
+        # Fewer than three characters make too few trigrams for a fuzzy match
+        if len(rows) < limit and len(text) >= MIN_FUZZY_SEARCH_LENGTH:
+            rows = list(db.execute(self._search_statement(text, limit, fuzzy=True)))
+        return rows
+
     def update(
         self,
         db: Session,
@@ -93,9 +506,11 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         for field, value in update_data.items():
             setattr(db_obj, field, value)
 
+        self._invalidate(db, db_obj)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self._load_deferred(db, db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
@@ -107,7 +522,252 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
             id -- ID of the record to delete
         Return: SQLAlchemy model class of the deleted record
         """
-        obj = db.query(self.model).filter(self.model.id == id).first()
+        obj = db.query(self.model).filter(self._id_is(id)).first()
+        if obj:
+            self._invalidate(db, obj)
+            # Can't be refreshed once deleted
+            self._load_deferred(db, obj)
         db.delete(obj)
         db.commit()
         return obj  # type: ignore
+
+    async def acreate(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """
+        Awaitable version of `create`.
+
+        Keyword arguments:
+            db -- Async database session
+            obj_in -- Pydantic model class used to create new records
+        Return: SQLAlchemy model class
+        """
+        return await db.run_sync(self.create, obj_in=obj_in)  # type: ignore
+
+    async def aget(self, db: AsyncSession, id: int) -> ModelType | None:
+        """
+        Awaitable version of `get`.
+
+        Keyword arguments:
+            db -- Async database session
+            id -- ID of the record to retrieve
+        Return: SQLAlchemy model class or None
+        """
+        return await db.run_sync(self.get, id)  # type: ignore
+
+    async def aproject(
+        self,
+        db: AsyncSession,
+        columns: Sequence[str],
+        *,
+        skip: int = 0,
+        limit: Optional[int] = None,
+        after: Optional[int] = None,
+        filters: Sequence[ColumnElement[bool]] = (),
+    ) -> List[Row[Any]]:
+        """
+        Awaitable version of `project`.
+
+        Keyword arguments:
+            db -- Async database session
+            columns -- Names of the columns to select
+            skip -- Number of records to skip
+            limit -- Number of records to retrieve, all of them if None
+            after -- Only retrieve records with an ID greater than this one
+            filters -- Further filter clauses on the records
+        Return: List of rows with one attribute per column
+        """
+        return await db.run_sync(  # type: ignore
+            self.project,
+            columns,
+            skip=skip,
+            limit=limit,
+            after=after,
+            filters=filters,
+        )
+
+    async def aget_versioned_dict(
+        self, db: AsyncSession, id: int
+    ) -> Optional[Tuple[Dict[str, Any], str]]:
+        """
+        Awaitable version of `get_versioned_dict`.
+
+        Keyword arguments:
+            db -- Async database session
+            id -- ID of the record to retrieve
+        Return: Tuple of the dictionary shaped as the DBBase schema and the version,
+                or None
+        """
+        return await db.run_sync(self.get_versioned_dict, id)  # type: ignore
+
+    async def aget_dict(self, db: AsyncSession, id: int) -> Optional[Dict[str, Any]]:
+        """
+        Awaitable version of `get_dict`.
+
+        Keyword arguments:
+            db -- Async database session
+            id -- ID of the record to retrieve
+        Return: Dictionary shaped as the DBBase schema or None
+        """
+        return await db.run_sync(self.get_dict, id)  # type: ignore
+
+    async def aget_multi_dicts(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[int] = None,
+        filters: Sequence[ColumnElement[bool]] = (),
+    ) -> List[Dict[str, Any]]:
+        """
+        Awaitable version of `get_multi_dicts`.
+
+        Keyword arguments:
+            db -- Async database session
+            skip -- Number of records to skip
+            limit -- Number of records to retrieve
+            after -- Only retrieve records with an ID greater than this one
+            filters -- Further filter clauses on the records
+        Return: List of dictionaries shaped as the DBBase schema
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_multi_dicts, skip=skip, limit=limit, after=after, filters=filters
+        )
+
+    async def aget_multi(
+        self,
+        db: AsyncSession,
+        *,
+        skip: int = 0,
+        limit: int = 10,
+        after: Optional[int] = None,
+    ) -> List[ModelType]:
+        """
+        Awaitable version of `get_multi`.
+
+        Keyword arguments:
+            db -- Async database session
+            skip -- Number of records to skip
+            limit -- Number of records to retrieve
+            after -- Only retrieve records with an ID greater than this one
+        Return: List of SQLAlchemy model classes or None
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_multi, skip=skip, limit=limit, after=after
+        )
+
+    async def aget_many_by_ids(
+        self, db: AsyncSession, ids: Iterable[int]
+    ) -> List[ModelType]:
+        """
+        Awaitable version of `get_many_by_ids`.
+
+        Keyword arguments:
+            db -- Async database session
+            ids -- IDs of the records to retrieve
+        Return: List of SQLAlchemy model classes
+        """
+        return await db.run_sync(self.get_many_by_ids, ids)  # type: ignore
+
+    async def aiter_batches(
+        self, db: AsyncSession, *, batch_size: int = 1000
+    ) -> AsyncIterator[Sequence[ModelType]]:
+        """
+        Asynchronous version of `iter_batches`, streaming the cursor with
+        `AsyncSession.stream_scalars` rather than through `run_sync`.
+
+        Keyword arguments:
+            db -- Async database session
+            batch_size -- Number of records fetched from the cursor at a time
+        Return: Async iterator of batches of SQLAlchemy model classes
+        """
+        result = await db.stream_scalars(
+            select(self.model)
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for batch in result.partitions():
+            yield batch
+
+    async def aiter_dict_batches(
+        self, db: AsyncSession, *, batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Version of `aiter_batches` projecting the `dict_columns` of every record into
+        dictionaries shaped as the DBBase schema, see `get_multi_dicts`.
+
+        Keyword arguments:
+            db -- Async database session
+            batch_size -- Number of records fetched from the cursor at a time
+        Return: Async iterator of batches of dictionaries
+        """
+        result = await db.stream(
+            select(*(getattr(self.model, name) for name in self.dict_columns))
+            .order_by(self.model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for batch in result.partitions():
+            yield await db.run_sync(self.rows_to_dicts, batch)
+
+    async def aget_existing_ids(self, db: AsyncSession, ids: Iterable[int]) -> Set[int]:
+        """
+        Awaitable version of `get_existing_ids`.
+
+        Keyword arguments:
+            db -- Async database session
+            ids -- IDs to look up
+        Return: Set of the IDs that exist
+        """
+        return await db.run_sync(self.get_existing_ids, ids)  # type: ignore
+
+    async def asearch(
+        self, db: AsyncSession, text: str, limit: int = 10
+    ) -> List[Row[Any]]:
+        """
+        Awaitable version of `search`.
+
+        Keyword arguments:
+            db -- Async database session
+            text -- Text typed so far
+            limit -- Maximum number of records to return
+        Return: Rows of the table's columns with `prefix` and `score`
+        """
+        return await db.run_sync(self.search, text, limit)  # type: ignore
+
+    async def aget_version(self, db: AsyncSession, id: int) -> Optional[str]:
+        """
+        Awaitable version of `get_version`.
+
+        Keyword arguments:
+            db -- Async database session
+            id -- ID of the record
+        Return: Hex digest or None if the record doesn't exist
+        """
+        return await db.run_sync(self.get_version, id)  # type: ignore
+
+    async def aupdate(
+        self,
+        db: AsyncSession,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+    ) -> ModelType:
+        """
+        Awaitable version of `update`.
+
+        Keyword arguments:
+            db -- Async database session
+            db_obj -- SQLAlchemy model class
+            obj_in -- Pydantic model class used to update existing records
+        Return: SQLAlchemy model class
+        """
+        return await db.run_sync(self.update, db_obj, obj_in)  # type: ignore
+
+    async def aremove(self, db: AsyncSession, *, id: int) -> ModelType:
+        """
+        Awaitable version of `remove`.
+
+        Keyword arguments:
+            db -- Async database session
+            id -- ID of the record to delete
+        Return: SQLAlchemy model class of the deleted record
+        """
+        return await db.run_sync(self.remove, id=id)  # type: ignore
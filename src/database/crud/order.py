@@ -1,60 +1,643 @@
-from typing import Tuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy.orm import Session
+from sqlalchemy import (
+    ARRAY,
+    BigInteger,
+    Integer,
+    Row,
+    Select,
+    all_,
+    any_,
+    case,
+    exists,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 
+from src.database.cache import evict_on_commit, get_cache
 from src.database.crud.base import CRUDBase
-from src.database.crud.product import CRUDProduct
+from src.database.crud.product import CRUDProduct, ProductKey
+from src.database.models.base import OrderTypeEnum
 from src.database.models.order import Order
+from src.database.models.order_line import OrderLine, parse_amount
+from src.database.models.organisation import Organisation
+from src.database.models.organisation_product import catalog_updates
 from src.database.models.product import Product
+from src.database.schemas.analytics import OrderGroupBy
 from src.database.schemas.order import OrderCreate, OrderUpdate
 from src.database.schemas.product import ProductCreate
 
 
+def _register_products(
+    db: Session, products: Iterable[Dict[str, Any]]
+) -> Tuple[Dict[ProductKey, int], list[int]]:
+    """
+    Register the products of order lines in the Products table.
+
+    Keyword arguments:
+    db -- The database session
+    products -- The order lines, as ProductOrderType dictionaries
+    Return: The ID of every product keyed by (Category, Variety, Packaging) and the IDs of
+            the newly created products
+    """
+    product_crud = CRUDProduct(Product)  # type: ignore
+    return product_crud.get_or_create_many(
+        db=db,
+        objs_in=[
+            ProductCreate(
+                Category=product["Category"],
+                Variety=product["Variety"],
+                Packaging=product["Packaging"],
+            )
+            for product in products
+        ],
+    )
+
+
+def _line_values(
+    products: Optional[Sequence[Dict[str, Any]]], ids_by_key: Dict[ProductKey, int]
+) -> list[Dict[str, Any]]:
+    """
+    Column values of the order lines of an order.
+
+    Keyword arguments:
+    products -- The order lines, as ProductOrderType dictionaries
+    ids_by_key -- The ID of every product keyed by (Category, Variety, Packaging)
+    Return: One dictionary of OrderLine column values per line, without the order ID
+    """
+    return [
+        {
+            "Line_number": line_number,
+            "Product_id": ids_by_key[
+                (product["Category"], product["Variety"], product["Packaging"])
+            ],
+            "Volume": product["Volume"],
+            "Price_per_unit": product["Price_per_unit"],
+            "Volume_amount": parse_amount(product["Volume"]),
+            "Price_per_unit_amount": parse_amount(product["Price_per_unit"]),
+        }
+        for line_number, product in enumerate(products or [])
+    ]
+
+
 class CRUDOrder(CRUDBase[Order, OrderCreate, OrderUpdate]):
     """
     Orders CRUD class with default methods to Create, Read, Update, Delete (CRUD).
     """
 
+    dict_columns = ("Type", "References", "Organisation_id", "id")
+
     def __init__(self, model: Order):
         super().__init__(model)
+        self.organisation_cache = get_cache(Organisation.__tablename__)
+
+    def _invalidate(self, db: Session, db_obj: Order) -> None:
+        super()._invalidate(db, db_obj)
+        # The organisation's Orders and Products include this order
+        evict_on_commit(db, self.organisation_cache, db_obj.Organisation_id)
+
+    def _update_catalogs(self, db: Session, ids: Iterable[int], sign: int) -> None:
+        """
+        Add the products of orders to their organisations' catalogs, or take them out.
+
+        Keyword arguments:
+        db -- The database session
+        ids -- IDs of the orders, as they are in the database
+        sign -- 1 to add the orders to the catalogs, -1 to take them out
+        """
+        for statement in catalog_updates(self._id_in(ids), sign):
+            db.execute(statement)
+
+    def rows_to_dicts(
+        self, db: Session, rows: Sequence[Row[Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build OrderDBBase dictionaries from rows of the `dict_columns`, reading the
+        products of all the orders with a single query.
+
+        Keyword arguments:
+        db -- The database session
+        rows -- Rows of the `dict_columns`
+        Return: One dictionary per row, shaped as OrderDBBase
+        """
+        ids = literal([row.id for row in rows], ARRAY(BigInteger))
+        products: Dict[int, list[Dict[str, Any]]] = {}
+        lines = db.execute(
+            select(
+                OrderLine.Order_id,
+                Product.Category,
+                Product.Variety,
+                Product.Packaging,
+                OrderLine.Volume,
+                OrderLine.Price_per_unit,
+            )
+            .join(Product, Product.id == OrderLine.Product_id)
+            .where(OrderLine.Order_id == any_(ids))
+            .order_by(OrderLine.Order_id, OrderLine.Line_number)
+        )
+        for order_id, category, variety, packaging, volume, price_per_unit in lines:
+            products.setdefault(order_id, []).append(
+                {
+                    "Category": category,
+                    "Variety": variety,
+                    "Packaging": packaging,
+                    "Volume": volume,
+                    "Price_per_unit": price_per_unit,
+                }
+            )
+        return [
+            {
+                "Type": type,
+                "References": references,
+                "Products": products.get(id, []),
+                "Organisation_id": organisation_id,
+                "id": id,
+            }
+            for type, references, organisation_id, id in rows
+        ]
+
+    def _version_parts(self, id: int) -> list[Select[Any]]:
+        lines = select(OrderLine).where(OrderLine.Order_id == literal(id, BigInteger))
+        return [
+            *super()._version_parts(id),
+            lines.with_only_columns(self._row_version(OrderLine)),
+            lines.join(Product).with_only_columns(self._row_version(Product)),
+        ]
+
+    def get_chains(
+        self, db: Session, ids: Iterable[int], descendants: bool = True
+    ) -> Dict[int, list[Tuple[Order, int]]]:
+        """
+        Resolve the reference chains of orders with a single recursive query: the orders
+        each order references, directly or through other orders, and optionally the orders
+        referencing it. A reference cycle ends the chain where it repeats itself.
+
+        Keyword arguments:
+        db -- The database session
+        ids -- IDs of the orders whose chains to resolve
+        descendants -- Whether to include the orders referencing each order
+        Return: For every order found, its chain as (order, depth) tuples ordered by depth
+                then ID. The order itself has depth 0, the orders it references negative
+                depths (-1 for its reference) and the orders referencing it positive ones.
+        """
+        ids = list(ids)
+        depth = literal_column("0", Integer).label("depth")
+
+        ancestors = (
+            select(
+                self.model.id.label("start"),
+                self.model.id,
+                self.model.References,
+                depth,
+                array([self.model.id]).label("path"),  # type: ignore
+            )
+            .where(self._id_in(ids))
+            .cte("ancestors", recursive=True)
+        )
+        parent = aliased(self.model)  # type: ignore
+        ancestors = ancestors.union_all(
+            select(
+                ancestors.c.start,
+                parent.id,
+                parent.References,
+                ancestors.c.depth - 1,
+                func.array_append(ancestors.c.path, parent.id),
+            )
+            .join(parent, parent.id == ancestors.c.References)
+            .where(parent.id != all_(ancestors.c.path))
+        )
+        chain = select(ancestors.c.start, ancestors.c.id, ancestors.c.depth)
+
+        if descendants:
+            children = (
+                select(
+                    self.model.id.label("start"),
+                    self.model.id,
+                    depth,
+                    array([self.model.id]).label("path"),  # type: ignore
+                )
+                .where(self._id_in(ids))
+                .cte("descendants", recursive=True)
+            )
+            child = aliased(self.model)  # type: ignore
+            children = children.union_all(
+                select(
+                    children.c.start,
+                    child.id,
+                    children.c.depth + 1,
+                    func.array_append(children.c.path, child.id),
+                )
+                .join(child, child.References == children.c.id)
+                .where(child.id != all_(children.c.path))
+            )
+            chain = union_all(  # type: ignore
+                chain,
+                select(children.c.start, children.c.id, children.c.depth).where(
+                    children.c.depth > 0
+                ),
+            )
+
+        chain_orders = chain.subquery("chain")
+        rows = db.execute(
+            select(chain_orders.c.start, self.model, chain_orders.c.depth)
+            .join(chain_orders, chain_orders.c.id == self.model.id)
+            .order_by(chain_orders.c.start, chain_orders.c.depth, self.model.id)
+        )
+        chains: Dict[int, list[Tuple[Order, int]]] = {}
+        seen: set[Tuple[int, int]] = set()
+        for start, order, order_depth in rows:
+            # Within a cycle an order is both referenced and referencing, keep it once
+            if (start, order.id) not in seen:
+                seen.add((start, order.id))
+                chains.setdefault(start, []).append((order, order_depth))
+        return chains
+
+    def get_reference_products(
+        self, db: Session, ids: Iterable[int]
+    ) -> Dict[int, Optional[list[Dict[str, Any]]]]:
+        """
+        Resolve the products an order referencing each of the given orders inherits when
+        it has none: the products of the nearest order of the reference chain that has
+        any. A single recursive query walks each chain, stopping at the first order with
+        order lines, and reads the columns of the products only.
+
+        Keyword arguments:
+        db -- The database session
+        ids -- IDs of the referenced orders
+        Return: For every order found, the inherited products as ProductOrderType
+                dictionaries, or None if no order of its chain has any
+        """
+        ids = list(ids)
+        ancestors = (
+            select(
+                self.model.id.label("start"),
+                self.model.id,
+                self.model.References,
+                exists().where(OrderLine.Order_id == self.model.id).label("has_lines"),
+                array([self.model.id]).label("path"),  # type: ignore
+            )
+            .where(self._id_in(ids))
+            .cte("reference_ancestors", recursive=True)
+        )
+        parent = aliased(self.model)  # type: ignore
+        ancestors = ancestors.union_all(
+            select(
+                ancestors.c.start,
+                parent.id,
+                parent.References,
+                exists().where(OrderLine.Order_id == parent.id),
+                func.array_append(ancestors.c.path, parent.id),
+            )
+            .join(parent, parent.id == ancestors.c.References)
+            .where(~ancestors.c.has_lines, parent.id != all_(ancestors.c.path))
+        )
+        rows = db.execute(
+            select(
+                ancestors.c.start,
+                Product.Category,
+                Product.Variety,
+                Product.Packaging,
+                OrderLine.Volume,
+                OrderLine.Price_per_unit,
+            )
+            .select_from(ancestors)
+            .outerjoin(OrderLine, OrderLine.Order_id == ancestors.c.id)
+            .outerjoin(Product, Product.id == OrderLine.Product_id)
+            .order_by(ancestors.c.start, OrderLine.Line_number)
+        )
+        found: set[int] = set()
+        products: Dict[int, list[Dict[str, Any]]] = {}
+        for start, category, variety, packaging, volume, price_per_unit in rows:
+            found.add(start)
+            # Only the last order of the chain can have order lines
+            if category is not None:
+                products.setdefault(start, []).append(
+                    {
+                        "Category": category,
+                        "Variety": variety,
+                        "Packaging": packaging,
+                        "Volume": volume,
+                        "Price_per_unit": price_per_unit,
+                    }
+                )
+        return {start: products.get(start) for start in found}
+
+    def get_totals(
+        self,
+        db: Session,
+        group_by: Sequence[OrderGroupBy] = (),
+        organisation_id: Optional[int] = None,
+        type: Optional[OrderTypeEnum] = None,
+        category: Optional[str] = None,
+        variety: Optional[str] = None,
+        packaging: Optional[str] = None,
+    ) -> List[Row[Any]]:
+        """
+        Total the orders and the volume and value of their order lines, aggregated in a
+        single query from the lines' parsed Volume and Price_per_unit amounts. Amounts
+        are only summed with amounts of the same unit, so every group is split by the
+        units of its lines' Volume and Price_per_unit: an order with lines in several
+        units counts in each of their groups.
+
+        Keyword arguments:
+        db -- The database session
+        group_by -- The fields to total by, all the orders are totalled together if empty
+        organisation_id -- Only total the orders of this organisation
+        type -- Only total the orders of this type
+        category -- Only total the order lines of products of this category
+        variety -- Only total the order lines of products of this variety
+        packaging -- Only total the order lines of products of this packaging
+        Return: One row per group, ordered by group, labelled as the OrderTotals fields
+        """
+        group_columns: Dict[OrderGroupBy, List[Any]] = {
+            OrderGroupBy.organisation: [
+                self.model.Organisation_id.label("Organisation_id"),
+                Organisation.Name.label("Organisation_name"),
+            ],
+            OrderGroupBy.category: [Product.Category.label("Category")],
+            OrderGroupBy.variety: [Product.Variety.label("Variety")],
+            OrderGroupBy.type: [self.model.Type.label("Type")],
+        }
+        columns = [
+            column
+            for group in dict.fromkeys(group_by)
+            for column in group_columns[group]
+        ] + [
+            OrderLine.Volume_unit.label("Volume_unit"),
+            OrderLine.Price_per_unit_unit.label("Price_per_unit_unit"),
+        ]
+        line_value = OrderLine.Volume_amount * OrderLine.Price_per_unit_amount
+        statement = (
+            select(
+                *columns,
+                func.count(self.model.id.distinct()).label("Orders"),
+                func.count(OrderLine.id).label("Lines"),
+                func.coalesce(func.sum(OrderLine.Volume_amount), 0).label("Volume"),
+                func.coalesce(func.sum(line_value), 0).label("Value"),
+                func.count(
+                    case(
+                        (
+                            or_(
+                                OrderLine.Volume_amount.is_(None),
+                                OrderLine.Price_per_unit_amount.is_(None),
+                            ),
+                            OrderLine.id,
+                        )
+                    )
+                ).label("Unparsed_lines"),
+            )
+            .select_from(self.model)
+            .outerjoin(OrderLine, OrderLine.Order_id == self.model.id)
+            .outerjoin(Product, Product.id == OrderLine.Product_id)
+        )
+        if OrderGroupBy.organisation in group_by:
+            statement = statement.outerjoin(
+                Organisation, Organisation.id == self.model.Organisation_id
+            )
+
+        filters = [
+            column == value
+            for column, value in (
+                (self.model.Type, type),
+                (Product.Category, category),
+                (Product.Variety, variety),
+                (Product.Packaging, packaging),
+            )
+            if value is not None
+        ]
+        if organisation_id is not None:
+            filters.append(
+                self.model.Organisation_id == literal(organisation_id, BigInteger)
+            )
+        positions: List[Any] = [literal_column(str(i + 1)) for i in range(len(columns))]
+        return list(
+            db.execute(
+                statement.where(*filters).group_by(*positions).order_by(*positions)
+            )
+        )
 
     def create_new_order(
         self, db: Session, obj_in: OrderCreate
     ) -> Tuple[Order, list[int]]:
         """
         Create a new order in the database.
-        For the list of products, iterate through them adding them to the Products table.
+        The order's products are registered in the Products table with one set-based
+        upsert, in the same transaction as the order and its order lines.
 
 
         Keyword arguments:
         db -- The database session
         obj_in -- The order object to create
-        Return: The created order object
+        Return: The created order object and the IDs of the newly created products
         """
+        order_data = obj_in.dict()
+        products = order_data.pop("Products")
+
+        # Create the products
+        ids_by_key, product_ids = _register_products(db, products or [])
 
         # Create the order
-        db_obj = self.model(**obj_in.dict())
+        db_obj = self.model(
+            **order_data,
+            Lines=[
+                OrderLine(**values) for values in _line_values(products, ids_by_key)
+            ],
+        )
         db.add(db_obj)
+        db.flush()
+        self._update_catalogs(db, [db_obj.id], 1)
+        evict_on_commit(db, self.organisation_cache, obj_in.Organisation_id)
         db.commit()
         db.refresh(db_obj)
+        return db_obj, product_ids
 
-        # Create the products
-        product_ids = []
-        product_crud = CRUDProduct(Product)  # type: ignore
-        if obj_in.Products:
-            for product in obj_in.Products:
-                product_obj_in = ProductCreate(
-                    Category=product.Category,
-                    Variety=product.Variety,
-                    Packaging=product.Packaging,
-                )
-                check = product_crud.get_many_by_category_and_variety_and_packaging(
-                    db=db,
-                    category=product_obj_in.Category,
-                    variety=product_obj_in.Variety,
-                    packaging=product_obj_in.Packaging,
-                )
-                if not check:
-                    product_created = product_crud.create(db=db, obj_in=product_obj_in)
-                    product_ids.append(product_created.id)
-        return db_obj, product_ids  # type: ignore
+    def update(
+        self,
+        db: Session,
+        db_obj: Order,
+        obj_in: Union[OrderUpdate, Dict[str, Any]],
+    ) -> Order:
+        """
+        Update an order in the database, replacing its order lines if Products are given.
+
+        Keyword arguments:
+        db -- The database session
+        db_obj -- The order to update
+        obj_in -- The order fields to update
+        Return: The updated order object
+        """
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+
+        # Evict the organisation before Organisation_id may change
+        self._invalidate(db, db_obj)
+        moved = "Products" in update_data or "Organisation_id" in update_data
+        if moved:
+            self._update_catalogs(db, [db_obj.id], -1)  # type: ignore
+        if "Products" in update_data:
+            products = update_data.pop("Products")
+            ids_by_key, _ = _register_products(db, products or [])
+            # Delete the old lines first so the new ones can reuse their line numbers
+            db_obj.Lines.clear()
+            db.flush()
+            db_obj.Lines = [
+                OrderLine(**values) for values in _line_values(products, ids_by_key)
+            ]
+        if moved:
+            for field, value in update_data.items():
+                setattr(db_obj, field, value)
+            db.flush()
+            self._update_catalogs(db, [db_obj.id], 1)  # type: ignore
+        return super().update(db, db_obj=db_obj, obj_in=update_data)
+
+    def remove(self, db: Session, *, id: int) -> Order:
+        """
+        Delete an order from the database, taking its products out of its organisation's
+        catalog.
+
+        Keyword arguments:
+        db -- The database session
+        id -- ID of the order to delete
+        Return: The deleted order object
+        """
+        self._update_catalogs(db, [id], -1)
+        return super().remove(db, id=id)
+
+    def create_many_orders(
+        self, db: Session, objs_in: Sequence[OrderCreate]
+    ) -> Tuple[list[int], list[int]]:
+        """
+        Create many orders in a single transaction.
+        The products of every order are registered with one set-based upsert and the
+        orders are inserted with multi-row INSERT statements.
+
+        Keyword arguments:
+        db -- The database session
+        objs_in -- The order objects to create, their references must exist
+        Return: The IDs of the created orders, in the order of objs_in, and the IDs of
+                the newly created products
+        """
+        if not objs_in:
+            return [], []
+
+        orders_data = [obj_in.dict() for obj_in in objs_in]
+        products = [order_data.pop("Products") or [] for order_data in orders_data]
+        ids_by_key, product_ids = _register_products(
+            db, (product for order_products in products for product in order_products)
+        )
+        order_ids = list(
+            db.scalars(
+                insert(self.model).returning(
+                    self.model.id, sort_by_parameter_order=True
+                ),
+                orders_data,
+            )
+        )
+        lines = [
+            {"Order_id": order_id, **values}
+            for order_id, order_products in zip(order_ids, products)
+            for values in _line_values(order_products, ids_by_key)
+        ]
+        if lines:
+            db.execute(insert(OrderLine), lines)
+        self._update_catalogs(db, order_ids, 1)
+        for obj_in in objs_in:
+            evict_on_commit(db, self.organisation_cache, obj_in.Organisation_id)
+        db.commit()
+        return order_ids, product_ids
+
+    async def aget_chains(
+        self, db: AsyncSession, ids: Iterable[int], descendants: bool = True
+    ) -> Dict[int, list[Tuple[Order, int]]]:
+        """
+        Awaitable version of `get_chains`.
+
+        Keyword arguments:
+        db -- The async database session
+        ids -- IDs of the orders whose chains to resolve
+        descendants -- Whether to include the orders referencing each order
+        Return: For every order found, its chain as (order, depth) tuples
+        """
+        return await db.run_sync(self.get_chains, ids, descendants)  # type: ignore
+
+    async def aget_reference_products(
+        self, db: AsyncSession, ids: Iterable[int]
+    ) -> Dict[int, Optional[list[Dict[str, Any]]]]:
+        """
+        Awaitable version of `get_reference_products`.
+
+        Keyword arguments:
+        db -- The async database session
+        ids -- IDs of the referenced orders
+        Return: For every order found, the inherited products or None
+        """
+        return await db.run_sync(self.get_reference_products, ids)  # type: ignore
+
+    async def aget_totals(
+        self,
+        db: AsyncSession,
+        group_by: Sequence[OrderGroupBy] = (),
+        organisation_id: Optional[int] = None,
+        type: Optional[OrderTypeEnum] = None,
+        category: Optional[str] = None,
+        variety: Optional[str] = None,
+        packaging: Optional[str] = None,
+    ) -> List[Row[Any]]:
+        """
+        Awaitable version of `get_totals`.
+
+        Keyword arguments:
+        db -- The async database session
+        group_by -- The fields to total by
+        organisation_id -- Only total the orders of this organisation
+        type -- Only total the orders of this type
+        category -- Only total the order lines of products of this category
+        variety -- Only total the order lines of products of this variety
+        packaging -- Only total the order lines of products of this packaging
+        Return: One row per group, labelled as the OrderTotals fields
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_totals,
+            group_by,
+            organisation_id,
+            type,
+            category,
+            variety,
+            packaging,
+        )
+
+    async def acreate_new_order(
+        self, db: AsyncSession, obj_in: OrderCreate
+    ) -> Tuple[Order, list[int]]:
+        """
+        Awaitable version of `create_new_order`.
+
+        Keyword arguments:
+        db -- The async database session
+        obj_in -- The order object to create
+        Return: The created order object
+        """
+        return await db.run_sync(self.create_new_order, obj_in)  # type: ignore
+
+    async def acreate_many_orders(
+        self, db: AsyncSession, objs_in: Sequence[OrderCreate]
+    ) -> Tuple[list[int], list[int]]:
+        """
+        Awaitable version of `create_many_orders`.
+
+        Keyword arguments:
+        db -- The async database session
+        objs_in -- The order objects to create, their references must exist
+        Return: The IDs of the created orders and of the newly created products
+        """
+        return await db.run_sync(self.create_many_orders, objs_in)  # type: ignore
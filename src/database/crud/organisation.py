@@ -1,5 +1,16 @@
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import ARRAY, BigInteger, Row, Select, any_, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
 from src.database.crud.base import CRUDBase
+from src.database.crud.order import CRUDOrder
+from src.database.models.order import Order
+from src.database.models.order_line import OrderLine
 from src.database.models.organisation import Organisation
+from src.database.models.organisation_product import OrganisationProduct, unit_volumes
+from src.database.models.product import Product
 from src.database.schemas.organisation import OrganisationCreate, OrganisationUpdate
 
 # TODO: Add Get Many with filters
@@ -10,5 +21,127 @@ class CRUDOrganisation(CRUDBase[Organisation, OrganisationCreate, OrganisationUp
     Organisation CRUD class with default methods to Create, Read, Update, Delete (CRUD).
     """
 
+    search_columns = ("Name",)
+    # Products is projected from the deferred Organisation.Products aggregate
+    dict_columns = ("Name", "Type", "Products", "id")
+
     def __init__(self, model: Organisation):
         super().__init__(model)
+
+    def _load_deferred(self, db: Session, db_obj: Organisation) -> None:
+        db.refresh(db_obj, ["Products"])
+
+    def rows_to_dicts(
+        self, db: Session, rows: Sequence[Row[Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Build OrganisationDBBase dictionaries from rows of the `dict_columns`, reading
+        the orders of all the organisations with a single query and their products with
+        another. Products is aggregated in SQL by the projection of the rows.
+
+        Keyword arguments:
+        db -- The database session
+        rows -- Rows of the `dict_columns`
+        Return: One dictionary per row, shaped as OrganisationDBBase
+        """
+        order_crud = CRUDOrder(Order)  # type: ignore
+        ids = literal([row.id for row in rows], ARRAY(BigInteger))
+        order_rows = db.execute(
+            select(*(getattr(Order, name) for name in order_crud.dict_columns))
+            .where(Order.Organisation_id == any_(ids))
+            .order_by(Order.id)
+        ).all()
+        orders: Dict[int, list[Dict[str, Any]]] = {}
+        for order in order_crud.rows_to_dicts(db, order_rows):
+            orders.setdefault(order["Organisation_id"], []).append(order)
+        return [
+            {
+                "Name": name,
+                "Type": type,
+                "id": id,
+                "Orders": orders.get(id, []),
+                "Products": products,
+            }
+            for name, type, products, id in rows
+        ]
+
+    def _version_parts(self, id: int) -> list[Select[Any]]:
+        orders = select(Order).where(Order.Organisation_id == literal(id, BigInteger))
+        lines = orders.join(OrderLine)
+        return [
+            *super()._version_parts(id),
+            orders.with_only_columns(self._row_version(Order)),
+            lines.with_only_columns(self._row_version(OrderLine)),
+            lines.join(Product).with_only_columns(self._row_version(Product)),
+        ]
+
+    def get_catalog(
+        self,
+        db: Session,
+        id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+    ) -> Optional[List[Row[Any]]]:
+        """
+        Get the catalog of an organisation: the distinct products of its orders with
+        their order counts and total volume per unit, ordered by product ID. The catalog
+        is kept up to date as orders are written, so reading a page of it costs the same
+        however many orders the organisation has.
+
+        Keyword arguments:
+        db -- The database session
+        id -- ID of the organisation
+        skip -- The number of products to skip
+        limit -- The number of products to return
+        after -- Only return products with an ID greater than this one
+        Return: One row per product labelled as the CatalogProduct fields, or None if
+                the organisation doesn't exist
+        """
+        filters = [OrganisationProduct.Organisation_id == literal(id, BigInteger)]
+        if after is not None:
+            filters.append(OrganisationProduct.Product_id > literal(after, BigInteger))
+        rows = list(
+            db.execute(
+                select(
+                    Product.id,
+                    Product.Category,
+                    Product.Variety,
+                    Product.Packaging,
+                    OrganisationProduct.Orders,
+                    OrganisationProduct.Lines,
+                    unit_volumes().label("Volumes"),
+                )
+                .join(Product, Product.id == OrganisationProduct.Product_id)
+                .where(*filters)
+                .order_by(OrganisationProduct.Product_id)
+                .offset(skip)
+                .limit(limit)
+            )
+        )
+        if not rows and db.scalar(select(self.model.id).where(self._id_is(id))) is None:
+            return None
+        return rows
+
+    async def aget_catalog(
+        self,
+        db: AsyncSession,
+        id: int,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+    ) -> Optional[List[Row[Any]]]:
+        """
+        Awaitable version of `get_catalog`.
+
+        Keyword arguments:
+        db -- The async database session
+        id -- ID of the organisation
+        skip -- The number of products to skip
+        limit -- The number of products to return
+        after -- Only return products with an ID greater than this one
+        Return: One row per product, or None if the organisation doesn't exist
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_catalog, id, skip, limit, after
+        )
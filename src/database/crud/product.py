@@ -1,18 +1,105 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, ColumnElement, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from src.database.cache import evict_on_commit, get_cache
 from src.database.crud.base import CRUDBase
+from src.database.models.order import Order
+from src.database.models.organisation import Organisation
 from src.database.models.product import Product
 from src.database.schemas.product import ProductCreate, ProductUpdate
 
+# (Category, Variety, Packaging), the natural key of a product
+ProductKey = Tuple[str, str, str]
+
 
 class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
     """
     Product CRUD class with default methods to Create, Read, Update, Delete (CRUD).
     """
 
+    search_columns = ("Category", "Variety")
+    # Covered by each of the products indexes
+    dict_columns = ("Category", "Variety", "Packaging", "id")
+
     def __init__(self, model: Product):
         super().__init__(model)
 
+    def _invalidate(self, db: Session, db_obj: Product) -> None:
+        super()._invalidate(db, db_obj)
+        # Orders and organisations list the product's fields through their order lines
+        evict_on_commit(db, get_cache(Order.__tablename__))
+        evict_on_commit(db, get_cache(Organisation.__tablename__))
+
+    def filters(
+        self,
+        category: Optional[str] = None,
+        variety: Optional[str] = None,
+        packaging: Optional[str] = None,
+    ) -> List[ColumnElement[bool]]:
+        """
+        Filter clauses matching any combination of category, variety and packaging.
+
+        input params:
+            category -- The category of the product, if filtered on
+            variety -- The variety of the product, if filtered on
+            packaging -- The packaging of the product, if filtered on
+
+        return: A list of filter clauses, for `get_multi_dicts` for instance
+        """
+        return [
+            column == value
+            for column, value in (
+                (self.model.Category, category),
+                (self.model.Variety, variety),
+                (self.model.Packaging, packaging),
+            )
+            if value is not None
+        ]
+
+    def get_many_filtered(
+        self,
+        db: Session,
+        category: Optional[str] = None,
+        variety: Optional[str] = None,
+        packaging: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+    ) -> list[Product]:
+        """
+        Get many products matching any combination of category, variety and packaging,
+        ordered by ID. Every combination is served by an index-only scan of one of the
+        products indexes. Pass the ID of the last product of the previous page as `after`
+        for keyset pagination.
+
+        input params:
+            category -- The category of the product, if filtered on
+            variety -- The variety of the product, if filtered on
+            packaging -- The packaging of the product, if filtered on
+            skip -- The number of records to skip
+            limit -- The number of records to return
+            after -- Only return products with an ID greater than this one
+            db -- The database session
+
+        return: A list of products
+        """
+        filters = self.filters(category, variety, packaging)
+        if after is not None:
+            filters.append(self.model.id > literal(after, BigInteger))
+        return list(
+            db.scalars(
+                select(self.model)
+                .where(*filters)
+                .order_by(self.model.id)
+                .offset(skip)
+                .limit(limit)
+            )
+        )
+
     def get_many_by_category(
         self, db: Session, category: str, skip: int = 0, limit: int = 100
     ) -> list[Product]:
@@ -27,13 +114,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
 
         return: A list of products
         """
-        return (
-            db.query(self.model)
-            .filter(self.model.Category == category)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return self.get_many_filtered(db, category=category, skip=skip, limit=limit)
 
     def get_many_by_variety(
         self, db: Session, variety: str, skip: int = 0, limit: int = 100
@@ -49,13 +130,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
 
         return: A list of products
         """
-        return (
-            db.query(self.model)
-            .filter(self.model.Variety == variety)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return self.get_many_filtered(db, variety=variety, skip=skip, limit=limit)
 
     def get_many_by_packaging(
         self, db: Session, packaging: str, skip: int = 0, limit: int = 100
@@ -71,13 +146,7 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
 
         return: A list of products
         """
-        return (
-            db.query(self.model)
-            .filter(self.model.Packaging == packaging)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return self.get_many_filtered(db, packaging=packaging, skip=skip, limit=limit)
 
     def get_many_by_category_and_variety_and_packaging(
         self,
@@ -101,16 +170,166 @@ class CRUDProduct(CRUDBase[Product, ProductCreate, ProductUpdate]):
 
         return: A list of products
         """
-        return (
-            db.query(self.model)
-            .filter(
-                self.model.Category == category,
-                self.model.Variety == variety,
-                self.model.Packaging == packaging,
+        return self.get_many_filtered(
+            db,
+            category=category,
+            variety=variety,
+            packaging=packaging,
+            skip=skip,
+            limit=limit,
+        )
+
+    def create_many_if_missing(
+        self, db: Session, objs_in: Iterable[ProductCreate]
+    ) -> list[int]:
+        """
+        Register products in one set-based pass: a multi-row
+        INSERT ... ON CONFLICT DO NOTHING RETURNING over the de-duplicated products.
+        Products that already exist are left alone. Nothing is committed, so this runs in
+        the caller's transaction.
+
+        input params:
+            db -- The database session
+            objs_in -- The products to register, duplicates allowed
+
+        return: IDs of the newly created products, in the order they first appear in objs_in
+        """
+        _, product_ids = self.get_or_create_many(db, objs_in)
+        return product_ids
+
+    def get_or_create_many(
+        self, db: Session, objs_in: Iterable[ProductCreate]
+    ) -> Tuple[Dict[ProductKey, int], list[int]]:
+        """
+        Register products like `create_many_if_missing` and look up the IDs of those that
+        already existed with one further query.
+
+        input params:
+            db -- The database session
+            objs_in -- The products to register, duplicates allowed
+
+        return: The ID of every product keyed by (Category, Variety, Packaging) and the
+                IDs of the newly created products, in the order they first appear in objs_in
+        """
+        keys = list(
+            dict.fromkeys(
+                (obj_in.Category, obj_in.Variety, obj_in.Packaging)
+                for obj_in in objs_in
             )
-            .offset(skip)
-            .limit(limit)
-            .all()
+        )
+        if not keys:
+            return {}, []
+
+        key_columns = (self.model.Category, self.model.Variety, self.model.Packaging)
+        statement = (
+            insert(self.model)  # type: ignore
+            .on_conflict_do_nothing(index_elements=["Category", "Variety", "Packaging"])
+            .returning(self.model.id, *key_columns)
+        )
+        # Inserting in a consistent order stops concurrent upserts from deadlocking
+        rows = [
+            {"Category": category, "Variety": variety, "Packaging": packaging}
+            for category, variety, packaging in sorted(keys)
+        ]
+        created = {
+            (category, variety, packaging): id
+            for id, category, variety, packaging in db.execute(statement, rows)
+        }
+        product_ids = [created[key] for key in keys if key in created]
+
+        existing = [key for key in keys if key not in created]
+        ids_by_key = dict(created)
+        if existing:
+            ids_by_key.update(
+                ((category, variety, packaging), id)
+                for id, category, variety, packaging in db.execute(
+                    select(self.model.id, *key_columns).where(
+                        tuple_(*key_columns).in_(existing)
+                    )
+                )
+            )
+        return ids_by_key, product_ids
+
+    async def acreate_many_if_missing(
+        self, db: AsyncSession, objs_in: Iterable[ProductCreate]
+    ) -> list[int]:
+        """
+        Awaitable version of `create_many_if_missing`.
+        """
+        return await db.run_sync(self.create_many_if_missing, objs_in)  # type: ignore
+
+    async def aget_many_filtered(
+        self,
+        db: AsyncSession,
+        category: Optional[str] = None,
+        variety: Optional[str] = None,
+        packaging: Optional[str] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[int] = None,
+    ) -> list[Product]:
+        """
+        Awaitable version of `get_many_filtered`.
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_many_filtered,
+            category,
+            variety,
+            packaging,
+            skip=skip,
+            limit=limit,
+            after=after,
+        )
+
+    async def aget_many_by_category(
+        self, db: AsyncSession, category: str, skip: int = 0, limit: int = 100
+    ) -> list[Product]:
+        """
+        Awaitable version of `get_many_by_category`.
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_many_by_category, category, skip=skip, limit=limit
+        )
+
+    async def aget_many_by_variety(
+        self, db: AsyncSession, variety: str, skip: int = 0, limit: int = 100
+    ) -> list[Product]:
+        """
+        Awaitable version of `get_many_by_variety`.
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_many_by_variety, variety, skip=skip, limit=limit
+        )
+
+    async def aget_many_by_packaging(
+        self, db: AsyncSession, packaging: str, skip: int = 0, limit: int = 100
+    ) -> list[Product]:
+        """
+        Awaitable version of `get_many_by_packaging`.
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_many_by_packaging, packaging, skip=skip, limit=limit
+        )
+
+    async def aget_many_by_category_and_variety_and_packaging(
+        self,
+        db: AsyncSession,
+        category: str,
+        variety: str,
+        packaging: str,
+        skip: int = 0,
+        limit: int = 100,
+    ) -> list[Product]:
+        """
+        Awaitable version of `get_many_by_category_and_variety_and_packaging`.
+        """
+        return await db.run_sync(  # type: ignore
+            self.get_many_by_category_and_variety_and_packaging,
+            category,
+            variety,
+            packaging,
+            skip=skip,
+            limit=limit,
         )
 
 
@@ -0,0 +1,610 @@
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import sys
+from abc import ABC, abstractmethod
+from enum import Enum
+from time import perf_counter
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    and_,
+    cast,
+    delete,
+    exists,
+    func,
+    insert,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateTable, DropTable
+
+from src.database.cache import get_cache
+from src.database.models.order import Order
+from src.database.models.order_line import OrderLine, parse_amount
+from src.database.models.organisation import Organisation
+from src.database.models.organisation_product import catalog_updates
+from src.database.models.product import Product
+from src.database.schemas.importer import ImportRejectedRow, ImportResult
+from src.database.schemas.order import OrderCreate
+from src.database.schemas.organisation import OrganisationCreate
+from src.database.schemas.product import ProductCreate
+
+# Rows validated, copied into the staging tables and merged at a time
+IMPORT_BATCH_SIZE = 10_000
+# Rejected rows listed in an ImportResult, the rest are only counted
+MAX_REPORTED_REJECTS = 100
+# Bytes read at a time from the files imported from the command line
+FILE_CHUNK_SIZE = 1 << 16
+
+
+class ImportFormat(str, Enum):
+    CSV: str = "csv"
+    NDJSON: str = "ndjson"
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """
+    Flatten a pydantic validation error into a single line.
+
+    Keyword arguments:
+        error -- The validation error
+    Return: "field: message" pairs separated by semicolons
+    """
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in detail['loc'])}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Decode a stream of UTF-8 bytes into lines as the chunks arrive.
+    Lines end at "\n" only, unlike `str.splitlines`, since characters such as U+2028
+    can appear inside JSON strings and quoted CSV fields.
+
+    Keyword arguments:
+        chunks -- Byte chunks, e.g. a request body stream
+    Return: Async iterator of lines, each ending with "\n" ("\r\n" is replaced) but
+            the last one
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        # The last part is an incomplete line, e.g. "\r" waiting for its "\n"
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.removesuffix("\r") + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.removesuffix("\r")
+
+
+async def _iter_ndjson(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Any]]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, ValueError("Invalid JSON")
+
+
+async def _iter_csv(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Any]]:
+    header: Optional[List[str]] = None
+    record: List[str] = []
+    quotes = 0
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        record.append(line)
+        quotes += line.count('"')
+        if quotes % 2:
+            # Inside a quoted field spanning several lines
+            continue
+        values: List[str] = next(csv.reader(record), [])
+        start = line_number - len(record) + 1
+        record, quotes = [], 0
+        if not values:
+            continue
+        if header is None:
+            header = values
+        elif len(values) != len(header):
+            yield start, ValueError(
+                f"Expected {len(header)} columns, got {len(values)}"
+            )
+        else:
+            # Empty cells are missing values
+            yield start, {
+                name: value for name, value in zip(header, values) if value != ""
+            }
+
+
+def iter_records(
+    lines: AsyncIterable[str], format: ImportFormat
+) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Parse CSV (with a header row) or NDJSON records incrementally.
+
+    Keyword arguments:
+        lines -- Lines of the file
+        format -- Format of the file
+    Return: Async iterator of (line number, decoded record or ValueError) tuples
+    """
+    if format == ImportFormat.CSV:
+        return _iter_csv(lines)
+    return _iter_ndjson(lines)
+
+
+_staging = MetaData()
+
+
+def _staging_table(name: str, *columns: Column[Any]) -> Table:
+    # Dropped when the import's transaction ends
+    return Table(
+        name,
+        _staging,
+        Column("line", Integer, nullable=False),
+        *columns,
+        prefixes=["TEMPORARY"],
+        postgresql_on_commit="DROP",
+    )
+
+
+class _ImportTable(ABC):
+    """
+    How the records of a table are validated, staged and merged.
+
+    Keyword arguments:
+        schema -- Create schema every record is validated against
+        staging -- Staging tables, filled from the validated records by `stage`
+    """
+
+    schema: Type[BaseModel]
+    staging: Sequence[Table]
+    # Namespaces of the caches the imported records make stale
+    stale_caches: Sequence[str] = ()
+
+    @abstractmethod
+    def stage(self, line: int, obj_in: Any) -> Sequence[List[Tuple[Any, ...]]]:
+        """
+        Rows of each staging table for a validated record.
+        """
+
+    @abstractmethod
+    async def merge(
+        self, connection: AsyncConnection, rejected: List[Tuple[int, str]]
+    ) -> int:
+        """
+        Merge the staged rows into the table, appending the rows that can't be merged
+        to `rejected`. Return the number of records inserted.
+        """
+
+    def prepare(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Adapt a decoded record before it's validated.
+        """
+        return record
+
+
+class _ProductImport(_ImportTable):
+    schema = ProductCreate
+    staging = (
+        _staging_table(
+            "import_products",
+            Column("Category", String, nullable=False),
+            Column("Variety", String, nullable=False),
+            Column("Packaging", String, nullable=False),
+        ),
+    )
+
+    def stage(
+        self, line: int, obj_in: ProductCreate
+    ) -> Sequence[List[Tuple[Any, ...]]]:
+        return ([(line, obj_in.Category, obj_in.Variety, obj_in.Packaging)],)
+
+    async def merge(
+        self, connection: AsyncConnection, rejected: List[Tuple[int, str]]
+    ) -> int:
+        return await merge_products(connection, self.staging[0])
+
+
+async def merge_products(connection: AsyncConnection, staging: Table) -> int:
+    """
+    Insert the distinct products of a staging table that don't exist yet.
+
+    Keyword arguments:
+        connection -- Database connection
+        staging -- Table with Category, Variety and Packaging columns
+    Return: Number of products inserted
+    """
+    keys = ["Category", "Variety", "Packaging"]
+    result = await connection.execute(
+        pg_insert(Product)  # type: ignore
+        .from_select(keys, select(*(staging.c[key] for key in keys)).distinct())
+        .on_conflict_do_nothing()
+    )
+    return result.rowcount
+
+
+class _OrganisationImport(_ImportTable):
+    schema = OrganisationCreate
+    staging = (
+        _staging_table(
+            "import_organisations",
+            Column("Name", String, nullable=False),
+            Column("Type", String),
+        ),
+    )
+
+    def stage(
+        self, line: int, obj_in: OrganisationCreate
+    ) -> Sequence[List[Tuple[Any, ...]]]:
+        type = obj_in.Type.value if obj_in.Type else None
+        return ([(line, obj_in.Name, type)],)
+
+    async def merge(
+        self, connection: AsyncConnection, rejected: List[Tuple[int, str]]
+    ) -> int:
+        staging = self.staging[0]
+        result = await connection.execute(
+            pg_insert(Organisation)  # type: ignore
+            .from_select(
+                ["Name", "Type"],
+                select(
+                    staging.c.Name,
+                    cast(staging.c.Type, Organisation.__table__.c.Type.type),
+                )
+                .distinct()
+                .order_by(staging.c.Name),
+            )
+            .on_conflict_do_nothing()
+        )
+        return result.rowcount
+
+
+class _OrderImport(_ImportTable):
+    schema = OrderCreate
+    # The imported orders are part of their organisations
+    stale_caches = (Organisation.__tablename__,)
+    staging = (
+        _staging_table(
+            "import_orders",
+            Column("id", BigInteger),
+            Column("Type", String, nullable=False),
+            Column("References", BigInteger),
+            Column("Organisation_id", BigInteger, nullable=False),
+        ),
+        _staging_table(
+            "import_order_lines",
+            Column("Line_number", Integer, nullable=False),
+            Column("Category", String, nullable=False),
+            Column("Variety", String, nullable=False),
+            Column("Packaging", String, nullable=False),
+            Column("Volume", String, nullable=False),
+            Column("Price_per_unit", String, nullable=False),
+            Column("Volume_amount", Numeric),
+            Column("Price_per_unit_amount", Numeric),
+        ),
+    )
+
+    def prepare(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        # CSV files hold the products of an order as a JSON array
+        if isinstance(record.get("Products"), str):
+            try:
+                record["Products"] = json.loads(record["Products"])
+            except ValueError:
+                raise ValueError("Products: invalid JSON")
+        return record
+
+    def stage(self, line: int, obj_in: OrderCreate) -> Sequence[List[Tuple[Any, ...]]]:
+        order = (
+            line,
+            None,
+            obj_in.Type.value,
+            obj_in.References,
+            obj_in.Organisation_id,
+        )
+        lines: List[Tuple[Any, ...]] = [
+            (
+                line,
+                line_number,
+                product.Category,
+                product.Variety,
+                product.Packaging,
+                product.Volume,
+                product.Price_per_unit,
+                parse_amount(product.Volume),
+                parse_amount(product.Price_per_unit),
+            )
+            for line_number, product in enumerate(obj_in.Products or [])
+        ]
+        return ([order], lines)
+
+    async def merge(
+        self, connection: AsyncConnection, rejected: List[Tuple[int, str]]
+    ) -> int:
+        orders, lines = self.staging
+
+        # Reject the orders whose organisation or referenced order doesn't exist
+        missing_organisations = await connection.execute(
+            delete(orders)
+            .where(~exists().where(Organisation.id == orders.c.Organisation_id))
+            .returning(orders.c.line, orders.c.Organisation_id)
+        )
+        rejected.extend(
+            (line, f"Organisation {organisation_id} not found")
+            for line, organisation_id in missing_organisations
+        )
+        missing_references = await connection.execute(
+            delete(orders)
+            .where(
+                orders.c.References.is_not(None),
+                ~exists().where(Order.id == orders.c.References),
+            )
+            .returning(orders.c.line, orders.c.References)
+        )
+        rejected.extend(
+            (line, f"Referenced order {reference} not found")
+            for line, reference in missing_references
+        )
+        await connection.execute(
+            delete(lines).where(~exists().where(orders.c.line == lines.c.line))
+        )
+
+        await merge_products(connection, lines)
+
+        # Allocate the IDs up front so the order lines can be linked to their order
+        await connection.execute(
+            update(orders).values(
+                id=func.nextval(func.pg_get_serial_sequence(Order.__tablename__, "id"))
+            )
+        )
+        result = await connection.execute(
+            insert(Order).from_select(
+                ["id", "Type", "References", "Organisation_id"],
+                select(
+                    orders.c.id,
+                    cast(orders.c.Type, Order.__table__.c.Type.type),
+                    orders.c.References,
+                    orders.c.Organisation_id,
+                ).order_by(orders.c.line),
+            )
+        )
+        await connection.execute(
+            insert(OrderLine).from_select(
+                [
+                    "Order_id",
+                    "Line_number",
+                    "Product_id",
+                    "Volume",
+                    "Price_per_unit",
+                    "Volume_amount",
+                    "Price_per_unit_amount",
+                ],
+                select(
+                    orders.c.id,
+                    lines.c.Line_number,
+                    Product.id,
+                    lines.c.Volume,
+                    lines.c.Price_per_unit,
+                    lines.c.Volume_amount,
+                    lines.c.Price_per_unit_amount,
+                )
+                .join(orders, orders.c.line == lines.c.line)
+                .join(
+                    Product,
+                    and_(
+                        Product.Category == lines.c.Category,
+                        Product.Variety == lines.c.Variety,
+                        Product.Packaging == lines.c.Packaging,
+                    ),
+                ),
+            )
+        )
+        for statement in catalog_updates(Order.id.in_(select(orders.c.id)), 1):
+            await connection.execute(statement)
+        return result.rowcount
+
+
+IMPORT_TABLES: Dict[str, _ImportTable] = {
+    Product.__tablename__: _ProductImport(),
+    Organisation.__tablename__: _OrganisationImport(),
+    Order.__tablename__: _OrderImport(),
+}
+
+
+def clear_caches(table_name: str) -> None:
+    """
+    Clear the caches an import into a table makes stale. `import_records` clears them
+    before merging, the caller must clear them again once the import is committed, as
+    a concurrent request may cache the records as last committed in between.
+
+    Keyword arguments:
+        table_name -- "products", "organisations" or "orders"
+    """
+    for namespace in IMPORT_TABLES[table_name].stale_caches:
+        get_cache(namespace).clear()
+
+
+async def _copy_batch(
+    connection: AsyncConnection,
+    table: _ImportTable,
+    batch: Sequence[List[Tuple[Any, ...]]],
+    rejected: List[Tuple[int, str]],
+) -> int:
+    # COPY FROM STDIN straight from the asyncpg driver, in the connection's transaction
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    for staging, rows in zip(table.staging, batch):
+        if rows:
+            await driver_connection.copy_records_to_table(  # type: ignore
+                staging.name,
+                records=rows,
+                columns=[column.name for column in staging.c],
+            )
+    imported = await table.merge(connection, rejected)
+    for staging in table.staging:
+        await connection.execute(text(f"TRUNCATE {staging.name}"))
+    return imported
+
+
+async def import_records(
+    connection: AsyncConnection,
+    table_name: str,
+    lines: AsyncIterable[str],
+    format: ImportFormat,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportResult:
+    """
+    Import a CSV or NDJSON file into products, organisations or orders.
+    Records are validated against the table's Create schema, copied into temporary staging
+    tables with COPY FROM STDIN and merged with set-based INSERT ... SELECT statements, one
+    batch at a time. Products and organisations that already exist are skipped, orders
+    whose organisation or referenced order doesn't exist are rejected. Nothing is committed,
+    call `clear_caches` once the import is.
+
+    Keyword arguments:
+        connection -- Database connection, using the asyncpg driver
+        table_name -- "products", "organisations" or "orders"
+        lines -- Lines of the file
+        format -- Format of the file
+        batch_size -- Records merged at a time
+    Return: ImportResult pydantic class
+    """
+    table = IMPORT_TABLES[table_name]
+    clear_caches(table_name)
+    for staging in table.staging:
+        await connection.execute(DropTable(staging, if_exists=True))
+        await connection.execute(CreateTable(staging))
+
+    start = perf_counter()
+    rows = imported = valid = 0
+    rejected: List[Tuple[int, str]] = []
+    batch: Sequence[List[Tuple[Any, ...]]] = [[] for _ in table.staging]
+    batch_rows = 0
+    async for line, record in iter_records(lines, format):
+        rows += 1
+        try:
+            if isinstance(record, ValueError):
+                raise record
+            if isinstance(record, dict):
+                record = table.prepare(record)
+            obj_in = table.schema.parse_obj(record)
+        except ValidationError as error:
+            rejected.append((line, format_validation_error(error)))
+            continue
+        except ValueError as error:
+            rejected.append((line, str(error)))
+            continue
+        valid += 1
+        for staged, rows_in in zip(batch, table.stage(line, obj_in)):
+            staged.extend(rows_in)
+        batch_rows += 1
+        if batch_rows >= batch_size:
+            imported += await _copy_batch(connection, table, batch, rejected)
+            batch = [[] for _ in table.staging]
+            batch_rows = 0
+    if batch_rows:
+        imported += await _copy_batch(connection, table, batch, rejected)
+
+    seconds = perf_counter() - start
+    merge_rejected = len(rejected) - (rows - valid)
+    return ImportResult(
+        table=table_name,
+        format=format,
+        rows=rows,
+        imported=imported,
+        existing=valid - merge_rejected - imported,
+        rejected=len(rejected),
+        rejected_rows=[
+            ImportRejectedRow(line=line, error=error)
+            for line, error in sorted(rejected)[:MAX_REPORTED_REJECTS]
+        ],
+        seconds=seconds,
+        rows_per_second=rows / seconds if seconds else 0.0,
+    )
+
+
+async def _read_chunks(path: str) -> AsyncIterator[bytes]:
+    with open(path, "rb") as file:
+        while chunk := file.read(FILE_CHUNK_SIZE):
+            yield chunk
+
+
+async def _read_lines(paths: Iterable[str]) -> AsyncIterator[str]:
+    for path in paths:
+        # Split the same way as the request bodies
+        async for line in iter_lines(_read_chunks(path)):
+            yield line
+
+
+async def _import_files(
+    table_name: str, paths: List[str], format: ImportFormat, batch_size: int
+) -> ImportResult:
+    from src.database.session import async_engine
+
+    try:
+        async with async_engine.begin() as connection:
+            return await import_records(
+                connection, table_name, _read_lines(paths), format, batch_size
+            )
+    finally:
+        await async_engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Command line interface, e.g. `python -m src.database.importer orders orders.csv`.
+    Writes the ImportResult as JSON to stdout and exits with status 1 if any row was rejected.
+    """
+    parser = argparse.ArgumentParser(
+        description="Bulk import CSV or NDJSON files into the database using COPY"
+    )
+    parser.add_argument("table", choices=sorted(IMPORT_TABLES))
+    parser.add_argument("paths", nargs="+", metavar="path")
+    parser.add_argument(
+        "--format",
+        choices=[format.value for format in ImportFormat],
+        help="File format, by default guessed from the first file's extension",
+    )
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    format = ImportFormat(
+        args.format or ("csv" if args.paths[0].lower().endswith(".csv") else "ndjson")
+    )
+    result = asyncio.run(_import_files(args.table, args.paths, format, args.batch_size))
+    sys.stdout.write(result.json(indent=2) + "\n")
+    sys.exit(1 if result.rejected else 0)
+
+
+if __name__ == "__main__":
+    main()
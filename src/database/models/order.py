@@ -1,12 +1,19 @@
+from typing import Any
+
 import sqlalchemy as sqla
+from sqlalchemy.dialects.postgresql import JSON, aggregate_order_by
+from sqlalchemy.orm import column_property, relationship
 
 from src.database.models.base import Base, OrderTypeEnum
-from src.database.models.organisation import Organisation  # noqa: F401
+from src.database.models.order_line import OrderLine
+from src.database.models.organisation import Organisation
+from src.database.models.product import Product
 
 # TODO: Use Mapped and mapped_column to declare models instead of declarative_base
 # see https://docs.sqlalchemy.org/en/20/orm/quickstart.html#declare-models
 
 
+# Column type of the former orders.Products column, still used by the migrations
 class ProductType(sqla.types.TypeDecorator):  # type: ignore
     impl = sqla.types.String
 
@@ -39,6 +46,60 @@ class Order(Base):
 
     id = sqla.Column(sqla.Integer, primary_key=True, nullable=False)
     Type = sqla.Column(sqla.Enum(OrderTypeEnum), index=True, nullable=False)  # type: ignore
-    References = sqla.Column(sqla.Integer, sqla.ForeignKey("orders.id"))
-    Products = sqla.Column(sqla.ARRAY(ProductType), nullable=True)  # type: ignore
-    Organisation_id = sqla.Column(sqla.Integer, sqla.ForeignKey("organisations.id"))
+    # Indexed to find the orders amending an order, see CRUDOrder.get_chains
+    References = sqla.Column(sqla.Integer, sqla.ForeignKey("orders.id"), index=True)
+    # Indexed to load and total the orders of an organisation
+    Organisation_id = sqla.Column(
+        sqla.Integer, sqla.ForeignKey("organisations.id"), index=True
+    )
+    # Eagerly loaded so the products are available once an async session hands the
+    # object back; lazy loading is not possible outside of the session's greenlet.
+    Lines = relationship(
+        "OrderLine",
+        lazy="selectin",
+        order_by="OrderLine.Line_number",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+    @property
+    def Products(self) -> list[dict[str, Any]]:
+        return [line.to_product_order_type() for line in self.Lines]
+
+
+# The products of all the orders of an organisation, as ProductOrderType dictionaries,
+# aggregated in SQL. Deferred, so that it only runs where the products are read rather
+# than on every load of an organisation, see CRUDOrganisation.
+Organisation.Products = column_property(
+    sqla.select(
+        sqla.func.coalesce(
+            sqla.func.json_agg(
+                aggregate_order_by(  # type: ignore
+                    sqla.func.json_build_object(
+                        "Category",
+                        Product.Category,
+                        "Variety",
+                        Product.Variety,
+                        "Packaging",
+                        Product.Packaging,
+                        "Volume",
+                        OrderLine.Volume,
+                        "Price_per_unit",
+                        OrderLine.Price_per_unit,
+                    ),
+                    Order.id,
+                    OrderLine.Line_number,
+                )
+            ),
+            sqla.text("'[]'::json"),
+            type_=JSON,
+        )
+    )
+    .select_from(OrderLine)
+    .join(Order, Order.id == OrderLine.Order_id)
+    .join(Product, Product.id == OrderLine.Product_id)
+    .where(Order.Organisation_id == Organisation.id)
+    .correlate(Organisation)
+    .scalar_subquery(),
+    deferred=True,
+)
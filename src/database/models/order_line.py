@@ -0,0 +1,87 @@
+import re
+from decimal import Decimal
+from typing import Any, Optional
+
+import sqlalchemy as sqla
+from sqlalchemy.orm import relationship
+
+import src.database.models.product  # noqa: F401
+from src.database.models.base import Base
+
+# TODO: Use Mapped and mapped_column to declare models instead of declarative_base
+# see https://docs.sqlalchemy.org/en/20/orm/quickstart.html#declare-models
+
+# Leading number of a quantity such as "1 ton" or "1000.50 $/kg"
+LEADING_NUMBER = re.compile(r"^\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+))")
+
+
+def unit_expression(quantity: str) -> str:
+    """
+    SQL expression of the unit of a quantity column: its text after the leading number,
+    e.g. "$/kg" for "1000.50 $/kg", or NULL if its amount wasn't parsed.
+
+    Keyword arguments:
+        quantity -- Name of the quantity column, with its amount in <name>_amount
+    Return: The expression, for a generated column
+    """
+    return (
+        f'CASE WHEN "{quantity}_amount" IS NOT NULL THEN btrim(regexp_replace('
+        f"\"{quantity}\", '{LEADING_NUMBER.pattern}', '')) END"
+    )
+
+
+def parse_amount(quantity: Optional[str]) -> Optional[Decimal]:
+    """
+    Extract the leading number of a free text quantity so it can be queried in SQL.
+
+    Keyword arguments:
+        quantity -- Free text quantity e.g. "1 ton"
+    Return: The leading number as a Decimal or None if the text does not start with one
+    """
+    if quantity is None:
+        return None
+    match = LEADING_NUMBER.match(quantity)
+    return Decimal(match.group(1)) if match else None
+
+
+# Classes used for database table
+
+
+class OrderLine(Base):
+    __tablename__ = "order_lines"
+    __table_args__ = (sqla.UniqueConstraint("Order_id", "Line_number"),)
+    id = sqla.Column(sqla.Integer, primary_key=True, nullable=False)
+    Order_id = sqla.Column(
+        sqla.Integer,
+        sqla.ForeignKey("orders.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    Line_number = sqla.Column(sqla.Integer, nullable=False)
+    Product_id = sqla.Column(
+        sqla.Integer, sqla.ForeignKey("products.id"), index=True, nullable=False
+    )
+    # The quantities as given by the API user, with their leading numbers parsed out
+    Volume = sqla.Column(sqla.String, nullable=False)
+    Price_per_unit = sqla.Column(sqla.String, nullable=False)
+    Volume_amount = sqla.Column(sqla.Numeric, index=True, nullable=True)
+    Price_per_unit_amount = sqla.Column(sqla.Numeric, index=True, nullable=True)
+    # Generated by Postgres so that the lines can be totalled per unit
+    Volume_unit = sqla.Column(
+        sqla.String, sqla.Computed(unit_expression("Volume")), nullable=True
+    )
+    Price_per_unit_unit = sqla.Column(
+        sqla.String, sqla.Computed(unit_expression("Price_per_unit")), nullable=True
+    )
+    Product = relationship("Product", lazy="joined", innerjoin=True)
+
+    def to_product_order_type(self) -> dict[str, Any]:
+        """
+        The order line in the shape of the API's ProductOrderType.
+        """
+        return {
+            "Category": self.Product.Category,
+            "Variety": self.Product.Variety,
+            "Packaging": self.Product.Packaging,
+            "Volume": self.Volume,
+            "Price_per_unit": self.Price_per_unit,
+        }
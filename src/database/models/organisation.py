@@ -1,7 +1,4 @@
-from typing import Any
-
 import sqlalchemy as sqla
-from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
 from src.database.models.base import Base, OrganisationTypeEnum
@@ -19,8 +16,20 @@ class Organisation(Base):
     id = sqla.Column(sqla.Integer, primary_key=True, nullable=False)
     Name = sqla.Column(sqla.String, index=True, nullable=False)
     Type = sqla.Column(sqla.Enum(OrganisationTypeEnum), index=True, nullable=True)  # type: ignore
-    Orders = relationship("Order")
-
-    @hybrid_property
-    def Products(self) -> list[dict[str, Any]]:
-        return [product for order in self.Orders for product in order.Products]
+    # Eagerly loaded so the relationship is populated before an async session hands the
+    # object back; lazy loading is not possible outside of the session's greenlet.
+    Orders = relationship("Order", lazy="selectin", order_by="Order.id")
+    # Products is a deferred column_property aggregating the products of all the Orders
+    # in SQL, it is declared in src.database.models.order once the orders table exists.
+
+
+# Indexes of the type-ahead search, see CRUDBase.search
+sqla.Index(
+    "ix_organisations_Name_trgm",
+    Organisation.Name,
+    postgresql_using="gin",
+    postgresql_ops={"Name": "gin_trgm_ops"},
+)
+sqla.Index(
+    "ix_organisations_Name_prefix", sqla.func.lower(Organisation.Name).collate("C")
+)
@@ -0,0 +1,220 @@
+from typing import Any, List
+
+import sqlalchemy as sqla
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert
+from sqlalchemy.sql import ColumnElement, Executable
+
+from src.database.models.base import Base
+from src.database.models.order import Order
+from src.database.models.order_line import OrderLine
+
+# TODO: Use Mapped and mapped_column to declare models instead of declarative_base
+# see https://docs.sqlalchemy.org/en/20/orm/quickstart.html#declare-models
+
+
+# Classes used for database table
+
+
+class OrganisationProduct(Base):
+    """
+    The catalog of an organisation: every product it has ordered, with running totals
+    of its orders. Kept up to date as orders are written, see catalog_updates.
+    """
+
+    __tablename__ = "organisation_products"
+    Organisation_id = sqla.Column(
+        sqla.Integer,
+        sqla.ForeignKey("organisations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    Product_id = sqla.Column(
+        sqla.Integer, sqla.ForeignKey("products.id"), primary_key=True, index=True
+    )
+    # Number of orders and of order lines of the product
+    Orders = sqla.Column(sqla.Integer, nullable=False)
+    Lines = sqla.Column(sqla.Integer, nullable=False)
+
+
+class OrganisationProductVolume(Base):
+    """
+    The volumes of a product of an organisation's catalog, one row per unit of the
+    lines' Volume so that only amounts of the same unit are summed. Kept up to date
+    along with the catalog, see catalog_updates.
+    """
+
+    __tablename__ = "organisation_product_volumes"
+    __table_args__ = (
+        sqla.ForeignKeyConstraint(
+            ["Organisation_id", "Product_id"],
+            [OrganisationProduct.Organisation_id, OrganisationProduct.Product_id],
+            ondelete="CASCADE",
+        ),
+    )
+    Organisation_id = sqla.Column(sqla.Integer, primary_key=True)
+    Product_id = sqla.Column(sqla.Integer, primary_key=True)
+    # OrderLine.Volume_unit, the lines whose Volume doesn't start with a number have no
+    # volume and are left out
+    Volume_unit = sqla.Column(sqla.String, primary_key=True)
+    # Number of order lines of the product in this unit and the sum of their amounts
+    Lines = sqla.Column(sqla.Integer, nullable=False)
+    Volume_amount = sqla.Column(sqla.Numeric, nullable=False)
+
+
+def catalog_totals(orders: ColumnElement[bool], sign: int = 1) -> sqla.Select[Any]:
+    """
+    Catalog totals of the products of some orders, computed from their order lines.
+
+    Keyword arguments:
+        orders -- Condition on Order selecting the orders to total
+        sign -- -1 to negate the totals
+    Return: Select of Organisation_id, Product_id, Orders and Lines rows
+    """
+    return (
+        sqla.select(
+            Order.Organisation_id,
+            OrderLine.Product_id,
+            (sign * sqla.func.count(Order.id.distinct())).label("Orders"),
+            (sign * sqla.func.count(OrderLine.id)).label("Lines"),
+        )
+        .join(OrderLine, OrderLine.Order_id == Order.id)
+        .where(orders, Order.Organisation_id.is_not(None))
+        .group_by(Order.Organisation_id, OrderLine.Product_id)
+    )
+
+
+def catalog_volume_totals(
+    orders: ColumnElement[bool], sign: int = 1
+) -> sqla.Select[Any]:
+    """
+    Catalog volumes of the products of some orders per unit, computed from their order
+    lines.
+
+    Keyword arguments:
+        orders -- Condition on Order selecting the orders to total
+        sign -- -1 to negate the totals
+    Return: Select of Organisation_id, Product_id, Volume_unit, Lines and Volume_amount
+            rows
+    """
+    return (
+        sqla.select(
+            Order.Organisation_id,
+            OrderLine.Product_id,
+            OrderLine.Volume_unit,
+            (sign * sqla.func.count(OrderLine.id)).label("Lines"),
+            (sign * sqla.func.sum(OrderLine.Volume_amount)).label("Volume_amount"),
+        )
+        .join(OrderLine, OrderLine.Order_id == Order.id)
+        .where(
+            orders,
+            Order.Organisation_id.is_not(None),
+            OrderLine.Volume_amount.is_not(None),
+        )
+        .group_by(Order.Organisation_id, OrderLine.Product_id, OrderLine.Volume_unit)
+    )
+
+
+def unit_volumes() -> sqla.ScalarSelect[Any]:
+    """
+    Volumes of a product of a catalog, correlated to the OrganisationProduct row the
+    enclosing query selects.
+
+    Return: Scalar subquery of a JSON list of Unit and Volume objects, ordered by unit
+    """
+    volume = sqla.func.json_build_object(
+        "Unit",
+        OrganisationProductVolume.Volume_unit,
+        "Volume",
+        OrganisationProductVolume.Volume_amount,
+    )
+    volumes = sqla.func.json_agg(
+        aggregate_order_by(volume, OrganisationProductVolume.Volume_unit)  # type: ignore
+    )
+    product = sqla.tuple_(
+        OrganisationProduct.Organisation_id, OrganisationProduct.Product_id
+    )
+    volume_product = sqla.tuple_(
+        OrganisationProductVolume.Organisation_id, OrganisationProductVolume.Product_id
+    )
+    return (
+        sqla.select(
+            sqla.func.coalesce(volumes, sqla.text("'[]'::json"), type_=sqla.JSON)
+        )
+        .where(volume_product == product)
+        .scalar_subquery()
+    )
+
+
+def _counter_upsert(
+    table: sqla.Table, keys: List[str], totals: sqla.Select[Any]
+) -> Executable:
+    """
+    Statement adding totals to the counters of a catalog table, inserting the rows
+    that don't exist yet.
+
+    Keyword arguments:
+        table -- The catalog table
+        keys -- Primary key of the table, the first columns of totals
+        totals -- Select of the keys and counters
+    Return: The upsert statement
+    """
+    counters = [name for name in totals.selected_columns.keys() if name not in keys]
+    upsert = insert(table).from_select(keys + counters, totals)  # type: ignore
+    statement: Executable = upsert.on_conflict_do_update(
+        index_elements=keys,
+        set_={name: table.c[name] + upsert.excluded[name] for name in counters},
+    )
+    return statement
+
+
+def _emptied_rows(
+    table: sqla.Table, keys: List[str], totals: sqla.Select[Any]
+) -> Executable:
+    """
+    Statement deleting the rows of a catalog table left without order lines.
+
+    Keyword arguments:
+        table -- The catalog table
+        keys -- Primary key of the table, the first columns of totals
+        totals -- Select of the keys and counters of the rows that were updated
+    Return: The delete statement
+    """
+    return sqla.delete(table).where(
+        table.c.Lines <= 0,
+        sqla.tuple_(*(table.c[name] for name in keys)).in_(
+            totals.with_only_columns(*list(totals.selected_columns)[: len(keys)])
+        ),
+    )
+
+
+def catalog_updates(orders: ColumnElement[bool], sign: int) -> List[Executable]:
+    """
+    Statements adding the products of some orders to their organisations' catalogs, or
+    taking them out. Run them with sign=-1 before orders are changed or deleted and
+    with sign=1 once orders are created or changed, in the same transaction. Only the
+    catalog rows of the products of these orders are touched, however many orders the
+    organisations already have.
+
+    Keyword arguments:
+        orders -- Condition on Order selecting the orders
+        sign -- 1 to add the orders to the catalogs, -1 to take them out
+    Return: The statements to execute, in order
+    """
+    products = OrganisationProduct.__table__
+    product_keys = ["Organisation_id", "Product_id"]
+    product_totals = catalog_totals(orders, sign)
+    volumes = OrganisationProductVolume.__table__
+    volume_keys = [*product_keys, "Volume_unit"]
+    volume_totals = catalog_volume_totals(orders, sign)
+    # The volumes reference the rows of their products
+    upserts = [
+        _counter_upsert(products, product_keys, product_totals),
+        _counter_upsert(volumes, volume_keys, volume_totals),
+    ]
+    if sign > 0:
+        return upserts
+    # Products whose last order was taken out leave the catalog, as do their units
+    return [
+        *upserts,
+        _emptied_rows(volumes, volume_keys, volume_totals),
+        _emptied_rows(products, product_keys, product_totals),
+    ]
@@ -11,8 +11,51 @@ from src.database.models.base import Base
 
 class Product(Base):
     __tablename__ = "products"
-    __table_args__ = (sqla.UniqueConstraint("Category", "Variety", "Packaging"),)
+    # Every combination of Category, Variety and Packaging filters is a prefix of one of
+    # these indexes. They cover all of the columns, so filtered lookups are index-only
+    # scans; the first one is also the natural key of a product.
+    __table_args__ = (
+        sqla.Index(
+            "ix_products_Category_Variety_Packaging",
+            "Category",
+            "Variety",
+            "Packaging",
+            unique=True,
+            postgresql_include=["id"],
+        ),
+        sqla.Index(
+            "ix_products_Variety_Packaging",
+            "Variety",
+            "Packaging",
+            postgresql_include=["Category", "id"],
+        ),
+        sqla.Index(
+            "ix_products_Packaging_Category",
+            "Packaging",
+            "Category",
+            postgresql_include=["Variety", "id"],
+        ),
+    )
     id = sqla.Column(sqla.Integer, primary_key=True, nullable=False)
-    Category = sqla.Column(sqla.String, index=True, nullable=False)
+    Category = sqla.Column(sqla.String, nullable=False)
     Variety = sqla.Column(sqla.String, nullable=False)
     Packaging = sqla.Column(sqla.String, nullable=False)
+
+
+# Indexes of the type-ahead search, see CRUDBase.search
+sqla.Index(
+    "ix_products_Category_trgm",
+    Product.Category,
+    postgresql_using="gin",
+    postgresql_ops={"Category": "gin_trgm_ops"},
+)
+sqla.Index(
+    "ix_products_Variety_trgm",
+    Product.Variety,
+    postgresql_using="gin",
+    postgresql_ops={"Variety": "gin_trgm_ops"},
+)
+sqla.Index(
+    "ix_products_Category_prefix", sqla.func.lower(Product.Category).collate("C")
+)
+sqla.Index("ix_products_Variety_prefix", sqla.func.lower(Product.Variety).collate("C"))
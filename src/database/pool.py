@@ -0,0 +1,165 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Any, Dict, Sequence
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+from src.config import Settings
+from src.database.schemas.pool import PoolStatus
+
+# Upper bounds (in seconds) of the checkout wait time histogram buckets
+WAIT_TIME_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class PoolStatistics:
+    """
+    Thread safe counters describing how long callers waited to check out a connection.
+
+    Keyword arguments:
+        buckets -- Upper bounds (in seconds) of the wait time histogram buckets
+    """
+
+    def __init__(self, buckets: Sequence[float] = WAIT_TIME_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Zero every counter.
+        """
+        with self._lock:
+            # One count per bucket plus a final overflow bucket (+Inf)
+            self._bucket_counts = [0] * (len(self.buckets) + 1)
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_seconds_sum = 0.0
+            self.wait_seconds_max = 0.0
+
+    def observe_checkout(self, seconds: float) -> None:
+        """
+        Record a successful checkout that waited `seconds` for a connection.
+        """
+        with self._lock:
+            self._bucket_counts[bisect_left(self.buckets, seconds)] += 1
+            self.checkouts += 1
+            self.wait_seconds_sum += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def observe_timeout(self, seconds: float) -> None:
+        """
+        Record a checkout that gave up after waiting `seconds` for a connection.
+        """
+        with self._lock:
+            self.timeouts += 1
+            self.wait_seconds_sum += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def histogram(self) -> Dict[str, int]:
+        """
+        Cumulative checkout counts keyed by bucket upper bound, ending with "+Inf".
+        """
+        with self._lock:
+            counts = list(self._bucket_counts)
+        histogram = {}
+        total = 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+            total += count
+            histogram[bound] = total
+        return histogram
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool recording checkout wait times and timeouts in `statistics`.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.statistics = PoolStatistics()
+
+    def connect(self) -> PoolProxiedConnection:
+        start = perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.statistics.observe_timeout(perf_counter() - start)
+            raise
+        self.statistics.observe_checkout(perf_counter() - start)
+        return connection
+
+    def recreate(self) -> QueuePool:
+        pool = super().recreate()
+        # Keep the counters when the engine is disposed and the pool replaced
+        pool.statistics = self.statistics  # type: ignore
+        return pool
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool recording checkout wait times and timeouts in `statistics`.
+    """
+
+
+def get_pool_kwargs(settings: Settings) -> Dict[str, Any]:
+    """
+    Engine keyword arguments configuring the connection pool from the settings.
+
+    Keyword arguments:
+        settings -- Application settings
+    Return: Dictionary of keyword arguments for create_engine/create_async_engine
+    """
+    return {
+        "pool_size": settings.database_pool_size,
+        "max_overflow": settings.database_max_overflow,
+        "pool_timeout": settings.database_pool_timeout,
+        "pool_recycle": settings.database_pool_recycle,
+        "pool_pre_ping": settings.database_pool_pre_ping,
+    }
+
+
+def get_pool_status(engine: Engine | AsyncEngine) -> PoolStatus:
+    """
+    Snapshot of an engine's connection pool usage and checkout statistics.
+
+    Keyword arguments:
+        engine -- The (async) engine whose pool to inspect
+    Return: PoolStatus pydantic class
+    """
+    pool = engine.pool
+    status: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+        )
+    if isinstance(pool, InstrumentedQueuePool):
+        statistics = pool.statistics
+        status.update(
+            checkouts=statistics.checkouts,
+            timeouts=statistics.timeouts,
+            wait_seconds_sum=statistics.wait_seconds_sum,
+            wait_seconds_max=statistics.wait_seconds_max,
+            wait_seconds_histogram=statistics.histogram(),
+        )
+    return PoolStatus(**status)
@@ -0,0 +1,120 @@
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+from src.metrics import Histogram
+
+# Statements kept per request to log slow requests, the rest are only counted
+MAX_STATEMENTS = 100
+
+_QUERY_START_KEY = "profiling_query_start"
+
+# Statement types the query durations are broken down by, the others count as OTHER
+STATEMENT_TYPES = frozenset(
+    ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "COPY", "BEGIN", "COMMIT")
+)
+
+query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Time spent executing statements, by statement type",
+    label_names=("statement",),
+)
+
+
+def statement_type(statement: str) -> str:
+    """
+    Keyword a statement starts with, e.g. SELECT, or OTHER if not in STATEMENT_TYPES.
+    """
+    # Only the start of the statement is split, statements can be long
+    words = statement[:12].split(None, 1)
+    keyword = words[0].upper() if words else ""
+    return keyword if keyword in STATEMENT_TYPES else "OTHER"
+
+
+class RequestProfile:
+    """
+    Time spent serving one request, filled in by the cursor events of every engine
+    while the profile is the current one, see `start_request_profile`.
+    """
+
+    __slots__ = (
+        "start",
+        "queries",
+        "db_seconds",
+        "serialize_seconds",
+        "handler_end",
+        "statements",
+    )
+
+    def __init__(self) -> None:
+        self.start = perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        # Encoding done by the endpoint itself, e.g. in `json_response`
+        self.serialize_seconds = 0.0
+        self.handler_end: Optional[float] = None
+        self.statements: List[Tuple[str, float]] = []
+
+    def observe_query(self, statement: str, seconds: float) -> None:
+        """
+        Record a statement that took `seconds` to execute.
+        """
+        self.queries += 1
+        self.db_seconds += seconds
+        if len(self.statements) < MAX_STATEMENTS:
+            self.statements.append((statement, seconds))
+
+
+_request_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "request_profile", default=None
+)
+
+
+def start_request_profile() -> RequestProfile:
+    """
+    Start profiling the current request. The profile is shared with the tasks,
+    threads and greenlets the request's context is copied to.
+
+    Return: The new RequestProfile
+    """
+    profile = RequestProfile()
+    _request_profile.set(profile)
+    return profile
+
+
+def get_request_profile() -> Optional[RequestProfile]:
+    """
+    Return: The profile of the current request, None outside of a profiled request
+    """
+    return _request_profile.get()
+
+
+def _before_cursor_execute(conn: Connection, *args: Any) -> None:
+    conn.info.setdefault(_QUERY_START_KEY, []).append(perf_counter())
+
+
+def _after_cursor_execute(
+    conn: Connection, cursor: Any, statement: str, *args: Any
+) -> None:
+    starts = conn.info.get(_QUERY_START_KEY)
+    if not starts:
+        return
+    seconds = perf_counter() - starts.pop()
+    query_duration.observe(seconds, statement_type(statement))
+    profile = _request_profile.get()
+    if profile is not None:
+        profile.observe_query(statement, seconds)
+
+
+def instrument_engines() -> None:
+    """
+    Listen to the cursor events of every engine, sync or async, to time every statement
+    by type in `query_duration` and the statements of profiled requests. A statement
+    costs two clock reads and a histogram update.
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
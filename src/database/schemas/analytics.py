@@ -0,0 +1,41 @@
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.database.models.base import OrderTypeEnum
+
+
+class OrderGroupBy(str, Enum):
+    organisation = "organisation"
+    category = "category"
+    variety = "variety"
+    type = "type"
+
+
+class OrderTotals(BaseModel):
+    # The group, only the fields grouped by are set
+    Organisation_id: Optional[int] = None
+    Organisation_name: Optional[str] = None
+    Category: Optional[str] = None
+    Variety: Optional[str] = None
+    Type: Optional[OrderTypeEnum] = None
+    # Units of the lines' Volume and Price_per_unit, the text after their leading
+    # numbers; None for the lines whose quantity doesn't start with a number and for the
+    # orders without lines
+    Volume_unit: Optional[str] = None
+    Price_per_unit_unit: Optional[str] = None
+    # Number of orders and of order lines in the group
+    Orders: int
+    Lines: int
+    # Sums of the leading numbers of the lines' Volume and of Volume * Price_per_unit,
+    # in the units above
+    Volume: Decimal
+    Value: Decimal
+    # Lines whose Volume or Price_per_unit doesn't start with a number, left out of
+    # the sums
+    Unparsed_lines: int
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,14 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class CacheStatus(BaseModel):
+    backend: str
+    size: Optional[int]
+    max_size: Optional[int]
+    ttl: Optional[float]
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
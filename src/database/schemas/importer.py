@@ -0,0 +1,20 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ImportRejectedRow(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    table: str
+    format: str
+    rows: int
+    imported: int
+    existing: int
+    rejected: int
+    rejected_rows: List[ImportRejectedRow]
+    seconds: float
+    rows_per_second: float
@@ -40,3 +40,24 @@ class OrderDBBase(OrderBase):
 
     class Config:
         orm_mode = True
+
+
+class OrderChain(BaseModel):
+    # Orders referenced by the order, from the first order of the chain to its reference
+    ancestors: List[OrderDBBase]
+    order: OrderDBBase
+    # Orders referencing the order directly or indirectly, nearest first
+    descendants: List[OrderDBBase]
+
+
+class OrderBulkItemResult(BaseModel):
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class OrderBulkResult(BaseModel):
+    created: int
+    failed: int
+    product_ids: List[int]
+    results: List[OrderBulkItemResult]
@@ -1,9 +1,11 @@
+from decimal import Decimal
 from typing import Optional
 
 from pydantic import BaseModel
 
 from src.database.models.base import OrganisationTypeEnum
 from src.database.schemas.order import OrderDBBase, ProductOrderType
+from src.database.schemas.product import ProductBase
 
 
 class OrganisationBase(BaseModel):
@@ -28,3 +30,22 @@ class OrganisationDBBase(OrganisationBase):
 
     class Config:
         orm_mode = True
+
+
+class CatalogVolume(BaseModel):
+    # Text following the leading number of the lines' Volume, e.g. "ton"
+    Unit: str
+    # Sum of the leading numbers of the lines' Volume in this unit
+    Volume: Decimal
+
+
+class CatalogProduct(ProductBase):
+    id: int
+    # Number of orders and of order lines of the organisation with this product
+    Orders: int
+    Lines: int
+    # One per unit, the lines whose Volume doesn't start with a number are left out
+    Volumes: list[CatalogVolume]
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,17 @@
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class PoolStatus(BaseModel):
+    pool_class: str
+    size: Optional[int]
+    checked_in: Optional[int]
+    checked_out: Optional[int]
+    overflow: Optional[int]
+    max_overflow: Optional[int]
+    checkouts: Optional[int]
+    timeouts: Optional[int]
+    wait_seconds_sum: Optional[float]
+    wait_seconds_max: Optional[float]
+    wait_seconds_histogram: Optional[Dict[str, int]]
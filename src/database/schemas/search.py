@@ -0,0 +1,32 @@
+from typing import List
+
+from pydantic import BaseModel
+
+from src.database.schemas.organisation import OrganisationBase
+from src.database.schemas.product import ProductBase
+
+
+class SearchMatch(BaseModel):
+    # Whether a searched field starts with the text
+    prefix: bool
+    # Best trigram word similarity of the text to a searched field, from 0 to 1
+    score: float
+
+
+class OrganisationSearchResult(OrganisationBase, SearchMatch):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
+class ProductSearchResult(ProductBase, SearchMatch):
+    id: int
+
+    class Config:
+        orm_mode = True
+
+
+class SearchResults(BaseModel):
+    organisations: List[OrganisationSearchResult]
+    products: List[ProductSearchResult]
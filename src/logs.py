@@ -0,0 +1,157 @@
+import atexit
+import logging
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import Full, Queue
+from random import random
+from threading import Lock
+from typing import Any, Dict, Mapping, Optional
+
+import orjson
+
+from src.config import Settings
+
+# Loggers whose handlers write synchronously, routed through the queue as well
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Attributes every LogRecord has, the others were passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(
+    vars(logging.LogRecord("", logging.INFO, "", 0, "", None, None))
+) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line, with the fields passed through
+    `extra`, e.g. logger.info("Order created", extra={"order_id": 1}).
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return orjson.dumps(entry, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a random share of the records below WARNING of the sampled loggers, e.g.
+    {"uvicorn.access": 0.01} keeps one access log line in a hundred. A logger without a
+    rate takes the rate of its closest sampled parent, records of the others are kept.
+
+    Keyword arguments:
+        rates -- Share of the records to keep, from 0 to 1, keyed by logger name
+    """
+
+    def __init__(self, rates: Mapping[str, float]):
+        super().__init__()
+        self.rates = dict(rates)
+        # Rates resolved by logger name, there are few loggers
+        self._resolved: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            ancestor = name
+            while ancestor not in self.rates and "." in ancestor:
+                ancestor = ancestor.rsplit(".", 1)[0]
+            rate = self._resolved[name] = self.rates.get(ancestor, 1.0)
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hand records over to the QueueListener's thread, which formats and writes them.
+    Records are dropped, and counted in `dropped`, rather than wait while the queue is
+    full, so a slow stdout can't hold up the event loop.
+    """
+
+    def __init__(self, queue: "Queue[logging.LogRecord]"):
+        super().__init__(queue)
+        self.dropped = 0
+        self._dropped_lock = Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only the message is resolved here, while its arguments still hold the values
+        # logged, the formatting happens on the listener's thread
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def configure_logging(settings: Settings) -> None:
+    """
+    Route the records of every logger, uvicorn's included, through a bounded queue to
+    a background thread writing them to stdout, as JSON lines or plain text. Calling
+    it again once configured does nothing.
+
+    Keyword arguments:
+        settings -- Application settings, see the log_* settings
+    """
+    global _handler
+    if _handler is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if settings.log_format == "json":
+        stream_handler.setFormatter(JSONFormatter())
+    else:
+        stream_handler.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s:%(name)s:%(message)s")
+        )
+    queue: "Queue[logging.LogRecord]" = Queue(settings.log_queue_size)
+    handler = NonBlockingQueueHandler(queue)
+    handler.addFilter(SamplingFilter(settings.log_sample_rates))
+    listener = QueueListener(queue, stream_handler)
+    listener.start()
+    # Write the records still queued on exit
+    atexit.register(listener.stop)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+    for name in UVICORN_LOGGERS:
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+    _handler = handler
+
+
+def get_dropped_records() -> int:
+    """
+    Return: Number of records dropped because the queue was full
+    """
+    return _handler.dropped if _handler is not None else 0
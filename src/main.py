@@ -1,20 +1,36 @@
-from logging import INFO, basicConfig, getLogger
+from logging import getLogger
 
 from fastapi import FastAPI
 
-from src.routers import order, organisation, product
+from src.config import get_settings
+from src.database.session import async_engine
+from src.logs import configure_logging
+from src.routers import analytics, database, order, organisation, product, search
+from src.routers.etag import ETagMiddleware
+from src.routers.metrics import MetricsMiddleware
+from src.routers.metrics import router as metrics_router
+from src.routers.timing import ServerTimingMiddleware, time_endpoints
 
 logger = getLogger(__name__)
-basicConfig(level=INFO)
+configure_logging(get_settings())
 
 
 def get_app() -> FastAPI:
     app = FastAPI(
         title="FastAPI Supplies Demo",
     )
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(MetricsMiddleware)
+    # Added last to be the outermost middleware and time the whole request
+    app.add_middleware(ServerTimingMiddleware)
     app.include_router(product.router)
     app.include_router(organisation.router)
     app.include_router(order.router)
+    app.include_router(search.router)
+    app.include_router(analytics.router)
+    app.include_router(database.router)
+    app.include_router(metrics_router)
+    time_endpoints(app)
     return app
 
 
@@ -29,3 +45,4 @@ async def startup_event() -> None:
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
     logger.info("Shutting down...")
+    await async_engine.dispose()
@@ -0,0 +1,187 @@
+from bisect import bisect_left
+from threading import Lock
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+# Version of the Prometheus text format, the charset is added by the response
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+# (name suffix, labels, value) of a sample, e.g. ("_bucket", {"le": "0.1"}, 3)
+Sample = Tuple[str, Mapping[str, str], float]
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_metric(
+    name: str, type: str, help: str, samples: Iterable[Sample]
+) -> List[str]:
+    """
+    Lines of a metric in the Prometheus text format.
+
+    Keyword arguments:
+        name -- Name of the metric, e.g. db_pool_checked_out
+        type -- "counter", "gauge" or "histogram"
+        help -- Description of the metric
+        samples -- The samples of the metric
+    Return: The HELP and TYPE lines followed by one line per sample
+    """
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {type}"]
+    for suffix, labels, value in samples:
+        label_pairs = ",".join(
+            f'{label}="{_escape(label_value)}"' for label, label_value in labels.items()
+        )
+        if label_pairs:
+            label_pairs = f"{{{label_pairs}}}"
+        lines.append(f"{name}{suffix}{label_pairs} {format_value(value)}")
+    return lines
+
+
+def histogram_samples(
+    labels: Mapping[str, str],
+    cumulative_counts: Mapping[str, int],
+    total: float,
+) -> List[Sample]:
+    """
+    Samples of one histogram series.
+
+    Keyword arguments:
+        labels -- Labels of the series
+        cumulative_counts -- Cumulative counts keyed by bucket upper bound, ending with
+                             "+Inf"
+        total -- Sum of the observations
+    Return: The bucket samples followed by the sum and count samples
+    """
+    samples: List[Sample] = [
+        ("_bucket", {**labels, "le": bound}, count)
+        for bound, count in cumulative_counts.items()
+    ]
+    samples.append(("_sum", labels, total))
+    samples.append(("_count", labels, cumulative_counts.get("+Inf", 0)))
+    return samples
+
+
+class Gauge:
+    """
+    Thread safe value that goes up and down, e.g. the number of requests in flight.
+    """
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def expose(self) -> List[str]:
+        return format_metric(self.name, "gauge", self.help, [("", {}, self.value)])
+
+
+class Histogram:
+    """
+    Thread safe counts of observations, e.g. request durations, in buckets, with one
+    series per combination of label values.
+
+    Keyword arguments:
+        name -- Name of the metric
+        help -- Description of the metric
+        label_names -- Names of the labels, whose values are passed to `observe`
+        buckets -- Upper bounds of the buckets, the +Inf bucket is added
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        # Per label values: one count per bucket plus the +Inf one, and the sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """
+        Record an observation, with the values of the labels in order.
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                counts = [0] * (len(self.buckets) + 1)
+                series = self._series[label_values] = (counts, [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def series(self) -> Dict[Tuple[str, ...], Tuple[Dict[str, int], float]]:
+        """
+        Snapshot of the histogram.
+
+        Return: Dictionary of (cumulative counts keyed by bucket upper bound, ending
+                with "+Inf", sum) keyed by label values
+        """
+        with self._lock:
+            snapshot = {
+                label_values: (list(counts), total[0])
+                for label_values, (counts, total) in self._series.items()
+            }
+        bounds = [*map(str, self.buckets), "+Inf"]
+        series = {}
+        for label_values, (counts, total) in sorted(snapshot.items()):
+            cumulative: Dict[str, int] = {}
+            count = 0
+            for bound, bucket_count in zip(bounds, counts):
+                count += bucket_count
+                cumulative[bound] = count
+            series[label_values] = (cumulative, total)
+        return series
+
+    def expose(self) -> List[str]:
+        samples: List[Sample] = []
+        for label_values, (counts, total) in self.series().items():
+            labels = dict(zip(self.label_names, label_values))
+            samples += histogram_samples(labels, counts, total)
+        return format_metric(self.name, "histogram", self.help, samples)
+
+
+def optional_samples(
+    values: Iterable[Tuple[Mapping[str, str], Optional[float]]]
+) -> List[Sample]:
+    """
+    Samples of the values that are known, e.g. of the pools that have a size.
+    """
+    return [("", labels, value) for labels, value in values if value is not None]
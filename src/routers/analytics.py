@@ -0,0 +1,69 @@
+from logging import getLogger
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.crud.order import CRUDOrder
+from src.database.models.base import OrderTypeEnum
+from src.database.models.order import Order
+from src.database.schemas.analytics import OrderGroupBy, OrderTotals
+from src.database.session import get_async_db
+
+logger = getLogger(__name__)
+
+router = APIRouter(tags=["analytics"])
+
+
+# GET endpoints
+@router.get("/api/analytics/orders", response_model=List[OrderTotals], status_code=200)
+async def get_order_totals(
+    db: AsyncSession = Depends(get_async_db),
+    group_by: List[OrderGroupBy] = Query(
+        default=[OrderGroupBy.organisation],
+        description="Fields to total the Orders by, repeat the parameter to group by "
+        "several fields",
+    ),
+    organisation_id: Optional[int] = Query(
+        default=None, description="Only total the Orders of this Organisation"
+    ),
+    type: Optional[OrderTypeEnum] = Query(
+        default=None, description="Only total the Orders of this Type"
+    ),
+    category: Optional[str] = Query(
+        default=None, description="Only total the Products of this category"
+    ),
+    variety: Optional[str] = Query(
+        default=None, description="Only total the Products of this variety"
+    ),
+    packaging: Optional[str] = Query(
+        default=None, description="Only total the Products of this packaging"
+    ),
+) -> List[OrderTotals]:
+    """
+    GET endpoint to total the number, volume and value of Orders, computed in the
+    database from the leading numbers of the Products' Volume and Price_per_unit.
+    Each group is split by the units of the Volume and Price_per_unit it totals.
+    e.g. /api/analytics/orders?group_by=organisation&group_by=category&type=BUY
+
+    input params:
+        db: database session so that we can connect to our database
+        group_by: Fields to total the Orders by
+        organisation_id: Only total the Orders of this Organisation
+        type: Only total the Orders of this Type
+        category: Only total the Products of this category
+        variety: Only total the Products of this variety
+        packaging: Only total the Products of this packaging
+    return: List of OrderTotals pydantic class, one per group
+    """
+    order_crud = CRUDOrder(Order)  # type: ignore
+    rows = await order_crud.aget_totals(
+        db=db,
+        group_by=group_by,
+        organisation_id=organisation_id,
+        type=type,
+        category=category,
+        variety=variety,
+        packaging=packaging,
+    )
+    return [OrderTotals.from_orm(row) for row in rows]
@@ -0,0 +1,45 @@
+from logging import getLogger
+from typing import Dict
+
+from fastapi import APIRouter
+
+from src.database.cache import get_cache_statuses
+from src.database.pool import get_pool_status
+from src.database.schemas.cache import CacheStatus
+from src.database.schemas.pool import PoolStatus
+from src.database.session import async_engine, engine
+
+logger = getLogger(__name__)
+
+router = APIRouter(tags=["database"])
+
+
+# GET endpoints
+@router.get("/api/database/pool", response_model=Dict[str, PoolStatus], status_code=200)
+async def get_database_pool_status() -> Dict[str, PoolStatus]:
+    """
+    GET endpoint to inspect the database connection pools.
+    A growing `timeouts` count or a histogram skewed towards its upper buckets means
+    requests are queueing for a connection and the pool should be resized.
+
+    return: Dictionary of PoolStatus pydantic classes keyed by engine ("async" serves
+            the routers, "sync" serves scripts and the sync sessions)
+    """
+    return {
+        "async": get_pool_status(async_engine),
+        "sync": get_pool_status(engine),
+    }
+
+
+@router.get(
+    "/api/database/cache", response_model=Dict[str, CacheStatus], status_code=200
+)
+async def get_database_cache_status() -> Dict[str, CacheStatus]:
+    """
+    GET endpoint to inspect the caches serving records by ID.
+    A low ratio of hits to misses alongside a high `evictions` count means the cache is
+    too small for the working set, a high `expirations` count that the TTL is too short.
+
+    return: Dictionary of CacheStatus pydantic classes keyed by table name
+    """
+    return get_cache_statuses()
@@ -0,0 +1,134 @@
+from hashlib import blake2b
+from typing import List, Optional
+
+from fastapi import Header, Response, status
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ETAG_HEADER = "ETag"
+
+# Headers describing the body, left out of a 304 Not Modified response
+BODY_HEADERS = ("content-length", "content-type")
+
+
+def get_if_none_match(
+    if_none_match: Optional[str] = Header(default=None),
+) -> Optional[str]:
+    """
+    Dependency reading the If-None-Match request header.
+
+    input params:
+        if_none_match: ETags of the representations the client already has
+    return: The header's value, if any
+    """
+    return if_none_match
+
+
+def make_etag(digest: str) -> str:
+    """
+    Format a digest as a strong entity tag.
+
+    input params:
+        digest: Hex digest identifying the representation
+    return: Quoted entity tag
+    """
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match request header matches an entity tag, using the weak
+    comparison RFC 9110 prescribes for If-None-Match.
+
+    input params:
+        if_none_match: Value of the If-None-Match header, if any
+        etag: Current entity tag of the resource
+    return: True if the client's copy is still current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def conditional_response(
+    response: Response, if_none_match: Optional[str], version: Optional[str]
+) -> Optional[Response]:
+    """
+    Add the ETag of a resource version to the response and short-circuit with a
+    304 Not Modified response if the client already has that version.
+
+    input params:
+        response: The response of the endpoint
+        if_none_match: Value of the If-None-Match header, if any
+        version: Digest of the resource's current version, None if it doesn't exist
+    return: A 304 Not Modified response to return instead of the body, or None
+    """
+    if version is None:
+        return None
+    etag = make_etag(version)
+    if etag_matches(if_none_match, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={ETAG_HEADER: etag}
+        )
+    response.headers[ETAG_HEADER] = etag
+    return None
+
+
+class ETagMiddleware:
+    """
+    Tag the JSON bodies of successful GET responses that have no ETag yet with a hash
+    of their content, answering 304 Not Modified without a body when the request's
+    If-None-Match header matches. Other responses, like streams, pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = None
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def _send_buffered(start: Message, body: bytes) -> None:
+            headers = MutableHeaders(raw=start["headers"])
+            etag = make_etag(blake2b(body, digest_size=16).hexdigest())
+            headers[ETAG_HEADER] = etag
+            if etag_matches(if_none_match, etag):
+                for name in BODY_HEADERS:
+                    del headers[name]
+                await send({**start, "status": status.HTTP_304_NOT_MODIFIED})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        async def send_with_etag(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                content_type = headers.get("content-type", "")
+                is_json = content_type.startswith("application/json")
+                if message["status"] == status.HTTP_200_OK and is_json:
+                    if ETAG_HEADER not in headers:
+                        start = message
+                        return
+            elif start is not None and message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await _send_buffered(start, b"".join(chunks))
+                return
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,74 @@
+from logging import getLogger
+from time import perf_counter
+from typing import Any, AsyncIterator
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.crud.base import CRUDBase
+
+logger = getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Records fetched from the server-side cursor and written to the response at a time
+EXPORT_BATCH_SIZE = 1000
+
+
+async def _export_lines(
+    db: AsyncSession,
+    crud: CRUDBase[Any, Any, Any],
+    batch_size: int,
+) -> AsyncIterator[bytes]:
+    """
+    Helper generator serialising every record of a table as NDJSON, one batch at a time.
+
+    input params:
+        db: database session so that we can connect to our database
+        crud: CRUD class of the table to export
+        batch_size: Records fetched from the cursor and written at a time
+    return: Async iterator of NDJSON chunks
+    """
+    # A single read only snapshot, so the eager loads of later batches see the same
+    # data as the cursor itself
+    await db.connection(
+        execution_options={
+            "isolation_level": "REPEATABLE READ",
+            "postgresql_readonly": True,
+        }
+    )
+    table = crud.model.__tablename__
+    exported = 0
+    start = perf_counter()
+    async for batch in crud.aiter_dict_batches(db=db, batch_size=batch_size):
+        yield b"".join(orjson.dumps(record) + b"\n" for record in batch)
+        exported += len(batch)
+    seconds = perf_counter() - start
+    logger.info(
+        "Exported %d %s in %.2fs (%.0f rows/s).",
+        exported,
+        table,
+        seconds,
+        exported / seconds if seconds else 0,
+    )
+
+
+def export_response(
+    db: AsyncSession,
+    crud: CRUDBase[Any, Any, Any],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> StreamingResponse:
+    """
+    Stream every record of a table as newline-delimited JSON (NDJSON), ordered by ID.
+    The records are projected into dictionaries shaped as the table's DBBase schema,
+    see `CRUDBase.aiter_dict_batches`.
+
+    input params:
+        db: database session so that we can connect to our database
+        crud: CRUD class of the table to export
+        batch_size: Records fetched from the cursor and written at a time
+    return: StreamingResponse of NDJSON
+    """
+    return StreamingResponse(
+        _export_lines(db, crud, batch_size), media_type=NDJSON_MEDIA_TYPE
+    )
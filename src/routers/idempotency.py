@@ -0,0 +1,133 @@
+from hashlib import blake2b
+from typing import Awaitable, Callable, Optional, Tuple, Type, TypeVar, Union
+
+from fastapi import Header, HTTPException, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from src.config import get_settings
+from src.database.cache import CacheBackend, InMemoryCache
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+# Added to the stored responses returned to retried requests
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# Stored per key: digest of the request payload, then the status code and body of the
+# response, both None while the first request is still being served
+StoredResponse = Tuple[bytes, Optional[int], Optional[bytes]]
+
+CreatedType = TypeVar("CreatedType")
+
+_store: Optional[CacheBackend] = None
+
+
+def get_idempotency_store() -> CacheBackend:
+    """
+    The store of the responses to requests sent with an Idempotency-Key, created on
+    first use. Each worker process has its own store unless another backend is plugged
+    in, see `set_idempotency_store`.
+
+    return: The store's CacheBackend
+    """
+    global _store
+    if _store is None:
+        settings = get_settings()
+        _store = InMemoryCache(
+            max_size=settings.idempotency_max_keys, ttl=settings.idempotency_key_ttl
+        )
+    return _store
+
+
+def set_idempotency_store(store: Optional[CacheBackend]) -> None:
+    """
+    Plug in another store, e.g. one shared by every worker process, or drop the
+    current one with None.
+
+    input params:
+        store: The CacheBackend to store the responses in
+    """
+    global _store
+    _store = store
+
+
+def get_idempotency_key(
+    idempotency_key: Optional[str] = Header(
+        default=None, max_length=MAX_IDEMPOTENCY_KEY_LENGTH
+    ),
+) -> Optional[str]:
+    """
+    Dependency reading the Idempotency-Key request header.
+
+    input params:
+        idempotency_key: Key the client sends again when retrying the same request
+    return: The header's value, if any
+    """
+    return idempotency_key
+
+
+async def idempotent_response(
+    idempotency_key: Optional[str],
+    scope: str,
+    payload: BaseModel,
+    create: Callable[[], Awaitable[CreatedType]],
+    response_model: Type[BaseModel],
+) -> Union[CreatedType, Response]:
+    """
+    Run the `create` function of a POST endpoint once per Idempotency-Key: the response
+    is stored under the key and returned as is to the requests retried with the same
+    key and payload, without running `create` again.
+
+    input params:
+        idempotency_key: Value of the Idempotency-Key header, None to always create
+        scope: Name of the resource created, so that keys are only compared within it
+        payload: The validated request body
+        create: Coroutine function creating the resource and returning it
+        response_model: Pydantic class the endpoint returns the resource as
+    return: The created resource without a key, otherwise the 201 response holding it
+    """
+    if idempotency_key is None:
+        return await create()
+
+    store = get_idempotency_store()
+    key = (scope, idempotency_key)
+    digest = blake2b(payload.json(sort_keys=True).encode(), digest_size=16).digest()
+    stored: Optional[StoredResponse] = store.get(key)
+    if stored is not None:
+        stored_digest, status_code, body = stored
+        if stored_digest != digest:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"{IDEMPOTENCY_KEY_HEADER} already used with another payload",
+            )
+        if status_code is None or body is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"A request with this {IDEMPOTENCY_KEY_HEADER} is in progress",
+            )
+        return Response(
+            body,
+            status_code=status_code,
+            media_type=ORJSONResponse.media_type,
+            headers={IDEMPOTENT_REPLAYED_HEADER: "true"},
+        )
+
+    # Reserved before awaiting, so that a retry arriving meanwhile is told to wait
+    store.set(key, (digest, None, None))
+    stored_response = False
+    try:
+        created = await create()
+        response = ORJSONResponse(
+            jsonable_encoder(response_model.from_orm(created)),
+            status_code=status.HTTP_201_CREATED,
+        )
+        store.set(key, (digest, response.status_code, response.body))
+        stored_response = True
+    finally:
+        if not stored_response:
+            # Release the key rather than answer every retry with a 409 until it
+            # expires, the client may retry with the same key
+            store.delete(key)
+    return response
@@ -0,0 +1,79 @@
+from logging import getLogger
+from typing import Any, Dict
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.importer import ImportFormat, clear_caches, import_records, iter_lines
+from src.database.schemas.importer import ImportResult
+from src.routers.export import NDJSON_MEDIA_TYPE
+
+logger = getLogger(__name__)
+
+CSV_MEDIA_TYPE = "text/csv"
+
+IMPORT_MEDIA_TYPES = {
+    CSV_MEDIA_TYPE: ImportFormat.CSV,
+    NDJSON_MEDIA_TYPE: ImportFormat.NDJSON,
+}
+
+
+def import_openapi_extra(schema: str) -> Dict[str, Any]:
+    """
+    OpenAPI description of the body of an import endpoint.
+
+    input params:
+        schema: Name of the Create schema each record is validated against
+    return: openapi_extra of the endpoint
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                CSV_MEDIA_TYPE: {"schema": {"type": "string"}},
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": f"#/components/schemas/{schema}"}
+                },
+            },
+        }
+    }
+
+
+async def import_upload(
+    request: Request, db: AsyncSession, table_name: str
+) -> ImportResult:
+    """
+    Stream an uploaded CSV or NDJSON file into a table through COPY and commit it.
+
+    input params:
+        request: The request whose body is the file, with a text/csv or
+                    application/x-ndjson content type
+        db: database session so that we can connect to our database
+        table_name: "products", "organisations" or "orders"
+    return: ImportResult pydantic class with the counts, rejected rows and throughput
+    """
+    media_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if media_type not in IMPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Upload {CSV_MEDIA_TYPE} or {NDJSON_MEDIA_TYPE}",
+        )
+    result = await import_records(
+        await db.connection(),
+        table_name,
+        iter_lines(request.stream()),
+        IMPORT_MEDIA_TYPES[media_type],
+    )
+    await db.commit()
+    clear_caches(table_name)
+    logger.info(
+        "Imported %d of %d %s in %.2fs (%.0f rows/s), %d existing, %d rejected.",
+        result.imported,
+        result.rows,
+        table_name,
+        result.seconds,
+        result.rows_per_second,
+        result.existing,
+        result.rejected,
+    )
+    return result
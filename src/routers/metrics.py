@@ -0,0 +1,199 @@
+from logging import getLogger
+from time import perf_counter
+from typing import Any, Callable, Dict, List
+
+from fastapi import APIRouter, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.database.cache import get_cache_statuses
+from src.database.pool import get_pool_status
+from src.database.profiling import instrument_engines, query_duration
+from src.database.session import async_engine, engine
+from src.logs import get_dropped_records
+from src.metrics import (
+    CONTENT_TYPE,
+    Gauge,
+    Histogram,
+    Sample,
+    format_metric,
+    histogram_samples,
+    optional_samples,
+)
+
+logger = getLogger(__name__)
+
+router = APIRouter(tags=["metrics"])
+
+# Route label of the requests no route matched, e.g. 404s
+UNMATCHED_ROUTE = "unmatched"
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time spent serving HTTP requests, by route template and status code",
+    label_names=("method", "route", "status"),
+)
+requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests being served by this process"
+)
+
+
+class MetricsMiddleware:
+    """
+    Record the duration of every HTTP request in `request_duration`, labelled by the
+    path template of its route so that e.g. /api/order/1 and /api/order/2 share a
+    series, and count the requests in flight.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        # Path templates keyed by endpoint function, built on the first request
+        self._routes: Dict[Callable[..., Any], str] = {}
+        instrument_engines()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = perf_counter()
+        status_code = 500
+        requests_in_flight.inc()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            requests_in_flight.dec()
+            request_duration.observe(
+                perf_counter() - start,
+                scope["method"],
+                self._route(scope),
+                str(status_code),
+            )
+
+    def _route(self, scope: Scope) -> str:
+        # The router records the endpoint of the matched route in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        if endpoint not in self._routes:
+            self._routes = {
+                route.endpoint: route.path
+                for route in scope["app"].routes
+                if hasattr(route, "endpoint")
+            }
+        return self._routes.get(endpoint, UNMATCHED_ROUTE)
+
+
+def _pool_metrics() -> List[str]:
+    statuses = {"async": get_pool_status(async_engine), "sync": get_pool_status(engine)}
+    lines: List[str] = []
+    for name, field, type, help in (
+        ("db_pool_size", "size", "gauge", "Connections the pool keeps open"),
+        ("db_pool_checked_in", "checked_in", "gauge", "Idle connections in the pool"),
+        ("db_pool_checked_out", "checked_out", "gauge", "Connections in use"),
+        ("db_pool_overflow", "overflow", "gauge", "Connections open beyond the size"),
+        ("db_pool_max_overflow", "max_overflow", "gauge", "Limit of the overflow"),
+        ("db_pool_checkouts_total", "checkouts", "counter", "Connection checkouts"),
+        (
+            "db_pool_timeouts_total",
+            "timeouts",
+            "counter",
+            "Checkouts that timed out waiting for a connection",
+        ),
+    ):
+        samples = optional_samples(
+            ({"engine": engine_name}, getattr(status, field))
+            for engine_name, status in statuses.items()
+        )
+        lines += format_metric(name, type, help, samples)
+
+    wait_samples: List[Sample] = []
+    for engine_name, status in statuses.items():
+        if status.wait_seconds_histogram is not None:
+            wait_samples += histogram_samples(
+                {"engine": engine_name},
+                status.wait_seconds_histogram,
+                status.wait_seconds_sum or 0.0,
+            )
+    lines += format_metric(
+        "db_pool_checkout_wait_seconds",
+        "histogram",
+        "Time spent waiting to check out a connection",
+        wait_samples,
+    )
+    return lines
+
+
+def _cache_metrics() -> List[str]:
+    statuses = get_cache_statuses()
+    lines = format_metric(
+        "cache_size",
+        "gauge",
+        "Entries in the cache",
+        optional_samples(
+            ({"cache": namespace}, status.size)
+            for namespace, status in statuses.items()
+        ),
+    )
+    for name, field, help in (
+        ("cache_hits_total", "hits", "Lookups served from the cache"),
+        ("cache_misses_total", "misses", "Lookups not found in the cache"),
+        ("cache_evictions_total", "evictions", "Entries evicted to make room"),
+        ("cache_expirations_total", "expirations", "Entries dropped past their TTL"),
+    ):
+        samples = optional_samples(
+            ({"cache": namespace}, getattr(status, field))
+            for namespace, status in statuses.items()
+        )
+        lines += format_metric(name, "counter", help, samples)
+    ratios: List[Sample] = []
+    for namespace, status in statuses.items():
+        lookups = status.hits + status.misses
+        if lookups:
+            ratios.append(("", {"cache": namespace}, status.hits / lookups))
+    lines += format_metric(
+        "cache_hit_ratio", "gauge", "Share of the lookups served from the cache", ratios
+    )
+    return lines
+
+
+def render_metrics() -> str:
+    """
+    Every metric of this process in the Prometheus text format.
+
+    return: The metrics, one sample per line
+    """
+    lines: List[str] = [
+        *request_duration.expose(),
+        *requests_in_flight.expose(),
+        *query_duration.expose(),
+        *_pool_metrics(),
+        *_cache_metrics(),
+        *format_metric(
+            "log_records_dropped_total",
+            "counter",
+            "Log records dropped because the log queue was full",
+            [("", {}, get_dropped_records())],
+        ),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# GET endpoints
+@router.get("/metrics", response_class=Response, status_code=200)
+async def get_metrics() -> Response:
+    """
+    GET endpoint to scrape the metrics of this process in the Prometheus text format:
+    request latency histograms by route and status, requests in flight, connection
+    pool gauges, statement durations by type and cache hit ratios.
+    Each worker process serves its own metrics.
+
+    return: Response of the metrics as text
+    """
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
@@ -1,52 +1,72 @@
-from logging import INFO, basicConfig, getLogger
-from typing import Any, Dict, List, Tuple
+import json
+from logging import getLogger
+from typing import Any, Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.crud.order import CRUDOrder
+from src.database.crud.organisation import CRUDOrganisation
+from src.database.importer import format_validation_error
 from src.database.models.order import Order
-from src.database.schemas.order import OrderCreate, OrderDBBase, OrderUpdate
-from src.database.session import get_db
+from src.database.models.organisation import Organisation
+from src.database.schemas.importer import ImportResult
+from src.database.schemas.order import (
+    OrderBulkItemResult,
+    OrderBulkResult,
+    OrderChain,
+    OrderCreate,
+    OrderDBBase,
+    OrderUpdate,
+)
+from src.database.session import get_async_db
+from src.routers.etag import conditional_response, get_if_none_match
+from src.routers.export import NDJSON_MEDIA_TYPE, export_response
+from src.routers.idempotency import get_idempotency_key, idempotent_response
+from src.routers.importer import import_openapi_extra, import_upload
+from src.routers.pagination import NEXT_CURSOR_HEADER, decode_cursor, set_next_cursor
+from src.routers.responses import json_response
 
 logger = getLogger(__name__)
-basicConfig(level=INFO)
 
 router = APIRouter(
     tags=["orders"],
     responses={404: {"description": "No order found, sorry!"}},
 )
 
+MAX_BULK_ORDERS = 10_000
+
+
+class _InvalidJSON:
+    """
+    Placeholder for an NDJSON line of a bulk request that isn't valid JSON.
+    """
+
 
 def _copy_over_quantities(
-    order_in: OrderCreate, order_ref: Order
+    order_in: OrderCreate, ref_products: Optional[List[Dict[str, Any]]]
 ) -> Tuple[OrderCreate, Dict[str, Any]]:
     """
-    Helper function to copy over quantities from a previous order to the new order
+    Helper function to copy over quantities from previous orders to the new order.
+    Products is the only quantity an OrderCreate can leave null, it is taken from the
+    nearest order of the reference chain that has products.
 
     input params:
         order_in: OrderCreate pydantic class containing all the data
                     pertaining to the order to be created
-        order_ref: OrderDBBase pydantic class containing all the referenced order data from
-                    which we will copy over quantities
+        ref_products: Products inherited from the reference chain, see
+                    CRUDOrder.get_reference_products
     return: OrderCreate pydantic class containing all the updated data
             pertaining to the order to be created and referenced order data
     """
-    ref_object = OrderDBBase(
-        id=order_ref.id,  # type: ignore
-        References=order_ref.References,  # type: ignore
-        Type=order_ref.Type,  # type: ignore
-        Products=order_ref.Products,  # type: ignore
-        Organisation_id=order_ref.Organisation_id,  # type: ignore
-    )
     dict_in = order_in.dict(exclude_unset=True)
-    dict_ref = ref_object.dict(exclude_unset=True)
 
     fields_updated_by_reference = {}
-    for key, value in dict_ref.items():
-        if key in dict_in and dict_in[key] is None:
-            dict_in[key] = value
-            fields_updated_by_reference[key] = value
+    if dict_in.get("Products", []) is None and ref_products is not None:
+        dict_in["Products"] = fields_updated_by_reference["Products"] = ref_products
 
     return OrderCreate(**dict_in), fields_updated_by_reference
 
@@ -55,86 +75,374 @@ def _copy_over_quantities(
 @router.post("/api/order", response_model=OrderDBBase, status_code=201)
 async def create_order(
     order_in: OrderCreate,
-    db: Session = Depends(get_db),
-) -> OrderDBBase:
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+) -> Union[OrderDBBase, Response]:
     """
-    POST endpoint to persist an Order to a Postgres database
+    POST endpoint to persist an Order to a Postgres database.
+    A request retried with the same Idempotency-Key header and payload gets the stored
+    response back instead of creating the order again.
 
     input params:
         order_in: OrderCreate pydantic class containing all the data
                     pertaining to the order to be created
         db: database session so that we can connect to our database
+        idempotency_key: Key identifying the request across its retries, if any
 
     return: OrderDBBase pydantic class containing all
             the data pertaining to the order
     """
+    return await idempotent_response(
+        idempotency_key,
+        "orders",
+        order_in,
+        lambda: _create_order(order_in, db),
+        OrderDBBase,
+    )
+
+
+async def _create_order(order_in: OrderCreate, db: AsyncSession) -> Order:
+    """
+    Helper function to persist an Order, copying over the quantities it doesn't specify
+    from the orders it references.
 
+    input params:
+        order_in: OrderCreate pydantic class of the order to be created
+        db: database session so that we can connect to our database
+    return: The created Order
+    """
     order_crud = CRUDOrder(Order)  # type: ignore
     if order_in.References:
-        msg = (
-            f"References {str(order_in.References)} found, copying over "
-            "quantities that aren't specified in the order_in object."
+        logger.debug(
+            "References %s found, copying over quantities that aren't specified in "
+            "the order_in object.",
+            order_in.References,
         )
-        logger.info(msg)
-        ref_order = order_crud.get(db=db, id=order_in.References)
-        if ref_order:
+        # Walks the reference chain in one query, up to the first order with products
+        ref_products = await order_crud.aget_reference_products(
+            db=db, ids=[order_in.References]
+        )
+        if order_in.References in ref_products:
             updated_order_in, updated_details = _copy_over_quantities(
-                order_in, ref_order
+                order_in, ref_products[order_in.References]
             )
-            logger.info(
-                f"Updated order_in object from reference with the following: {updated_details}"
-            )
-            order_created_ref, product_ids_created_ref = order_crud.create_new_order(
-                db=db, obj_in=updated_order_in
+            logger.debug(
+                "Updated order_in object from reference with the following: %s",
+                updated_details,
             )
+            (
+                order_created_ref,
+                product_ids_created_ref,
+            ) = await order_crud.acreate_new_order(db=db, obj_in=updated_order_in)
             logger.info(
-                f"Order {order_created_ref.id} created with {str(len(product_ids_created_ref))} "
-                f"new products: {product_ids_created_ref}."
+                "Order %s created with %d new products: %s.",
+                order_created_ref.id,
+                len(product_ids_created_ref),
+                product_ids_created_ref,
             )
             return order_created_ref
 
-    order_created, product_ids_created = order_crud.create_new_order(
+    order_created, product_ids_created = await order_crud.acreate_new_order(
         db=db, obj_in=order_in
     )
 
     logger.info(
-        f"Order {order_created.id} created with {str(len(product_ids_created))} "
-        f"new products: {product_ids_created}."
+        "Order %s created with %d new products: %s.",
+        order_created.id,
+        len(product_ids_created),
+        product_ids_created,
     )
     return order_created
 
 
+async def _read_bulk_orders(request: Request) -> List[Any]:
+    """
+    Helper function to read the raw order payloads of a bulk request.
+    NDJSON bodies are parsed line by line as they stream in, anything else must be a
+    JSON array.
+
+    input params:
+        request: The incoming bulk request
+    return: List of the decoded payloads, _InvalidJSON for NDJSON lines that can't be decoded
+    """
+
+    def _decode_line(line: bytes) -> Any:
+        try:
+            return json.loads(line)
+        except ValueError:
+            return _InvalidJSON()
+
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        payloads: List[Any] = []
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            payloads.extend(_decode_line(line) for line in lines if line.strip())
+            if len(payloads) > MAX_BULK_ORDERS:
+                break
+        if buffer.strip():
+            payloads.append(_decode_line(buffer))
+        return payloads
+
+    try:
+        body = json.loads(await request.body())
+    except ValueError:
+        body = None
+    if not isinstance(body, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Request body must be a JSON array of orders",
+        )
+    return body
+
+
+@router.post(
+    "/api/order/bulk",
+    response_model=OrderBulkResult,
+    status_code=201,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/OrderCreate"},
+                    }
+                },
+                NDJSON_MEDIA_TYPE: {
+                    "schema": {"$ref": "#/components/schemas/OrderCreate"}
+                },
+            },
+        }
+    },
+)
+async def create_orders_in_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+) -> OrderBulkResult:
+    """
+    POST endpoint to persist many Orders to a Postgres database in one transaction.
+    The body is either a JSON array of orders or NDJSON (one order per line, with the
+    application/x-ndjson content type). Invalid orders are reported per item and
+    don't stop the valid ones from being created.
+
+    input params:
+        request: The request whose body holds the OrderCreate payloads
+        db: database session so that we can connect to our database
+
+    return: OrderBulkResult pydantic class with the ID or error of every order,
+            in the order they were sent
+    """
+    payloads = await _read_bulk_orders(request)
+    if len(payloads) > MAX_BULK_ORDERS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_ORDERS} orders can be created at once",
+        )
+
+    results: Dict[int, OrderBulkItemResult] = {}
+    orders_in: Dict[int, OrderCreate] = {}
+    for index, payload in enumerate(payloads):
+        if isinstance(payload, _InvalidJSON):
+            results[index] = OrderBulkItemResult(index=index, error="Invalid JSON")
+            continue
+        try:
+            orders_in[index] = OrderCreate.parse_obj(payload)
+        except ValidationError as error:
+            results[index] = OrderBulkItemResult(
+                index=index, error=format_validation_error(error)
+            )
+
+    # Check every organisation and reference with one query each
+    order_crud = CRUDOrder(Order)  # type: ignore
+    organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
+    organisation_ids = await organisation_crud.aget_existing_ids(
+        db=db, ids={order_in.Organisation_id for order_in in orders_in.values()}
+    )
+    ref_products = await order_crud.aget_reference_products(
+        db=db,
+        ids={
+            order_in.References
+            for order_in in orders_in.values()
+            if order_in.References
+        },
+    )
+
+    for index, order_in in list(orders_in.items()):
+        reason = None
+        if order_in.Organisation_id not in organisation_ids:
+            reason = f"Organisation {order_in.Organisation_id} not found"
+        elif order_in.References and order_in.References not in ref_products:
+            reason = f"Referenced order {order_in.References} not found"
+        elif order_in.References:
+            orders_in[index], _ = _copy_over_quantities(
+                order_in, ref_products[order_in.References]
+            )
+        if reason:
+            results[index] = OrderBulkItemResult(index=index, error=reason)
+            del orders_in[index]
+
+    product_ids: List[int] = []
+    try:
+        order_ids, product_ids = await order_crud.acreate_many_orders(
+            db=db, objs_in=list(orders_in.values())
+        )
+    except IntegrityError as error:
+        await db.rollback()
+        logger.warning("Bulk order creation rolled back: %s", error.orig)
+        for index in orders_in:
+            results[index] = OrderBulkItemResult(
+                index=index, error=f"Rolled back: {str(error.orig).splitlines()[0]}"
+            )
+    else:
+        for index, order_id in zip(orders_in, order_ids):
+            results[index] = OrderBulkItemResult(index=index, id=order_id)
+
+    created = len(results) - sum(1 for result in results.values() if result.error)
+    logger.info(
+        "Bulk created %d of %d orders with %d new products.",
+        created,
+        len(payloads),
+        len(product_ids),
+    )
+    return OrderBulkResult(
+        created=created,
+        failed=len(results) - created,
+        product_ids=product_ids,
+        results=[results[index] for index in sorted(results)],
+    )
+
+
+@router.post(
+    "/api/order/import",
+    response_model=ImportResult,
+    status_code=201,
+    openapi_extra=import_openapi_extra("OrderCreate"),
+)
+async def import_orders(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+) -> ImportResult:
+    """
+    POST endpoint to bulk import Orders into a Postgres database using COPY.
+    The body is a CSV file with a header row (text/csv) or NDJSON
+    (application/x-ndjson), streamed into the database in batches as it arrives.
+    CSV files hold the Products of an order as a JSON array. Orders whose organisation
+    or referenced order doesn't exist are rejected; quantities are not copied over
+    from referenced orders.
+
+    input params:
+        request: The request whose body holds the OrderCreate records
+        db: database session so that we can connect to our database
+    return: ImportResult pydantic class with the counts, rejected rows and throughput
+    """
+    return await import_upload(request, db, "orders")
+
+
 # GET endpoints
+@router.get(
+    "/api/order/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+    status_code=200,
+)
+async def export_orders(
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    GET endpoint to export all Orders from a Postgres database as newline-delimited JSON.
+    The Orders are streamed from a single server-side cursor, one consistent snapshot,
+    with only one batch of Orders held in memory at a time.
+
+    input params:
+        db: database session so that we can connect to our database
+    return: StreamingResponse with one OrderDBBase pydantic class per line
+    """
+    return export_response(db, CRUDOrder(Order))  # type: ignore
+
+
 @router.get(
     "/api/order/{order_id}",
     response_model=OrderDBBase,
+    response_class=ORJSONResponse,
     status_code=200,
 )
 async def get_order_by_id(
     order_id: int,
-    db: Session = Depends(get_db),
-) -> OrderDBBase:
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Depends(get_if_none_match),
+) -> Response:
     """
     GET endpoint to retrieve an Order from a Postgres database
 
     input params:
         order_id: The ID of the order to retrieve
+        response: response to which the ETag of the order is added
         db: database session so that we can connect to our database
+        if_none_match: ETags of the order the client already has
     return: OrderDBBase pydantic class containing all
-            the data pertaining to the order
+            the data pertaining to the order, or a 304 Not Modified response if
+            the client's copy is current
     """
     order_crud = CRUDOrder(Order)  # type: ignore
-    order = order_crud.get(db=db, id=order_id)
-    if not order:
+    versioned = await order_crud.aget_versioned_dict(db=db, id=order_id)
+    if not versioned:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="order not found"
         )
-    return order
+    order, version = versioned
+    not_modified = conditional_response(response, if_none_match, version)
+    if not_modified:
+        return not_modified
+    return json_response(order, response)
 
 
-@router.get("/api/order", response_model=List[OrderDBBase], status_code=200)
+@router.get(
+    "/api/order/{order_id}/chain",
+    response_model=OrderChain,
+    status_code=200,
+)
+async def get_order_chain(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+) -> OrderChain:
+    """
+    GET endpoint to retrieve the reference chain of an Order from a Postgres database:
+    the Orders it references, directly or through other Orders, and the Orders
+    referencing it. The whole chain is resolved with a single recursive query.
+
+    input params:
+        order_id: The ID of the order whose chain to retrieve
+        db: database session so that we can connect to our database
+    return: OrderChain pydantic class with the order, its ancestors from the first
+            order of the chain onwards and its descendants, nearest first
+    """
+    order_crud = CRUDOrder(Order)  # type: ignore
+    chains = await order_crud.aget_chains(db=db, ids=[order_id])
+    if order_id not in chains:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="order not found"
+        )
+    chain = chains[order_id]
+    return OrderChain(
+        ancestors=[order for order, depth in chain if depth < 0],
+        order=next(order for order, depth in chain if depth == 0),
+        descendants=[order for order, depth in chain if depth > 0],
+    )
+
+
+@router.get(
+    "/api/order",
+    response_model=List[OrderDBBase],
+    response_class=ORJSONResponse,
+    status_code=200,
+)
 async def get_all_orders(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(
         default=0,
         description=("How many Orders to skip before returning the remaining Orders"),
@@ -145,24 +453,40 @@ async def get_all_orders(
         description="Limit the number of Orders displayed on each page",
         ge=1,
     ),
-) -> List[Order]:
+    cursor: Optional[str] = Query(
+        default=None,
+        description=(
+            "Return the Orders after this cursor. Taken from the "
+            f"{NEXT_CURSOR_HEADER} header of the previous page"
+        ),
+    ),
+) -> ORJSONResponse:
     """
-    GET endpoint to retrieve all Orders from a Postgres database
+    GET endpoint to retrieve all Orders from a Postgres database.
+    The Orders are read as plain dictionaries and encoded with orjson.
 
     input params:
+        response: response to which the cursor of the next page is added
         db: database session so that we can connect to our database
         skip: How many Orders to skip before returning the remaining Orders
         limit: Limit the number of Orders displayed on each page
+        cursor: Return the Orders after this cursor, see the X-Next-Cursor header
     return: List of OrderDBBase pydantic class containing all the
             data pertaining to the order
     """
     order_crud = CRUDOrder(Order)  # type: ignore
-    orders = order_crud.get_multi(db=db, skip=skip, limit=limit)
+    orders = await order_crud.aget_multi_dicts(
+        db=db,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(cursor) if cursor else None,
+    )
     if not orders:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Orders not found"
         )
-    return orders
+    set_next_cursor(response, orders, limit)
+    return json_response(orders, response)
 
 
 # DELETE endpoints
@@ -173,7 +497,7 @@ async def get_all_orders(
 )
 async def delete_order_by_id(
     order_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> OrderDBBase:
     """
     DELETE endpoint to remove an Order from a Postgres database
@@ -185,7 +509,7 @@ async def delete_order_by_id(
             the data pertaining to the order
     """
     order_crud = CRUDOrder(Order)  # type: ignore
-    order = order_crud.remove(db=db, id=order_id)
+    order = await order_crud.aremove(db=db, id=order_id)
     if not order:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="order not found"
@@ -202,7 +526,7 @@ async def delete_order_by_id(
 async def update_order_by_id(
     order_id: int,
     order_in: OrderUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> OrderDBBase:
     """
     PUT endpoint to update an Order in a Postgres database
@@ -216,11 +540,11 @@ async def update_order_by_id(
             the data pertaining to the order
     """
     order_crud = CRUDOrder(Order)  # type: ignore
-    db_order: Order | None = order_crud.get(db=db, id=order_id)
+    db_order: Order | None = await order_crud.aget(db=db, id=order_id)
 
     # TODO: do we need to copy over quantities here if a reference is added?
     if db_order:
-        order = order_crud.update(db=db, db_obj=db_order, obj_in=order_in)
+        order = await order_crud.aupdate(db=db, db_obj=db_order, obj_in=order_in)
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="order not found"
@@ -1,20 +1,27 @@
-from logging import INFO, basicConfig, getLogger
-from typing import List
+from logging import getLogger
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.crud.organisation import CRUDOrganisation
 from src.database.models.organisation import Organisation
+from src.database.schemas.importer import ImportResult
 from src.database.schemas.organisation import (
+    CatalogProduct,
     OrganisationCreate,
     OrganisationDBBase,
     OrganisationUpdate,
 )
-from src.database.session import get_db
+from src.database.session import get_async_db
+from src.routers.etag import conditional_response, get_if_none_match
+from src.routers.export import NDJSON_MEDIA_TYPE, export_response
+from src.routers.importer import import_openapi_extra, import_upload
+from src.routers.pagination import NEXT_CURSOR_HEADER, decode_cursor, set_next_cursor
+from src.routers.responses import json_response
 
 logger = getLogger(__name__)
-basicConfig(level=INFO)
 
 router = APIRouter(
     tags=["organisations"],
@@ -28,7 +35,7 @@ router = APIRouter(
 @router.post("/api/organisation", response_model=OrganisationDBBase, status_code=201)
 async def create_organisation(
     organisation_in: OrganisationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> OrganisationDBBase:
     """
     POST endpoint to persist a Organisation to a Postgres database
@@ -42,42 +49,158 @@ async def create_organisation(
             the data pertaining to the organisation
     """
     organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
-    return organisation_crud.create(db=db, obj_in=organisation_in)
+    return await organisation_crud.acreate(db=db, obj_in=organisation_in)
+
+
+@router.post(
+    "/api/organisation/import",
+    response_model=ImportResult,
+    status_code=201,
+    openapi_extra=import_openapi_extra("OrganisationCreate"),
+)
+async def import_organisations(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+) -> ImportResult:
+    """
+    POST endpoint to bulk import Organisations into a Postgres database using COPY.
+    The body is a CSV file with a header row (text/csv) or NDJSON
+    (application/x-ndjson), streamed into the database in batches as it arrives.
+    Existing organisations are skipped.
+
+    input params:
+        request: The request whose body holds the OrganisationCreate records
+        db: database session so that we can connect to our database
+    return: ImportResult pydantic class with the counts, rejected rows and throughput
+    """
+    return await import_upload(request, db, "organisations")
 
 
 # GET endpoints
+@router.get(
+    "/api/organisation/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+    status_code=200,
+)
+async def export_organisations(
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    GET endpoint to export all Organisations from a Postgres database as newline-delimited JSON.
+    The Organisations are streamed from a single server-side cursor, one consistent snapshot,
+    with only one batch of Organisations held in memory at a time.
+
+    input params:
+        db: database session so that we can connect to our database
+    return: StreamingResponse with one OrganisationDBBase pydantic class per line
+    """
+    return export_response(db, CRUDOrganisation(Organisation))  # type: ignore
+
+
 @router.get(
     "/api/organisation/{organisation_id}",
     response_model=OrganisationDBBase,
+    response_class=ORJSONResponse,
     status_code=200,
 )
 async def get_organisation_by_id(
     organisation_id: int,
-    db: Session = Depends(get_db),
-) -> OrganisationDBBase:
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Depends(get_if_none_match),
+) -> Response:
     """
     GET endpoint to retrieve a Organisation from a Postgres database
 
     input params:
         organisation_id: The ID of the Organisation to retrieve
+        response: response to which the ETag of the organisation is added
         db: database session so that we can connect to our database
+        if_none_match: ETags of the organisation the client already has
     return: OrganisationDBBase pydantic class containing all
-            the data pertaining to the organisation
+            the data pertaining to the organisation, or a 304 Not Modified response
+            if the client's copy is current
     """
     organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
-    organisation = organisation_crud.get(db=db, id=organisation_id)
-    if not organisation:
+    versioned = await organisation_crud.aget_versioned_dict(db=db, id=organisation_id)
+    if not versioned:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Organisation not found"
         )
-    return organisation
+    organisation, version = versioned
+    not_modified = conditional_response(response, if_none_match, version)
+    if not_modified:
+        return not_modified
+    return json_response(organisation, response)
+
+
+@router.get(
+    "/api/organisation/{organisation_id}/catalog",
+    response_model=List[CatalogProduct],
+    status_code=200,
+)
+async def get_organisation_catalog(
+    organisation_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    skip: int = Query(
+        default=0,
+        description="How many Products to skip before returning the remaining Products",
+        ge=0,
+    ),
+    limit: int = Query(
+        default=100,
+        description="Limit the number of Products displayed on each page",
+        ge=1,
+    ),
+    cursor: Optional[str] = Query(
+        default=None,
+        description=(
+            "Return the Products after this cursor. Taken from the "
+            f"{NEXT_CURSOR_HEADER} header of the previous page"
+        ),
+    ),
+) -> List[CatalogProduct]:
+    """
+    GET endpoint to retrieve the catalog of an Organisation: every Product it has
+    ordered, once, with the number of its Orders and their total volume per unit. The
+    catalog is maintained as Orders are written rather than computed from the Orders.
+
+    input params:
+        organisation_id: The ID of the Organisation whose catalog to retrieve
+        response: response to which the cursor of the next page is added
+        db: database session so that we can connect to our database
+        skip: How many Products to skip before returning the remaining Products
+        limit: Limit the number of Products displayed on each page
+        cursor: Return the Products after this cursor, see the X-Next-Cursor header
+    return: List of CatalogProduct pydantic class ordered by Product ID
+    """
+    organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
+    rows = await organisation_crud.aget_catalog(
+        db=db,
+        id=organisation_id,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(cursor) if cursor else None,
+    )
+    if rows is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Organisation not found"
+        )
+    set_next_cursor(response, rows, limit)
+    return [CatalogProduct.from_orm(row) for row in rows]
 
 
 @router.get(
-    "/api/organisation", response_model=List[OrganisationDBBase], status_code=200
+    "/api/organisation",
+    response_model=List[OrganisationDBBase],
+    response_class=ORJSONResponse,
+    status_code=200,
 )
 async def get_all_organisations(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(
         default=0,
         description=(
@@ -90,24 +213,40 @@ async def get_all_organisations(
         description="Limit the number of Organisations displayed on each page",
         ge=1,
     ),
-) -> List[Organisation]:
+    cursor: Optional[str] = Query(
+        default=None,
+        description=(
+            "Return the Organisations after this cursor. Taken from the "
+            f"{NEXT_CURSOR_HEADER} header of the previous page"
+        ),
+    ),
+) -> ORJSONResponse:
     """
-    GET endpoint to retrieve all Organisations from a Postgres database
+    GET endpoint to retrieve all Organisations from a Postgres database.
+    The Organisations are read as plain dictionaries and encoded with orjson.
 
     input params:
+        response: response to which the cursor of the next page is added
         db: database session so that we can connect to our database
         skip: How many Organisations to skip before returning the remaining Organisations
         limit: Limit the number of Organisations displayed on each page
+        cursor: Return the Organisations after this cursor, see the X-Next-Cursor header
     return: List of OrganisationDBBase pydantic class containing all the
             data pertaining to the order
     """
     organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
-    organisations = organisation_crud.get_multi(db=db, skip=skip, limit=limit)
+    organisations = await organisation_crud.aget_multi_dicts(
+        db=db,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(cursor) if cursor else None,
+    )
     if not organisations:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Organisations not found"
         )
-    return organisations
+    set_next_cursor(response, organisations, limit)
+    return json_response(organisations, response)
 
 
 # DELETE endpoints
@@ -118,7 +257,7 @@ async def get_all_organisations(
 )
 async def delete_organisation_by_id(
     organisation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> OrganisationDBBase:
     """
     DELETE endpoint to remove a organisation from a Postgres database
@@ -130,7 +269,7 @@ async def delete_organisation_by_id(
             the data pertaining to the organisation
     """
     organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
-    organisation = organisation_crud.remove(db=db, id=organisation_id)
+    organisation = await organisation_crud.aremove(db=db, id=organisation_id)
     if not organisation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="organisation not found"
@@ -147,7 +286,7 @@ async def delete_organisation_by_id(
 async def update_organisation_by_id(
     organisation_id: int,
     organisation_in: OrganisationUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> OrganisationDBBase:
     """
     PUT endpoint to update a organisation in a Postgres database
@@ -161,12 +300,12 @@ async def update_organisation_by_id(
             the data pertaining to the organisation
     """
     organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
-    db_organisation: Organisation | None = organisation_crud.get(
+    db_organisation: Organisation | None = await organisation_crud.aget(
         db=db, id=organisation_id
     )
 
     if db_organisation:
-        organisation = organisation_crud.update(
+        organisation = await organisation_crud.aupdate(
             db=db, db_obj=db_organisation, obj_in=organisation_in
         )
     else:
@@ -0,0 +1,58 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import Any, Sequence
+
+from fastapi import HTTPException, Response, status
+
+# Response header carrying the cursor of the next page of a list endpoint
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# IDs are compared as Postgres BIGINTs, larger ones can't come from a page
+MAX_CURSOR_ID = 2**63 - 1
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Encode the ID of the last record of a page into an opaque cursor.
+
+    input params:
+        last_id: ID of the last record returned
+    return: URL safe cursor string
+    """
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a cursor created by `encode_cursor` back into the ID of the last record seen.
+
+    input params:
+        cursor: Cursor string from the NEXT_CURSOR_HEADER of a previous page
+    return: ID of the last record seen
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(urlsafe_b64decode(padded))["id"]
+    except (ValueError, TypeError, KeyError):
+        last_id = None
+    # Not a bool, nor an ID the keyset query can't compare
+    if type(last_id) is not int or not 0 <= last_id <= MAX_CURSOR_ID:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor"
+        )
+    return last_id
+
+
+def set_next_cursor(response: Response, page: Sequence[Any], limit: int) -> None:
+    """
+    Add the cursor of the next page to the response headers when the page is full.
+
+    input params:
+        response: The response of the list endpoint
+        page: Records or dictionaries returned, ordered by ID
+        limit: Maximum number of records on a page
+    """
+    if page and len(page) == limit:
+        last = page[-1]
+        last_id = last["id"] if isinstance(last, dict) else last.id
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last_id)
@@ -1,16 +1,24 @@
-from logging import INFO, basicConfig, getLogger
-from typing import List
+from logging import getLogger
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.crud.product import CRUDProduct
 from src.database.models.product import Product
+from src.database.schemas.importer import ImportResult
 from src.database.schemas.product import ProductCreate, ProductDBBase, ProductUpdate
-from src.database.session import get_db
+from src.database.session import get_async_db
+from src.routers.etag import conditional_response, get_if_none_match
+from src.routers.export import NDJSON_MEDIA_TYPE, export_response
+from src.routers.idempotency import get_idempotency_key, idempotent_response
+from src.routers.importer import import_openapi_extra, import_upload
+from src.routers.pagination import NEXT_CURSOR_HEADER, decode_cursor, set_next_cursor
+from src.routers.responses import json_response
 
 logger = getLogger(__name__)
-basicConfig(level=INFO)
 
 router = APIRouter(
     tags=["products"], responses={404: {"description": "No products found, sorry!"}}
@@ -21,49 +29,124 @@ router = APIRouter(
 @router.post("/api/product", response_model=ProductDBBase, status_code=201)
 async def create_product(
     product_in: ProductCreate,
-    db: Session = Depends(get_db),
-) -> ProductDBBase:
+    db: AsyncSession = Depends(get_async_db),
+    idempotency_key: Optional[str] = Depends(get_idempotency_key),
+) -> Union[ProductDBBase, Response]:
     """
-    POST endpoint to persist a Product to a Postgres database
+    POST endpoint to persist a Product to a Postgres database.
+    A request retried with the same Idempotency-Key header and payload gets the stored
+    response back instead of creating the product again.
 
     input params:
         product_in: ProductCreate pydantic class containing all the data
                     pertaining to the product to be created
         db: database session so that we can connect to our database
+        idempotency_key: Key identifying the request across its retries, if any
 
     return: ProductDBBase pydantic class containing all the data pertaining to the product
     """
     product_crud = CRUDProduct(Product)  # type: ignore
 
-    return product_crud.create(db=db, obj_in=product_in)
+    return await idempotent_response(
+        idempotency_key,
+        "products",
+        product_in,
+        lambda: product_crud.acreate(db=db, obj_in=product_in),
+        ProductDBBase,
+    )
+
+
+@router.post(
+    "/api/product/import",
+    response_model=ImportResult,
+    status_code=201,
+    openapi_extra=import_openapi_extra("ProductCreate"),
+)
+async def import_products(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+) -> ImportResult:
+    """
+    POST endpoint to bulk import Products into a Postgres database using COPY.
+    The body is a CSV file with a header row (text/csv) or NDJSON
+    (application/x-ndjson), streamed into the database in batches as it arrives.
+    Existing products are skipped.
+
+    input params:
+        request: The request whose body holds the ProductCreate records
+        db: database session so that we can connect to our database
+    return: ImportResult pydantic class with the counts, rejected rows and throughput
+    """
+    return await import_upload(request, db, "products")
 
 
 # GET endpoints
-@router.get("/api/product/{product_id}", response_model=ProductDBBase, status_code=200)
+@router.get(
+    "/api/product/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+    status_code=200,
+)
+async def export_products(
+    db: AsyncSession = Depends(get_async_db),
+) -> StreamingResponse:
+    """
+    GET endpoint to export all Products from a Postgres database as newline-delimited JSON.
+    The Products are streamed from a single server-side cursor, one consistent snapshot,
+    with only one batch of Products held in memory at a time.
+
+    input params:
+        db: database session so that we can connect to our database
+    return: StreamingResponse with one ProductDBBase pydantic class per line
+    """
+    return export_response(db, CRUDProduct(Product))  # type: ignore
+
+
+@router.get(
+    "/api/product/{product_id}",
+    response_model=ProductDBBase,
+    response_class=ORJSONResponse,
+    status_code=200,
+)
 async def get_product_by_id(
     product_id: int,
-    db: Session = Depends(get_db),
-) -> ProductDBBase:
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    if_none_match: Optional[str] = Depends(get_if_none_match),
+) -> Response:
     """
     GET endpoint to retrieve a Product from a Postgres database
 
     input params:
         product_id: The ID of the product to retrieve
+        response: response to which the ETag of the product is added
         db: database session so that we can connect to our database
-    return: ProductDBBase pydantic class containing all the data pertaining to the product
+        if_none_match: ETags of the product the client already has
+    return: ProductDBBase pydantic class containing all the data pertaining to the product,
+            or a 304 Not Modified response if the client's copy is current
     """
     product_crud = CRUDProduct(Product)  # type: ignore
-    product = product_crud.get(db=db, id=product_id)
-    if not product:
+    versioned = await product_crud.aget_versioned_dict(db=db, id=product_id)
+    if not versioned:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
         )
-    return product
+    product, version = versioned
+    not_modified = conditional_response(response, if_none_match, version)
+    if not_modified:
+        return not_modified
+    return json_response(product, response)
 
 
-@router.get("/api/product", response_model=List[ProductDBBase], status_code=200)
+@router.get(
+    "/api/product",
+    response_model=List[ProductDBBase],
+    response_class=ORJSONResponse,
+    status_code=200,
+)
 async def get_all_products(
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     skip: int = Query(
         default=0,
         description=(
@@ -76,24 +159,54 @@ async def get_all_products(
         description="Limit the number of Products displayed on each page",
         ge=1,
     ),
-) -> List[Product]:
+    cursor: Optional[str] = Query(
+        default=None,
+        description=(
+            "Return the Products after this cursor. Taken from the "
+            f"{NEXT_CURSOR_HEADER} header of the previous page"
+        ),
+    ),
+    category: Optional[str] = Query(
+        default=None, description="Only return Products of this Category"
+    ),
+    variety: Optional[str] = Query(
+        default=None, description="Only return Products of this Variety"
+    ),
+    packaging: Optional[str] = Query(
+        default=None, description="Only return Products with this Packaging"
+    ),
+) -> ORJSONResponse:
     """
-    GET endpoint to retrieve all Products from a Postgres database
+    GET endpoint to retrieve all Products from a Postgres database, optionally filtered
+    by any combination of category, variety and packaging.
+    The Products are read as plain dictionaries and encoded with orjson.
 
     input params:
+        response: response to which the cursor of the next page is added
         db: database session so that we can connect to our database
         skip: How many Products to skip before returning the remaining Products
         limit: Limit the number of Products displayed on each page
+        cursor: Return the Products after this cursor, see the X-Next-Cursor header
+        category: Only return Products of this Category
+        variety: Only return Products of this Variety
+        packaging: Only return Products with this Packaging
     return: List of ProductDBBase pydantic class containing all the
             data pertaining to the product
     """
     product_crud = CRUDProduct(Product)  # type: ignore
-    products = product_crud.get_multi(db=db, skip=skip, limit=limit)
+    products = await product_crud.aget_multi_dicts(
+        db=db,
+        skip=skip,
+        limit=limit,
+        after=decode_cursor(cursor) if cursor else None,
+        filters=product_crud.filters(category, variety, packaging),
+    )
     if not products:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Products not found"
         )
-    return products
+    set_next_cursor(response, products, limit)
+    return json_response(products, response)
 
 
 # DELETE endpoints
@@ -102,7 +215,7 @@ async def get_all_products(
 )
 async def delete_product_by_id(
     product_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> ProductDBBase:
     """
     DELETE endpoint to remove a Product from a Postgres database
@@ -113,7 +226,14 @@ async def delete_product_by_id(
     return: ProductDBBase pydantic class containing all the data pertaining to the product
     """
     product_crud = CRUDProduct(Product)  # type: ignore
-    product = product_crud.remove(db=db, id=product_id)
+    try:
+        product = await product_crud.aremove(db=db, id=product_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Product is part of existing orders",
+        )
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
@@ -126,7 +246,7 @@ async def delete_product_by_id(
 async def update_product_by_id(
     product_id: int,
     product_in: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ) -> ProductDBBase:
     """
     PUT endpoint to update a Product in a Postgres database
@@ -139,10 +259,12 @@ async def update_product_by_id(
     return: ProductDBBase pydantic class containing all the data pertaining to the product
     """
     product_crud = CRUDProduct(Product)  # type: ignore
-    db_product: Product | None = product_crud.get(db=db, id=product_id)
+    db_product: Product | None = await product_crud.aget(db=db, id=product_id)
 
     if db_product:
-        product = product_crud.update(db=db, db_obj=db_product, obj_in=product_in)
+        product = await product_crud.aupdate(
+            db=db, db_obj=db_product, obj_in=product_in
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Product not found"
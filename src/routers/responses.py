@@ -0,0 +1,27 @@
+from time import perf_counter
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+
+from src.database.profiling import get_request_profile
+
+
+def json_response(content: Any, response: Response) -> ORJSONResponse:
+    """
+    Encode the records of a read endpoint with orjson, bypassing the validation and
+    serialisation FastAPI otherwise applies to every record through the endpoint's
+    response_model. The records must already be shaped as that response_model, e.g.
+    built by `CRUDBase.get_dict` or `CRUDBase.get_multi_dicts`.
+
+    input params:
+        content: The dictionary or list of dictionaries to return
+        response: response whose headers (e.g. the ETag or next cursor) are kept
+    return: ORJSONResponse of the content
+    """
+    start = perf_counter()
+    json = ORJSONResponse(content, headers=dict(response.headers))
+    profile = get_request_profile()
+    if profile is not None:
+        profile.serialize_seconds += perf_counter() - start
+    return json
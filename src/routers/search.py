@@ -0,0 +1,64 @@
+from logging import getLogger
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.crud.organisation import CRUDOrganisation
+from src.database.crud.product import CRUDProduct
+from src.database.models.organisation import Organisation
+from src.database.models.product import Product
+from src.database.schemas.search import (
+    OrganisationSearchResult,
+    ProductSearchResult,
+    SearchResults,
+)
+from src.database.session import get_async_db
+
+logger = getLogger(__name__)
+
+router = APIRouter(tags=["search"])
+
+MAX_SEARCH_RESULTS = 50
+
+
+# GET endpoints
+@router.get("/api/search", response_model=SearchResults, status_code=200)
+async def search(
+    db: AsyncSession = Depends(get_async_db),
+    q: str = Query(
+        description="Text typed so far, matched against Organisation names and "
+        "Product categories and varieties",
+        min_length=1,
+        max_length=100,
+    ),
+    limit: int = Query(
+        default=10,
+        description="Maximum number of Organisations and of Products to return",
+        ge=1,
+        le=MAX_SEARCH_RESULTS,
+    ),
+) -> SearchResults:
+    """
+    GET endpoint for type-ahead search over Organisations and Products.
+    Names, categories and varieties starting with the text (ignoring case) rank first,
+    followed by fuzzy matches ranked by trigram similarity, e.g. "mangos" finds "Mango".
+
+    input params:
+        db: database session so that we can connect to our database
+        q: Text typed so far
+        limit: Maximum number of Organisations and of Products to return
+    return: SearchResults pydantic class with the best matching Organisations and
+            Products, best match first
+    """
+    organisation_crud = CRUDOrganisation(Organisation)  # type: ignore
+    product_crud = CRUDProduct(Product)  # type: ignore
+    return SearchResults(
+        organisations=[
+            OrganisationSearchResult.from_orm(row)
+            for row in await organisation_crud.asearch(db=db, text=q, limit=limit)
+        ],
+        products=[
+            ProductSearchResult.from_orm(row)
+            for row in await product_crud.asearch(db=db, text=q, limit=limit)
+        ],
+    )
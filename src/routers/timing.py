@@ -0,0 +1,162 @@
+from asyncio import iscoroutinefunction
+from functools import wraps
+from logging import getLogger
+from time import perf_counter
+from typing import Any, Callable, Optional
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.config import get_settings
+from src.database.profiling import (
+    RequestProfile,
+    get_request_profile,
+    instrument_engines,
+    start_request_profile,
+)
+
+logger = getLogger(__name__)
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+# Characters of each statement logged for a slow request
+MAX_STATEMENT_LENGTH = 1000
+
+
+def server_timing(profile: RequestProfile, now: float) -> str:
+    """
+    Server-Timing header value of a request profile, with durations in milliseconds.
+
+    input params:
+        profile: The profile of the request
+        now: perf_counter() time at which the response starts
+    return: e.g. db;dur=1.2;desc="3 queries", orm;dur=0.8, serialize;dur=0.3, total;...
+    """
+    handler_end = profile.handler_end if profile.handler_end is not None else now
+    serialize = profile.serialize_seconds + now - handler_end
+    # Routing, dependencies and endpoint code minus its queries and encoding
+    orm = max(handler_end - profile.start - profile.db_seconds - serialize, 0.0)
+    return (
+        f'db;dur={profile.db_seconds * 1000:.1f};desc="{profile.queries} queries", '
+        f"orm;dur={orm * 1000:.1f}, "
+        f"serialize;dur={serialize * 1000:.1f}, "
+        f"total;dur={(now - profile.start) * 1000:.1f}"
+    )
+
+
+def time_endpoints(app: FastAPI) -> None:
+    """
+    Wrap the endpoint functions of the app's routes to record in the request profile
+    when the endpoint returns, so the Server-Timing header can tell the endpoint's
+    work apart from the response serialisation FastAPI does after it.
+    Must be called once every router is included.
+
+    input params:
+        app: The FastAPI application
+    """
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        call = route.dependant.call
+        assert call is not None
+        # The request handler already decided whether to await the endpoint
+        if iscoroutinefunction(call):
+            route.dependant.call = _timed_async(call)
+        else:
+            route.dependant.call = _timed_sync(call)
+
+
+def _timed_async(call: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(call)
+    async def timed(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return await call(*args, **kwargs)
+        finally:
+            _end_handler()
+
+    return timed
+
+
+def _timed_sync(call: Callable[..., Any]) -> Callable[..., Any]:
+    @wraps(call)
+    def timed(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return call(*args, **kwargs)
+        finally:
+            _end_handler()
+
+    return timed
+
+
+def _end_handler() -> None:
+    profile = get_request_profile()
+    if profile is not None:
+        profile.handler_end = perf_counter()
+
+
+class ServerTimingMiddleware:
+    """
+    Profile every HTTP request: count its queries and time them, the endpoint and the
+    serialisation of its response. The timings are returned in a Server-Timing header
+    and requests slower than `slow_request_seconds` are logged with their statements.
+    """
+
+    def __init__(self, app: ASGIApp, slow_request_seconds: Optional[float] = None):
+        self.app = app
+        if slow_request_seconds is None:
+            slow_request_seconds = get_settings().slow_request_seconds
+        self.slow_request_seconds = slow_request_seconds
+        instrument_engines()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = start_request_profile()
+        status_code: Optional[int] = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    SERVER_TIMING_HEADER, server_timing(profile, perf_counter())
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            seconds = perf_counter() - profile.start
+            if seconds > self.slow_request_seconds:
+                self._log_slow_request(scope, status_code, profile, seconds)
+
+    @staticmethod
+    def _log_slow_request(
+        scope: Scope,
+        status_code: Optional[int],
+        profile: RequestProfile,
+        seconds: float,
+    ) -> None:
+        statements = "".join(
+            f"\n  {statement_seconds * 1000:.1f} ms: "
+            f"{' '.join(statement.split())[:MAX_STATEMENT_LENGTH]}"
+            for statement, statement_seconds in profile.statements
+        )
+        omitted = profile.queries - len(profile.statements)
+        if omitted:
+            statements += f"\n  ... {omitted} more"
+        logger.warning(
+            "Slow request %s %s (%s) took %.3fs, %d queries in %.3fs:%s",
+            scope["method"],
+            scope["path"],
+            status_code,
+            seconds,
+            profile.queries,
+            profile.db_seconds,
+            statements,
+        )
@@ -3,12 +3,14 @@ from typing import Generator
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
+from tests.helpers import QueryCounter
 
 from src.config import Settings, get_settings
 from src.database.models.base import Base
-from src.database.session import get_db
+from src.database.session import get_async_database_url, get_async_db, get_db
 from src.main import get_app
 
 
@@ -19,6 +21,34 @@ def get_settings_override():
     return Settings(testing=1, database_url=os.environ.get("DATABASE_TEST_URL"))
 
 
+async def _open_test_async_db() -> AsyncSession:
+    """
+    Open an async session inside an outer transaction that is rolled back on close.
+    Must be awaited on the event loop that will run the requests.
+    """
+    test_settings = get_settings_override()
+    test_async_engine = create_async_engine(
+        get_async_database_url(test_settings.database_url)
+    )
+    connection = await test_async_engine.connect()
+    await connection.begin()
+    return AsyncSession(
+        bind=connection,
+        autoflush=False,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint",
+    )
+
+
+async def _close_test_async_db(test_async_db: AsyncSession) -> None:
+    connection = test_async_db.bind
+    assert isinstance(connection, AsyncConnection)
+    await test_async_db.close()
+    await connection.rollback()
+    await connection.close()
+    await connection.engine.dispose()
+
+
 @pytest.fixture(scope="module")
 def test_app() -> Generator[TestClient, TestClient, None]:
     """
@@ -43,6 +73,9 @@ def test_db() -> Generator[Session, Session, None]:
     connection = test_engine.connect()
     transaction = connection.begin()
     test_session = test_session_local(bind=connection)
+    with test_engine.begin() as extension_connection:
+        # The search indexes use pg_trgm's operator classes
+        extension_connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     Base.metadata.create_all(bind=test_engine)
     yield test_session
     test_session.close()
@@ -68,4 +101,26 @@ def test_app_with_db(test_db: Session) -> Generator[TestClient, TestClient, None
     app.dependency_overrides[get_db] = _get_test_db
 
     with TestClient(app) as test_client:
+        # The async session is bound to the event loop of the client's portal
+        test_async_db = test_client.portal.call(_open_test_async_db)
+
+        async def _get_test_async_db():
+            try:
+                yield test_async_db
+            finally:
+                pass
+
+        app.dependency_overrides[get_async_db] = _get_test_async_db
+
         yield test_client
+
+        test_client.portal.call(_close_test_async_db, test_async_db)
+
+
+@pytest.fixture
+def count_queries() -> QueryCounter:
+    """
+    Counter of the statements sent to the database, e.g.
+    `with count_queries: client.get(...)` then `count_queries.count`.
+    """
+    return QueryCounter()
@@ -1,5 +1,11 @@
 import random
 import string
+from typing import Any, List
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
 
 
 def get_random_string(length: int = 10) -> str:
@@ -14,3 +20,31 @@ def get_random_string(length: int = 10) -> str:
     # choose from all lowercase letter
     letters = string.ascii_lowercase
     return "".join(random.choice(letters) for i in range(length))
+
+
+class QueryCounter:
+    """
+    Record the statements every engine sends to the database while in the context,
+    leaving out the savepoints the test sessions wrap their transactions in.
+    """
+
+    def __init__(self) -> None:
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(
+        self, conn: Connection, cursor: Any, statement: str, *args: Any
+    ) -> None:
+        if not statement.startswith(SAVEPOINT_STATEMENTS):
+            self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        event.listen(Engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        event.remove(Engine, "before_cursor_execute", self._record)
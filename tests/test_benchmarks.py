@@ -0,0 +1,115 @@
+import asyncio
+from pathlib import Path
+from typing import Any, Dict
+
+import httpx
+from benchmarks.data import Dataset
+from benchmarks.load import LoadGenerator, load_collection, route_of
+from benchmarks.stats import percentile, summarise
+
+COLLECTION = str(
+    Path(__file__).parents[1] / "Products_and_Supplies_API.postman_collection.json"
+)
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(value) for value in range(1, 1001)]
+
+    assert percentile(values, 50) == 500.0
+    assert percentile(values, 99) == 990.0
+    assert percentile(values, 99.9) == 999.0
+    assert percentile(values, 100) == 1000.0
+    assert percentile(values, 0) == 1.0
+    assert percentile([], 50) == 0.0
+
+
+def test_summarise_in_milliseconds() -> None:
+    summary = summarise([0.001, 0.002, 0.003, 0.004], percentiles=(50, 99.9))
+
+    assert summary == {
+        "mean_ms": 2.5,
+        "p50_ms": 2.0,
+        "p99.9_ms": 4.0,
+        "max_ms": 4.0,
+    }
+
+
+def test_dataset_is_reproducible() -> None:
+    dataset = Dataset(500, seed=1)
+
+    orders = list(dataset.iter_orders())
+    assert orders == list(Dataset(500, seed=1).iter_orders())
+    assert orders != list(Dataset(500, seed=2).iter_orders())
+    assert list(dataset.iter_products()) == list(Dataset(500, seed=1).iter_products())
+
+
+def test_dataset_rows_are_consistent() -> None:
+    dataset = Dataset(500)
+    products = list(dataset.iter_products())
+    organisations = list(dataset.iter_organisations())
+
+    assert len(products) == dataset.products
+    assert len({product[1:] for product in products}) == len(products)
+    assert len(organisations) == dataset.organisations
+    for (id, _, references, organisation_id), lines in dataset.iter_orders():
+        assert references is None or references < id
+        assert 1 <= organisation_id <= dataset.organisations
+        assert lines
+        assert [line[1] for line in lines] == list(range(len(lines)))
+        assert len({line[2] for line in lines}) == len(lines)
+        assert all(1 <= line[2] <= dataset.products for line in lines)
+
+
+def test_route_of_templates_ids() -> None:
+    assert route_of("GET", "/api/product/33") == "GET /api/product/{id}"
+    assert route_of("GET", "/api/order/6/chain?x=1") == "GET /api/order/{id}/chain"
+    assert route_of("GET", "/api/product?skip=0&limit=10") == "GET /api/product"
+
+
+def test_load_collection() -> None:
+    requests = load_collection(COLLECTION)
+    by_name = {request.name: request for request in requests}
+
+    assert len(requests) == 15
+    get_many = by_name["Products/Get many Products"]
+    assert (get_many.method, get_many.url) == ("GET", "/api/product?skip=0&limit=10")
+    # Saved with quotes around the URL
+    assert by_name["Products/Update a Product by ID"].url == "/api/product/33"
+    create = by_name["Orders/Create new Order"]
+    assert create.route == "POST /api/order"
+    assert create.headers["Content-Type"] == "application/json"
+    assert create.body is not None and b'"Type": "SELL"' in create.body
+
+
+def test_load_generator_records_every_route() -> None:
+    requests = load_collection(COLLECTION)
+    for request in requests:
+        request.weight = 1.0 if request.method == "GET" else 0.0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = 404 if request.url.path.startswith("/api/order/") else 200
+        return httpx.Response(status, json={})
+
+    async def run() -> Dict[str, Any]:
+        transport = httpx.MockTransport(handler)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://app"
+        ) as client:
+            generator = LoadGenerator(client, requests)
+            seconds = await generator.closed_loop(concurrency=4, duration=10, limit=200)
+            return generator.report(seconds)
+
+    report = asyncio.run(run())
+
+    assert report["total"]["requests"] == 200
+    assert set(report["routes"]) == {
+        "GET /api/product",
+        "GET /api/product/{id}",
+        "GET /api/organisation",
+        "GET /api/organisation/{id}",
+        "GET /api/order",
+        "GET /api/order/{id}",
+    }
+    assert report["routes"]["GET /api/order/{id}"]["error_rate"] == 1.0
+    assert report["routes"]["GET /api/product"]["errors"] == 0
+    assert "p99.9_ms" in report["total"]["latency"]
@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.database import cache as cache_module
+from src.database.cache import (
+    CacheBackend,
+    InMemoryCache,
+    evict_on_commit,
+    get_cache,
+    get_cache_statuses,
+    set_cache_factory,
+)
+
+
+def test_in_memory_cache_evicts_least_recently_used() -> None:
+    cache = InMemoryCache(max_size=2, ttl=60)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    assert cache.get(1) == "one"
+    cache.set(3, "three")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "one"
+    assert cache.get(3) == "three"
+
+    status = cache.status()
+    assert status.size == 2
+    assert status.hits == 3
+    assert status.misses == 1
+    assert status.evictions == 1
+
+
+def test_in_memory_cache_entries_expire() -> None:
+    cache = InMemoryCache(max_size=10, ttl=5)
+    with patch("src.database.cache.monotonic", return_value=100.0):
+        cache.set(1, "one")
+    with patch("src.database.cache.monotonic", return_value=104.0):
+        assert cache.get(1) == "one"
+    with patch("src.database.cache.monotonic", return_value=105.0):
+        assert cache.get(1) is None
+
+    status = cache.status()
+    assert status.size == 0
+    assert status.expirations == 1
+    assert status.misses == 1
+
+
+def test_in_memory_cache_delete_and_clear() -> None:
+    cache = InMemoryCache(max_size=10, ttl=60)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.delete(1)
+    cache.delete(1)
+    assert cache.get(1) is None
+    assert cache.get(2) == "two"
+    cache.clear()
+    assert cache.get(2) is None
+
+
+def test_in_memory_cache_disabled_with_zero_size() -> None:
+    cache = InMemoryCache(max_size=0, ttl=60)
+    cache.set(1, "one")
+    assert cache.get(1) is None
+    assert cache.status().size == 0
+
+
+def test_set_cache_factory_replaces_backend() -> None:
+    created = []
+    default_factory = cache_module._cache_factory
+
+    def _factory(namespace: str) -> CacheBackend:
+        created.append(namespace)
+        return InMemoryCache(max_size=1, ttl=1)
+
+    try:
+        set_cache_factory(_factory)
+        cache = get_cache("test namespace")
+        assert get_cache("test namespace") is cache
+        assert created == ["test namespace"]
+        assert get_cache_statuses()["test namespace"].max_size == 1
+    finally:
+        set_cache_factory(default_factory)
+
+
+def test_evict_on_commit_evicts_again_once_committed() -> None:
+    cache = InMemoryCache(max_size=10, ttl=60)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    with Session(create_engine("sqlite://")) as db:
+        db.execute(text("SELECT 1"))
+        evict_on_commit(db, cache, 1)
+        assert cache.get(1) is None
+        # A concurrent request caches the record as last committed
+        cache.set(1, "stale")
+        db.commit()
+
+        assert cache.get(1) is None
+        assert cache.get(2) == "two"
+
+        db.execute(text("SELECT 1"))
+        evict_on_commit(db, cache)
+        cache.set(1, "current")
+        db.rollback()
+
+    # Nothing was written
+    assert cache.get(1) == "current"
@@ -1,6 +1,8 @@
-from typing import List
+from decimal import Decimal
+from typing import Any, List
 
 import pytest
+from sqlalchemy import event, select, text
 from sqlalchemy.orm import Session
 from tests.helpers import get_random_string
 
@@ -11,9 +13,18 @@ from src.database.models.base import OrderTypeEnum, OrganisationTypeEnum
 from src.database.models.order import Order
 from src.database.models.organisation import Organisation
 from src.database.models.product import Product
-from src.database.schemas.order import OrderCreate, OrderUpdate, ProductOrderType
-from src.database.schemas.organisation import OrganisationCreate, OrganisationUpdate
-from src.database.schemas.product import ProductCreate, ProductUpdate
+from src.database.schemas.order import (
+    OrderCreate,
+    OrderDBBase,
+    OrderUpdate,
+    ProductOrderType,
+)
+from src.database.schemas.organisation import (
+    OrganisationCreate,
+    OrganisationDBBase,
+    OrganisationUpdate,
+)
+from src.database.schemas.product import ProductCreate, ProductDBBase, ProductUpdate
 
 
 @pytest.fixture()
@@ -145,6 +156,20 @@ def test_read_many_products(
     assert product_get_many[-1].Packaging == test_product_three.Packaging
 
 
+def test_read_many_products_after_id(
+    test_db: Session, test_product_two: ProductCreate, test_product_three: ProductCreate
+) -> None:
+    product_crud = CRUDProduct(Product)
+    product_created2 = product_crud.create(db=test_db, obj_in=test_product_two)
+    product_created3 = product_crud.create(db=test_db, obj_in=test_product_three)
+    product_get_many = product_crud.get_multi(
+        db=test_db, limit=1, after=product_created2.id
+    )
+    assert len(product_get_many) == 1
+    assert product_get_many[0].id == product_created3.id
+    assert product_crud.get_multi(db=test_db, after=product_created3.id) is None
+
+
 def test_update_product(test_db: Session, test_product_one: ProductCreate) -> None:
     product_crud = CRUDProduct(Product)
     product_created = product_crud.create(db=test_db, obj_in=test_product_one)
@@ -172,6 +197,23 @@ def test_delete_product(test_db: Session, test_product_three: ProductCreate) ->
     assert product_get is None
 
 
+def test_create_many_products_if_missing(
+    test_db: Session, test_product_one: ProductCreate, test_product_two: ProductCreate
+) -> None:
+    product_crud = CRUDProduct(Product)
+    product_existing = product_crud.create(db=test_db, obj_in=test_product_one)
+    product_ids_created = product_crud.create_many_if_missing(
+        db=test_db,
+        objs_in=[test_product_two, test_product_one, test_product_two],
+    )
+    assert len(product_ids_created) == 1
+    assert product_ids_created[0] != product_existing.id
+
+    product_get = product_crud.get(db=test_db, id=product_ids_created[0])
+    assert product_get.Variety == test_product_two.Variety
+    assert product_crud.create_many_if_missing(db=test_db, objs_in=[]) == []
+
+
 # TEST ORGANISATION CRUD
 
 
@@ -406,6 +448,49 @@ def test_create_order_with_references(
     assert product_get_second_product.id == product_ids_created[1]
 
 
+def test_create_order_with_repeated_products(
+    test_db: Session,
+    test_product_one: ProductCreate,
+) -> None:
+    # Create organisation
+    organisation_one = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.SELLER
+    )
+    organisation_crud = CRUDOrganisation(Organisation)
+    organisation_created = organisation_crud.create(db=test_db, obj_in=organisation_one)
+
+    # One product already registered, one new product listed on two lines
+    product_crud = CRUDProduct(Product)
+    product_existing = product_crud.create(db=test_db, obj_in=test_product_one)
+    new_variety = get_random_string()
+    product_list = [
+        ProductOrderType(
+            Category=test_product_one.Category,
+            Variety=variety,
+            Packaging=test_product_one.Packaging,
+            Volume=get_random_string(),
+            Price_per_unit="test price per unit 1",
+        )
+        for variety in (new_variety, test_product_one.Variety, new_variety)
+    ]
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=product_list,
+        Organisation_id=organisation_created.id,
+    )
+    order_crud = CRUDOrder(Order)
+    order_created, product_ids_created = order_crud.create_new_order(
+        db=test_db, obj_in=order_in
+    )
+    assert order_created.id is not None
+    assert len(order_created.Products) == 3
+    assert len(product_ids_created) == 1
+    assert product_ids_created[0] != product_existing.id
+
+    product_get = product_crud.get(db=test_db, id=product_ids_created[0])
+    assert product_get.Variety == new_variety
+
+
 def test_read_order(test_db: Session, test_product_one: ProductCreate) -> None:
     # Create organisation
     organisation_one = OrganisationCreate(
@@ -491,6 +576,46 @@ def test_update_order(test_db: Session, test_product_one: ProductCreate) -> None
     assert order_updated.References == order_created.References
 
 
+def test_order_lines_parse_amounts(
+    test_db: Session, test_product_one: ProductCreate
+) -> None:
+    # Create organisation
+    organisation_one = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_crud = CRUDOrganisation(Organisation)
+    organisation_created = organisation_crud.create(db=test_db, obj_in=organisation_one)
+
+    # Create order
+    product_list = [
+        ProductOrderType(
+            **test_product_one.dict(), Volume=volume, Price_per_unit=price_per_unit
+        )
+        for volume, price_per_unit in (("1.5 ton", "1000 $/kg"), ("lots", ".5"))
+    ]
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=product_list,
+        Organisation_id=organisation_created.id,
+    )
+    order_crud = CRUDOrder(Order)
+    order_created, product_ids_created = order_crud.create_new_order(
+        db=test_db, obj_in=order_in
+    )
+    assert len(product_ids_created) == 1
+    assert order_created.Products == [product.dict() for product in product_list]
+
+    lines = order_created.Lines
+    assert [line.Line_number for line in lines] == [0, 1]
+    assert {line.Product_id for line in lines} == set(product_ids_created)
+    assert lines[0].Volume_amount == Decimal("1.5")
+    assert lines[0].Price_per_unit_amount == Decimal("1000")
+    assert lines[1].Volume_amount is None
+    assert lines[1].Price_per_unit_amount == Decimal(".5")
+    assert (lines[0].Volume_unit, lines[0].Price_per_unit_unit) == ("ton", "$/kg")
+    assert (lines[1].Volume_unit, lines[1].Price_per_unit_unit) == (None, "")
+
+
 def test_delete_order(test_db: Session, test_product_one: ProductCreate) -> None:
     # Create organisation
     organisation_one = OrganisationCreate(
@@ -609,3 +734,529 @@ def test_creation_all_types(
 
     assert organisation_products[0]["Category"] == product_list_two[0].Category
     assert organisation_products[-1]["Category"] == product_list_one[0].Category
+
+
+def test_create_many_orders(
+    test_db: Session,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    # Create organisation
+    organisation_one = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_crud = CRUDOrganisation(Organisation)
+    organisation_created = organisation_crud.create(db=test_db, obj_in=organisation_one)
+
+    orders_in = [
+        OrderCreate(
+            Type=order_type,
+            Products=test_product_order_type_list_of_two,
+            Organisation_id=organisation_created.id,
+        )
+        for order_type in (OrderTypeEnum.SELL, OrderTypeEnum.BUY, OrderTypeEnum.SELL)
+    ]
+    order_crud = CRUDOrder(Order)
+    order_ids_created, product_ids_created = order_crud.create_many_orders(
+        db=test_db, objs_in=orders_in
+    )
+    assert len(order_ids_created) == 3
+    assert order_ids_created == sorted(order_ids_created)
+    assert len(product_ids_created) == 2
+
+    orders_get = order_crud.get_many_by_ids(db=test_db, ids=order_ids_created)
+    assert [order.id for order in orders_get] == order_ids_created
+    assert [order.Type for order in orders_get] == [
+        order_in.Type for order_in in orders_in
+    ]
+    assert orders_get[0].Products[1]["Variety"] == (
+        test_product_order_type_list_of_two[1].Variety
+    )
+    assert organisation_crud.get_existing_ids(
+        db=test_db, ids=[organisation_created.id, 15641875975986]
+    ) == {organisation_created.id}
+
+
+def test_read_many_organisations_with_orders_in_constant_queries(
+    test_db: Session,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    organisation_crud = CRUDOrganisation(Organisation)
+    order_crud = CRUDOrder(Order)
+    organisations_created = []
+    for _ in range(3):
+        organisation_created = organisation_crud.create(
+            db=test_db,
+            obj_in=OrganisationCreate(
+                Name=get_random_string(), Type=OrganisationTypeEnum.SELLER
+            ),
+        )
+        organisations_created.append(organisation_created.id)
+        for order_type in (OrderTypeEnum.SELL, OrderTypeEnum.BUY):
+            order_crud.create_new_order(
+                db=test_db,
+                obj_in=OrderCreate(
+                    Type=order_type,
+                    Products=test_product_order_type_list_of_two,
+                    Organisation_id=organisation_created.id,
+                ),
+            )
+    test_db.expire_all()
+
+    statements = []
+
+    def _count_statement(*args: Any) -> None:
+        statements.append(args[2])
+
+    connection = test_db.connection()
+    event.listen(connection, "before_cursor_execute", _count_statement)
+    try:
+        organisations_read = organisation_crud.get_many_by_ids(
+            db=test_db, ids=organisations_created
+        )
+        orders = [organisation.Orders for organisation in organisations_read]
+    finally:
+        event.remove(connection, "before_cursor_execute", _count_statement)
+
+    # Organisations, their Orders and the order lines, the deferred Products aggregate
+    # is left out
+    assert len(statements) == 3
+    assert not any("json_agg" in statement for statement in statements)
+    products = [
+        organisation["Products"]
+        for organisation in organisation_crud.get_multi_dicts(
+            db=test_db, filters=[Organisation.id.in_(organisations_created)]
+        )
+    ]
+    expected_products = [
+        product.dict() for product in test_product_order_type_list_of_two
+    ]
+    for organisation_products, organisation_orders in zip(products, orders):
+        assert len(organisation_orders) == 2
+        assert organisation_products == expected_products * 2
+        assert organisation_products == [
+            product for order in organisation_orders for product in order.Products
+        ]
+
+
+def test_read_through_cache_invalidation(
+    test_db: Session,
+    test_product_one: ProductCreate,
+    test_product_order_type_list_of_one: List[ProductOrderType],
+) -> None:
+    # Create organisation and cache it
+    organisation_crud = CRUDOrganisation(Organisation)
+    organisation_created = organisation_crud.create(
+        db=test_db,
+        obj_in=OrganisationCreate(
+            Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+        ),
+    )
+    organisation_crud.cache.delete(organisation_created.id)
+    hits = organisation_crud.cache.hits
+    assert organisation_crud.get_dict(db=test_db, id=organisation_created.id)
+    assert organisation_crud.cache.hits == hits
+
+    statements = []
+
+    def _count_statement(*args: Any) -> None:
+        statements.append(args[2])
+
+    connection = test_db.connection()
+    event.listen(connection, "before_cursor_execute", _count_statement)
+    try:
+        organisation_get = organisation_crud.get_dict(
+            db=test_db, id=organisation_created.id
+        )
+    finally:
+        event.remove(connection, "before_cursor_execute", _count_statement)
+    assert statements == []
+    assert organisation_crud.cache.hits == hits + 1
+    assert organisation_get is not None
+    assert organisation_get["id"] == organisation_created.id
+    assert organisation_get["Orders"] == []
+
+    # Creating an order evicts its organisation
+    order_crud = CRUDOrder(Order)
+    order_created, _ = order_crud.create_new_order(
+        db=test_db,
+        obj_in=OrderCreate(
+            Type=OrderTypeEnum.BUY,
+            Products=test_product_order_type_list_of_one,
+            Organisation_id=organisation_created.id,
+        ),
+    )
+    organisation_get = organisation_crud.get_dict(
+        db=test_db, id=organisation_created.id
+    )
+    assert organisation_get is not None
+    assert [order["id"] for order in organisation_get["Orders"]] == [order_created.id]
+    assert organisation_crud.cache.hits == hits + 1
+
+    # Updating a product evicts the orders and organisations listing it
+    assert order_crud.get_dict(db=test_db, id=order_created.id)
+    product_crud = CRUDProduct(Product)
+    product = product_crud.get_many_by_variety(
+        db=test_db, variety=test_product_order_type_list_of_one[0].Variety
+    )[0]
+    product_crud.update(
+        db=test_db, db_obj=product, obj_in=ProductUpdate(Packaging="test packaging 2")
+    )
+    assert order_crud.cache.get(order_created.id) is None
+    assert organisation_crud.cache.get(organisation_created.id) is None
+    order_get = order_crud.get_dict(db=test_db, id=order_created.id)
+    assert order_get is not None
+    assert order_get["Products"][0]["Packaging"] == "test packaging 2"
+
+    # Updating and removing records evicts them
+    organisation_crud.update(
+        db=test_db,
+        db_obj=organisation_created,
+        obj_in=OrganisationUpdate(Type=OrganisationTypeEnum.SELLER),
+    )
+    organisation_get = organisation_crud.get_dict(
+        db=test_db, id=organisation_created.id
+    )
+    assert organisation_get is not None
+    assert organisation_get["Type"] == OrganisationTypeEnum.SELLER
+    order_crud.remove(db=test_db, id=order_created.id)
+    assert order_crud.get_dict(db=test_db, id=order_created.id) is None
+    organisation_get = organisation_crud.get_dict(
+        db=test_db, id=organisation_created.id
+    )
+    assert organisation_get is not None
+    assert organisation_get["Orders"] == []
+
+
+def test_read_order_chains_in_one_query(
+    test_db: Session,
+    test_product_order_type_list_of_one: List[ProductOrderType],
+) -> None:
+    organisation_crud = CRUDOrganisation(Organisation)
+    organisation_created = organisation_crud.create(
+        db=test_db,
+        obj_in=OrganisationCreate(
+            Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+        ),
+    )
+    order_crud = CRUDOrder(Order)
+
+    # root <- first <- second, and root <- branch
+    order_ids: List[int] = []
+    for reference in (None, 0, 1, 0):
+        order_created, _ = order_crud.create_new_order(
+            db=test_db,
+            obj_in=OrderCreate(
+                Type=OrderTypeEnum.BUY,
+                References=None if reference is None else order_ids[reference],
+                Products=test_product_order_type_list_of_one,
+                Organisation_id=organisation_created.id,
+            ),
+        )
+        order_ids.append(order_created.id)
+    root, first, second, branch = order_ids
+
+    statements = []
+
+    def _count_statement(*args: Any) -> None:
+        statements.append(args[2])
+
+    connection = test_db.connection()
+    event.listen(connection, "before_cursor_execute", _count_statement)
+    try:
+        chains = order_crud.get_chains(db=test_db, ids=[first, root, 15641875975986])
+    finally:
+        event.remove(connection, "before_cursor_execute", _count_statement)
+    # The recursive query and the order lines of every order in the chains
+    assert len(statements) == 2
+
+    assert [(order.id, depth) for order, depth in chains[first]] == [
+        (root, -1),
+        (first, 0),
+        (second, 1),
+    ]
+    assert [(order.id, depth) for order, depth in chains[root]] == [
+        (root, 0),
+        (first, 1),
+        (branch, 1),
+        (second, 2),
+    ]
+    assert 15641875975986 not in chains
+
+    ancestors = order_crud.get_chains(db=test_db, ids=[second], descendants=False)
+    assert [(order.id, depth) for order, depth in ancestors[second]] == [
+        (root, -2),
+        (first, -1),
+        (second, 0),
+    ]
+
+    # A reference cycle ends the chain instead of recursing forever
+    order_crud.update(
+        db=test_db,
+        db_obj=order_crud.get(db=test_db, id=root),
+        obj_in={"References": second},
+    )
+    chains = order_crud.get_chains(db=test_db, ids=[root])
+    assert sorted(order.id for order, _ in chains[root]) == sorted(order_ids)
+
+
+def test_read_reference_products_up_to_the_nearest_order_with_products(
+    test_db: Session,
+    test_product_order_type_list_of_one: List[ProductOrderType],
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    organisation_crud = CRUDOrganisation(Organisation)
+    organisation_created = organisation_crud.create(
+        db=test_db,
+        obj_in=OrganisationCreate(
+            Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+        ),
+    )
+    order_crud = CRUDOrder(Order)
+
+    # oldest <- nearest <- middle <- leaf, only oldest and nearest have products
+    order_ids: List[int] = []
+    for products in (
+        test_product_order_type_list_of_one,
+        test_product_order_type_list_of_two,
+        None,
+        None,
+    ):
+        order_created, _ = order_crud.create_new_order(
+            db=test_db,
+            obj_in=OrderCreate(
+                Type=OrderTypeEnum.BUY,
+                References=order_ids[-1] if order_ids else None,
+                Products=products,
+                Organisation_id=organisation_created.id,
+            ),
+        )
+        order_ids.append(order_created.id)
+    oldest, nearest, middle, leaf = order_ids
+    lonely, _ = order_crud.create_new_order(
+        db=test_db,
+        obj_in=OrderCreate(
+            Type=OrderTypeEnum.SELL, Organisation_id=organisation_created.id
+        ),
+    )
+
+    statements = []
+
+    def _count_statement(*args: Any) -> None:
+        statements.append(args[2])
+
+    connection = test_db.connection()
+    event.listen(connection, "before_cursor_execute", _count_statement)
+    try:
+        products = order_crud.get_reference_products(
+            db=test_db, ids=[leaf, middle, oldest, lonely.id, 15641875975986]
+        )
+    finally:
+        event.remove(connection, "before_cursor_execute", _count_statement)
+    assert len(statements) == 1
+
+    expected = [product.dict() for product in test_product_order_type_list_of_two]
+    assert products == {
+        leaf: expected,
+        middle: expected,
+        oldest: [product.dict() for product in test_product_order_type_list_of_one],
+        lonely.id: None,
+    }
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        {"category": True},
+        {"variety": True},
+        {"packaging": True},
+        {"category": True, "variety": True},
+        {"category": True, "packaging": True},
+        {"variety": True, "packaging": True},
+        {"category": True, "variety": True, "packaging": True},
+    ],
+)
+def test_read_products_filtered_with_index_only_scans(
+    test_db: Session, filters: dict[str, bool]
+) -> None:
+    product_crud = CRUDProduct(Product)
+    category, variety, packaging = (get_random_string() for _ in range(3))
+    products_created = [
+        product_crud.create(
+            db=test_db,
+            obj_in=ProductCreate(
+                Category=category if "category" in filters else get_random_string(),
+                Variety=variety if "variety" in filters else get_random_string(),
+                Packaging=packaging if "packaging" in filters else get_random_string(),
+            ),
+        )
+        # The three columns together are unique
+        for _ in range(1 if len(filters) == 3 else 3)
+    ]
+    product_crud.create(
+        db=test_db,
+        obj_in=ProductCreate(
+            Category=get_random_string(),
+            Variety=get_random_string(),
+            Packaging=get_random_string(),
+        ),
+    )
+    values = {"category": category, "variety": variety, "packaging": packaging}
+    filter_values = {name: values[name] for name in filters}
+
+    products = product_crud.get_many_filtered(db=test_db, **filter_values)
+    assert [product.id for product in products] == [
+        product.id for product in products_created
+    ]
+    products = product_crud.get_many_filtered(
+        db=test_db, after=products_created[0].id, limit=1, **filter_values
+    )
+    assert [product.id for product in products] == [
+        product.id for product in products_created[1:2]
+    ]
+
+    # Tiny test tables are cheaper to scan sequentially, so rule that out
+    test_db.execute(text("SET LOCAL enable_seqscan = off"))
+    test_db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    statement = select(Product).where(
+        *(
+            getattr(Product, name.capitalize()) == value
+            for name, value in filter_values.items()
+        )
+    )
+    plan = "\n".join(
+        test_db.scalars(
+            text(f"EXPLAIN {statement.compile(compile_kwargs={'literal_binds': True})}")
+        )
+    )
+    assert "Index Only Scan" in plan
+
+
+def test_search_skips_fuzzy_matching_when_prefixes_fill_the_page(
+    test_db: Session,
+) -> None:
+    organisation_crud = CRUDOrganisation(Organisation)
+    word = get_random_string()
+    for suffix in ("a", "b", "c"):
+        organisation_crud.create(
+            db=test_db,
+            obj_in=OrganisationCreate(Name=f"{word}{suffix}", Type=None),
+        )
+
+    statements = []
+
+    def _count_statement(*args: Any) -> None:
+        statements.append(args[2])
+
+    connection = test_db.connection()
+    event.listen(connection, "before_cursor_execute", _count_statement)
+    try:
+        prefix_rows = organisation_crud.search(db=test_db, text=word.upper(), limit=2)
+        assert len(statements) == 1
+        rows = organisation_crud.search(db=test_db, text=word, limit=5)
+        assert len(statements) == 3
+    finally:
+        event.remove(connection, "before_cursor_execute", _count_statement)
+
+    assert [row.Name for row in prefix_rows] == [f"{word}a", f"{word}b"]
+    assert [row.Name for row in rows] == [f"{word}a", f"{word}b", f"{word}c"]
+    assert all(row.prefix for row in rows)
+
+
+def test_search_prefixes_ignore_the_case_of_non_ascii_letters(
+    test_db: Session,
+) -> None:
+    organisation_crud = CRUDOrganisation(Organisation)
+    word = get_random_string()
+    organisation_created = organisation_crud.create(
+        db=test_db, obj_in=OrganisationCreate(Name=f"Éclair {word}", Type=None)
+    )
+
+    for text_typed in (f"Éclair {word}", f"éclair {word}"[:-1], f"ÉCLAIR {word}"):
+        rows = organisation_crud.search(db=test_db, text=text_typed, limit=1)
+        assert [(row.id, row.prefix) for row in rows] == [
+            (organisation_created.id, True)
+        ], text_typed
+
+    # The lower cased prefix is looked up in the index
+    test_db.execute(text("SET LOCAL enable_seqscan = off"))
+    statement = organisation_crud._search_statement("éclair", 1, fuzzy=False)
+    plan = "\n".join(
+        test_db.scalars(
+            text(f"EXPLAIN {statement.compile(compile_kwargs={'literal_binds': True})}")
+        )
+    )
+    assert "ix_organisations_Name_prefix" in plan
+
+
+def test_get_multi_dicts_matches_the_schemas(test_db: Session) -> None:
+    organisation_crud = CRUDOrganisation(Organisation)
+    order_crud = CRUDOrder(Order)
+    product_crud = CRUDProduct(Product)
+    organisations = [
+        organisation_crud.create(
+            db=test_db, obj_in=OrganisationCreate(Name=get_random_string(), Type=None)
+        )
+        for _ in range(3)
+    ]
+    for organisation, products in zip(organisations, ([], [1], [2, 0])):
+        for line_count in products:
+            order_crud.create_new_order(
+                db=test_db,
+                obj_in=OrderCreate(
+                    Type=OrderTypeEnum.BUY,
+                    Organisation_id=organisation.id,
+                    Products=[
+                        ProductOrderType(
+                            Category=get_random_string(),
+                            Variety="test variety",
+                            Packaging="test packaging",
+                            Volume=f"{line} ton",
+                            Price_per_unit="1 $/kg",
+                        )
+                        for line in range(line_count)
+                    ],
+                ),
+            )
+    first_id = organisations[0].id
+
+    for crud, schema, after in (
+        (organisation_crud, OrganisationDBBase, first_id - 1),
+        (order_crud, OrderDBBase, organisations[1].Orders[0].id - 1),
+        (product_crud, ProductDBBase, None),
+    ):
+        records = crud.get_multi(db=test_db, after=after, limit=3)
+        dicts = crud.get_multi_dicts(db=test_db, after=after, limit=3)
+        assert dicts == [schema.from_orm(record).dict() for record in records]
+        assert [list(record) for record in dicts] == [
+            list(schema.__fields__) for _ in records
+        ]
+
+
+def test_projections_keep_the_identity_map_empty(test_db: Session) -> None:
+    product_crud = CRUDProduct(Product)
+    variety = get_random_string()
+    for packaging in ("box", "crate"):
+        product_crud.create(
+            db=test_db,
+            obj_in=ProductCreate(
+                Category="test category", Variety=variety, Packaging=packaging
+            ),
+        )
+    test_db.expunge_all()
+
+    rows = product_crud.project(
+        db=test_db,
+        columns=("id", "Packaging"),
+        filters=product_crud.filters(variety=variety),
+    )
+    assert [row.Packaging for row in rows] == ["box", "crate"]
+    assert rows[0] == (rows[0].id, "box")
+    product_crud.cache.delete(rows[0].id)
+    assert product_crud.get_dict(db=test_db, id=rows[0].id) == {
+        "Category": "test category",
+        "Variety": variety,
+        "Packaging": "box",
+        "id": rows[0].id,
+    }
+    assert product_crud.get_dict(db=test_db, id=0) is None
+    assert len(test_db.identity_map) == 0
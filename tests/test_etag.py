@@ -0,0 +1,16 @@
+from src.routers.etag import etag_matches, make_etag
+
+
+def test_make_etag_quotes_digest() -> None:
+    assert make_etag("abc123") == '"abc123"'
+
+
+def test_etag_matches() -> None:
+    etag = make_etag("abc123")
+
+    assert etag_matches('"abc123"', etag)
+    assert etag_matches('"other", W/"abc123"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches("", etag)
+    assert not etag_matches(None, etag)
@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from tests.helpers import QueryCounter, get_random_string
+
+from src.database.models.base import OrderTypeEnum, OrganisationTypeEnum
+from src.database.schemas.order import OrderCreate, ProductOrderType
+from src.database.schemas.organisation import OrganisationCreate
+from src.database.schemas.product import ProductCreate, ProductDBBase
+from src.routers.idempotency import get_idempotency_store, idempotent_response
+
+
+def _product_in() -> ProductCreate:
+    return ProductCreate(
+        Category="idempotent category",
+        Variety=get_random_string(),
+        Packaging="idempotent packaging",
+    )
+
+
+def test_retried_product_creation_is_replayed(
+    test_app_with_db: TestClient, count_queries: QueryCounter
+) -> None:
+    headers = {"Idempotency-Key": get_random_string()}
+    product_in = _product_in()
+
+    response = test_app_with_db.post(
+        "/api/product", json=product_in.dict(), headers=headers
+    )
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+
+    with count_queries:
+        retried = test_app_with_db.post(
+            "/api/product", json=product_in.dict(), headers=headers
+        )
+
+    assert retried.status_code == 201
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert retried.json() == response.json()
+    assert count_queries.count == 0
+
+
+def test_idempotency_key_reused_with_another_payload(
+    test_app_with_db: TestClient,
+) -> None:
+    headers = {"Idempotency-Key": get_random_string()}
+    response = test_app_with_db.post(
+        "/api/product", json=_product_in().dict(), headers=headers
+    )
+    assert response.status_code == 201
+
+    response = test_app_with_db.post(
+        "/api/product", json=_product_in().dict(), headers=headers
+    )
+
+    assert response.status_code == 422
+
+
+def test_idempotency_key_in_progress(test_app_with_db: TestClient) -> None:
+    key = get_random_string()
+    product_in = _product_in()
+    response = test_app_with_db.post(
+        "/api/product", json=product_in.dict(), headers={"Idempotency-Key": key}
+    )
+    stored = get_idempotency_store().get(("products", key))
+    assert stored is not None
+    get_idempotency_store().set(("products", key), (stored[0], None, None))
+
+    response = test_app_with_db.post(
+        "/api/product", json=product_in.dict(), headers={"Idempotency-Key": key}
+    )
+
+    assert response.status_code == 409
+
+
+def test_failed_creation_releases_the_idempotency_key() -> None:
+    key = get_random_string()
+    product_in = _product_in()
+
+    async def fail() -> None:
+        raise RuntimeError("Database unavailable")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(
+            idempotent_response(key, "products", product_in, fail, ProductDBBase)
+        )
+
+    assert get_idempotency_store().get(("products", key)) is None
+
+
+def test_failed_response_releases_the_idempotency_key() -> None:
+    key = get_random_string()
+    product_in = _product_in()
+
+    async def create() -> object:
+        # Not a product, the response can't be built
+        return object()
+
+    with pytest.raises(ValidationError):
+        asyncio.run(
+            idempotent_response(key, "products", product_in, create, ProductDBBase)
+        )
+
+    assert get_idempotency_store().get(("products", key)) is None
+
+
+def test_retried_order_creation_is_replayed(test_app_with_db: TestClient) -> None:
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=[
+            ProductOrderType(
+                Category="idempotent category",
+                Variety=get_random_string(),
+                Packaging="idempotent packaging",
+                Volume="1 ton",
+                Price_per_unit="1 USD/kg",
+            )
+        ],
+        Organisation_id=organisation_response.json()["id"],
+    )
+    headers = {"Idempotency-Key": get_random_string()}
+
+    responses = [
+        test_app_with_db.post("/api/order", json=order_in.dict(), headers=headers)
+        for _ in range(3)
+    ]
+
+    assert [response.status_code for response in responses] == [201] * 3
+    assert len({response.json()["id"] for response in responses}) == 1
+    organisation = test_app_with_db.get(
+        f"/api/organisation/{order_in.Organisation_id}"
+    ).json()
+    assert len(organisation["Orders"]) == 1
@@ -0,0 +1,71 @@
+import asyncio
+from typing import AsyncIterator, List, Tuple, Union
+
+from src.database.importer import ImportFormat, iter_lines, iter_records
+
+
+async def _chunks(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _arecords(body: bytes, format: ImportFormat) -> List[Tuple[int, object]]:
+    # Split the body into 3-byte chunks, cutting through lines and characters
+    chunks = [body[start:][:3] for start in range(0, len(body), 3)]
+    return [
+        (line, str(record) if isinstance(record, ValueError) else record)
+        async for line, record in iter_records(iter_lines(_chunks(*chunks)), format)
+    ]
+
+
+def _records(body: bytes, format: ImportFormat) -> List[Tuple[int, object]]:
+    return asyncio.run(_arecords(body, format))
+
+
+def test_iter_lines_decodes_across_chunks() -> None:
+    body = "één\r\ntwee\ndrie".encode()
+    chunks = _chunks(body[:1], body[1:5], body[5:])
+
+    async def _lines() -> List[str]:
+        return [line async for line in iter_lines(chunks)]
+
+    lines = asyncio.run(_lines())
+    assert lines == ["één\n", "twee\n", "drie"]
+
+
+def test_iter_lines_splits_on_newlines_only() -> None:
+    # orjson writes U+2028 unescaped, the "\r\n" is split across two chunks
+    body = '{"a": "x\u2028y"}\r\n{"a": 2}\r\n{"a": 3}'.encode()
+    index = body.index(b"\n")
+    chunks = _chunks(body[:index], body[index:])
+
+    async def _lines() -> List[str]:
+        return [line async for line in iter_lines(chunks)]
+
+    lines = asyncio.run(_lines())
+    assert lines == ['{"a": "x\u2028y"}\n', '{"a": 2}\n', '{"a": 3}']
+    records = asyncio.run(_arecords(body, ImportFormat.NDJSON))
+    assert records == [(1, {"a": "x\u2028y"}), (2, {"a": 2}), (3, {"a": 3})]
+    csv_body = 'a,b\r\n"x\x0cy",z\x1e\r\n'.encode()
+    csv_records = asyncio.run(_arecords(csv_body, ImportFormat.CSV))
+    assert csv_records == [(2, {"a": "x\x0cy", "b": "z\x1e"})]
+
+
+def test_iter_records_csv() -> None:
+    body = 'a,b\n1,"x\ny"\n\n2,\n3\n"4",""""\n'.encode()
+    records: List[Tuple[int, Union[str, dict]]] = [
+        (2, {"a": "1", "b": "x\ny"}),
+        (5, {"a": "2"}),
+        (6, "Expected 2 columns, got 1"),
+        (7, {"a": "4", "b": '"'}),
+    ]
+    assert _records(body, ImportFormat.CSV) == records
+
+
+def test_iter_records_ndjson() -> None:
+    body = b'{"a": 1}\n\n[1]\n{"a":\n'
+    assert _records(body, ImportFormat.NDJSON) == [
+        (1, {"a": 1}),
+        (3, [1]),
+        (4, "Invalid JSON"),
+    ]
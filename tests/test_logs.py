@@ -0,0 +1,52 @@
+import logging
+from queue import Queue
+
+import orjson
+
+from src.logs import JSONFormatter, NonBlockingQueueHandler, SamplingFilter
+
+
+def _record(name: str, level: int, msg: str, *args: object) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_keeps_extra_fields() -> None:
+    record = logging.makeLogRecord(
+        {
+            **vars(_record("src.test", logging.INFO, "Order %s created", 7)),
+            "order_id": 7,
+        }
+    )
+
+    entry = orjson.loads(JSONFormatter().format(record))
+
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "src.test"
+    assert entry["message"] == "Order 7 created"
+    assert entry["order_id"] == 7
+    assert "time" in entry and "args" not in entry
+
+
+def test_sampling_filter_rates() -> None:
+    sampling = SamplingFilter({"uvicorn.access": 0.0, "src": 1.0})
+
+    assert not sampling.filter(_record("uvicorn.access", logging.INFO, "GET /"))
+    assert not sampling.filter(_record("uvicorn.access.child", logging.DEBUG, "x"))
+    # Warnings and errors are never sampled
+    assert sampling.filter(_record("uvicorn.access", logging.WARNING, "GET /"))
+    assert sampling.filter(_record("src.routers.order", logging.INFO, "x"))
+    assert sampling.filter(_record("sqlalchemy", logging.INFO, "x"))
+
+
+def test_queue_handler_drops_records_once_full() -> None:
+    queue: "Queue[logging.LogRecord]" = Queue(1)
+    handler = NonBlockingQueueHandler(queue)
+    details = {"quantity": 1}
+
+    handler.handle(_record("src.test", logging.INFO, "Details %s", details))
+    handler.handle(_record("src.test", logging.INFO, "Dropped"))
+    details["quantity"] = 2
+
+    assert handler.dropped == 1
+    # The message keeps the values logged
+    assert queue.get_nowait().getMessage() == "Details {'quantity': 1}"
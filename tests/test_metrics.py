@@ -0,0 +1,88 @@
+from fastapi.testclient import TestClient
+from tests.helpers import get_random_string
+
+from src.database.profiling import statement_type
+from src.metrics import Gauge, Histogram, format_metric
+
+
+def test_histogram_exposes_cumulative_buckets() -> None:
+    histogram = Histogram(
+        "test_seconds", "Test durations", label_names=("route",), buckets=(0.1, 1.0)
+    )
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+    histogram.observe(1.0, "/b")
+
+    assert histogram.expose() == [
+        "# HELP test_seconds Test durations",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1.0"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 5.55',
+        'test_seconds_count{route="/a"} 3',
+        'test_seconds_bucket{route="/b",le="0.1"} 0',
+        'test_seconds_bucket{route="/b",le="1.0"} 1',
+        'test_seconds_bucket{route="/b",le="+Inf"} 1',
+        'test_seconds_sum{route="/b"} 1.0',
+        'test_seconds_count{route="/b"} 1',
+    ]
+
+
+def test_gauge_and_label_escaping() -> None:
+    gauge = Gauge("test_in_flight", "Test gauge")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+
+    assert gauge.expose()[-1] == "test_in_flight 1.0"
+    assert format_metric("test", "gauge", "Test", [("", {"a": 'x"\\\n'}, 2)])[-1] == (
+        'test{a="x\\"\\\\\\n"} 2'
+    )
+
+
+def test_statement_type() -> None:
+    assert statement_type("SELECT products.id FROM products") == "SELECT"
+    assert statement_type("insert into products") == "INSERT"
+    assert statement_type("WITH RECURSIVE chain AS (...)") == "WITH"
+    assert statement_type("SAVEPOINT sa_savepoint_1") == "OTHER"
+    assert statement_type("") == "OTHER"
+
+
+def test_get_metrics(test_app_with_db: TestClient) -> None:
+    product_response = test_app_with_db.post(
+        "/api/product",
+        json={
+            "Category": "metrics category",
+            "Variety": get_random_string(),
+            "Packaging": "metrics packaging",
+        },
+    )
+    assert product_response.status_code == 201
+    product_id = product_response.json()["id"]
+    for _ in range(2):
+        assert test_app_with_db.get(f"/api/product/{product_id}").status_code == 200
+    assert test_app_with_db.get("/api/not-a-route").status_code == 404
+
+    response = test_app_with_db.get("/metrics")
+
+    assert response.status_code == 200
+    assert (
+        response.headers["Content-Type"] == "text/plain; version=0.0.4; charset=utf-8"
+    )
+    samples = dict(
+        line.rsplit(" ", 1)
+        for line in response.text.splitlines()
+        if not line.startswith("#")
+    )
+    route = 'method="GET",route="/api/product/{product_id}",status="200"'
+    assert float(samples[f"http_request_duration_seconds_count{{{route}}}"]) >= 2
+    unmatched = 'method="GET",route="unmatched",status="404"'
+    assert float(samples[f"http_request_duration_seconds_count{{{unmatched}}}"]) >= 1
+    # The scrape itself is in flight
+    assert float(samples["http_requests_in_flight"]) >= 1
+    assert float(samples['db_query_duration_seconds_count{statement="INSERT"}']) >= 1
+    assert 'db_pool_size{engine="async"}' in samples
+    assert 'db_pool_checkout_wait_seconds_bucket{engine="sync",le="+Inf"}' in samples
+    assert 0 <= float(samples['cache_hit_ratio{cache="products"}']) <= 1
@@ -0,0 +1,30 @@
+import pytest
+from fastapi import HTTPException
+
+from src.routers.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    for last_id in (0, 1, 2**31 - 1, 2**40, 2**63 - 1):
+        cursor = encode_cursor(last_id)
+        assert "=" not in cursor
+        assert decode_cursor(cursor) == last_id
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "",
+        "abc",
+        encode_cursor(1)[:-2],
+        "eyJpZCI6ImEifQ",
+        # IDs outside of the BIGINT range of the keyset query
+        "eyJpZCI6IDEwMDAwMDAwMDAwMDAwMDAwMDAwMH0",
+        encode_cursor(2**63),
+        encode_cursor(-1),
+    ],
+)
+def test_decode_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 422
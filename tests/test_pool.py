@@ -0,0 +1,76 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from src.config import Settings
+from src.database.pool import (
+    InstrumentedQueuePool,
+    PoolStatistics,
+    get_pool_kwargs,
+    get_pool_status,
+)
+
+
+def test_pool_statistics_histogram_is_cumulative() -> None:
+    statistics = PoolStatistics(buckets=(0.01, 0.1))
+    statistics.observe_checkout(0.001)
+    statistics.observe_checkout(0.05)
+    statistics.observe_checkout(0.05)
+    statistics.observe_checkout(3.0)
+    statistics.observe_timeout(30.0)
+
+    assert statistics.histogram() == {"0.01": 1, "0.1": 3, "+Inf": 4}
+    assert statistics.checkouts == 4
+    assert statistics.timeouts == 1
+    assert statistics.wait_seconds_max == 30.0
+
+    statistics.reset()
+    assert statistics.histogram() == {"0.01": 0, "0.1": 0, "+Inf": 0}
+    assert statistics.checkouts == 0
+
+
+def test_get_pool_kwargs_from_settings() -> None:
+    settings = Settings(
+        database_pool_size=20,
+        database_max_overflow=0,
+        database_pool_timeout=2.5,
+        database_pool_recycle=1800,
+        database_pool_pre_ping=True,
+    )
+    assert get_pool_kwargs(settings) == {
+        "pool_size": 20,
+        "max_overflow": 0,
+        "pool_timeout": 2.5,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    }
+
+
+def test_pool_status_counts_checkouts_and_timeouts() -> None:
+    test_engine = create_engine(
+        os.environ.get("DATABASE_TEST_URL"),
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    try:
+        with test_engine.connect():
+            status = get_pool_status(test_engine)
+            assert status.pool_class == "InstrumentedQueuePool"
+            assert status.size == 1
+            assert status.checked_out == 1
+            assert status.overflow == 0
+            assert status.checkouts == 1
+
+            with pytest.raises(exc.TimeoutError):
+                test_engine.connect()
+
+        status = get_pool_status(test_engine)
+        assert status.checked_out == 0
+        assert status.timeouts == 1
+        assert status.wait_seconds_max >= 0.05
+        assert status.wait_seconds_histogram["+Inf"] == 1
+    finally:
+        test_engine.dispose()
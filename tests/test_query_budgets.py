@@ -0,0 +1,155 @@
+from typing import Any, Dict, List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from tests.helpers import QueryCounter, get_random_string
+
+from src.database.models.base import OrderTypeEnum, OrganisationTypeEnum
+from src.database.schemas.order import OrderCreate, ProductOrderType
+from src.database.schemas.organisation import OrganisationCreate
+
+# Page sizes every paginated endpoint is requested with, its query count must not
+# grow with the number of records returned
+PAGE_SIZES = (1, 5)
+
+# Maximum number of statements per paginated endpoint, for any page size
+LIST_QUERY_BUDGETS = {
+    "/api/product": 1,
+    "/api/organisation": 3,
+    "/api/order": 2,
+    "/api/organisation/{organisation_id}/catalog": 1,
+    "/api/search?q={name}": 2,
+}
+
+# Maximum number of statements per endpoint returning a single resource
+QUERY_BUDGETS = {
+    "/api/product/{product_id}": 2,
+    "/api/organisation/{organisation_id}": 4,
+    "/api/order/{order_id}": 3,
+    "/api/order/{order_id}/chain": 2,
+    "/api/analytics/orders?group_by=organisation&group_by=category": 1,
+}
+
+
+@pytest.fixture(scope="module")
+def budget_records(test_app_with_db: TestClient) -> Dict[str, Any]:
+    """
+    Organisations sharing a name prefix, each with orders of several products, so
+    that every paginated endpoint has more records than the largest page size.
+    """
+    name = get_random_string()
+    records: Dict[str, Any] = {"name": name}
+    for i in range(max(PAGE_SIZES) + 1):
+        organisation_in = OrganisationCreate(
+            Name=f"{name} {i}", Type=OrganisationTypeEnum.BUYER
+        )
+        response = test_app_with_db.post(
+            "/api/organisation", json=organisation_in.dict()
+        )
+        records["organisation_id"] = response.json()["id"]
+        for order_type in OrderTypeEnum:
+            products = [
+                ProductOrderType(
+                    Category=f"{name} category",
+                    Variety=f"{name} variety {i} {j}",
+                    Packaging="budget packaging",
+                    Volume="1 ton",
+                    Price_per_unit="10 $/kg",
+                )
+                for j in range(max(PAGE_SIZES) + 1)
+            ]
+            order_in = OrderCreate(
+                Type=order_type,
+                Products=products,
+                Organisation_id=records["organisation_id"],
+            )
+            response = test_app_with_db.post("/api/order", json=order_in.dict())
+            records["order_id"] = response.json()["id"]
+    response = test_app_with_db.get(f"/api/search?q={name}")
+    records["product_id"] = response.json()["products"][0]["id"]
+    return records
+
+
+def test_count_queries_leaves_out_savepoints(
+    test_db: Session, count_queries: QueryCounter
+) -> None:
+    with count_queries:
+        with test_db.begin_nested():
+            test_db.execute(text("SELECT 1"))
+            test_db.execute(text("SELECT 2"))
+
+    assert count_queries.statements == ["SELECT 1", "SELECT 2"]
+
+
+def _records(content: Any) -> List[Any]:
+    if isinstance(content, dict):
+        return [record for records in content.values() for record in records]
+    return content
+
+
+@pytest.mark.parametrize("path", LIST_QUERY_BUDGETS)
+def test_list_endpoint_query_budget(
+    test_app_with_db: TestClient,
+    budget_records: Dict[str, Any],
+    count_queries: QueryCounter,
+    path: str,
+) -> None:
+    counts = {}
+    for limit in PAGE_SIZES:
+        with count_queries:
+            response = test_app_with_db.get(
+                path.format(**budget_records), params={"limit": limit}
+            )
+
+        assert response.status_code == 200
+        assert len(_records(response.json())) >= limit
+        assert count_queries.count <= LIST_QUERY_BUDGETS[path], count_queries.statements
+        counts[limit] = count_queries.count
+
+    # An N+1 query pattern runs more statements for larger pages
+    assert len(set(counts.values())) == 1, counts
+
+
+@pytest.mark.parametrize("path", QUERY_BUDGETS)
+def test_endpoint_query_budget(
+    test_app_with_db: TestClient,
+    budget_records: Dict[str, Any],
+    count_queries: QueryCounter,
+    path: str,
+) -> None:
+    with count_queries:
+        response = test_app_with_db.get(path.format(**budget_records))
+
+    assert response.status_code == 200
+    assert count_queries.count <= QUERY_BUDGETS[path], count_queries.statements
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/product/{product_id}",
+        "/api/organisation/{organisation_id}",
+        "/api/order/{order_id}",
+    ],
+)
+def test_cached_endpoint_runs_no_query(
+    test_app_with_db: TestClient,
+    budget_records: Dict[str, Any],
+    count_queries: QueryCounter,
+    path: str,
+) -> None:
+    url = path.format(**budget_records)
+    etag = test_app_with_db.get(url).headers["ETag"]
+
+    with count_queries:
+        response = test_app_with_db.get(url)
+        not_modified_response = test_app_with_db.get(
+            url, headers={"If-None-Match": etag}
+        )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] == etag
+    assert not_modified_response.status_code == 304
+    assert count_queries.count == 0, count_queries.statements
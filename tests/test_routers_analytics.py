@@ -0,0 +1,136 @@
+from fastapi.testclient import TestClient
+from tests.helpers import get_random_string
+
+from src.database.models.base import OrderTypeEnum, OrganisationTypeEnum
+from src.database.schemas.order import OrderCreate, ProductOrderType
+from src.database.schemas.organisation import OrganisationCreate
+
+
+def test_successful_get_order_totals(test_app_with_db: TestClient) -> None:
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_id = organisation_response.json()["id"]
+
+    prefix = get_random_string()
+    mango, lime = f"{prefix} mango", f"{prefix} lime"
+    for order_type, products in (
+        (OrderTypeEnum.BUY, [(mango, "2 ton", "1000 $/ton"), (lime, "3 kg", "4 $/kg")]),
+        (OrderTypeEnum.BUY, [(mango, "1.5 ton", "1200 $/ton")]),
+        (OrderTypeEnum.SELL, [(mango, "1 ton", "about 900 $/ton")]),
+        (OrderTypeEnum.SELL, []),
+    ):
+        order_in = OrderCreate(
+            Type=order_type,
+            Products=[
+                ProductOrderType(
+                    Category=category,
+                    Variety="test variety",
+                    Packaging="test packaging",
+                    Volume=volume,
+                    Price_per_unit=price_per_unit,
+                )
+                for category, volume, price_per_unit in products
+            ],
+            Organisation_id=organisation_id,
+        )
+        response = test_app_with_db.post("/api/order", json=order_in.dict())
+        assert response.status_code == 201
+
+    response = test_app_with_db.get(
+        "/api/analytics/orders", params={"organisation_id": organisation_id}
+    )
+    assert response.status_code == 200
+    organisation = {
+        "Organisation_id": organisation_id,
+        "Organisation_name": organisation_in.Name,
+        "Category": None,
+        "Variety": None,
+        "Type": None,
+    }
+    # Tons and kilograms are totalled apart
+    assert response.json() == [
+        {
+            **organisation,
+            "Volume_unit": "kg",
+            "Price_per_unit_unit": "$/kg",
+            "Orders": 1,
+            "Lines": 1,
+            "Volume": 3.0,
+            "Value": 12.0,
+            "Unparsed_lines": 0,
+        },
+        {
+            **organisation,
+            "Volume_unit": "ton",
+            "Price_per_unit_unit": "$/ton",
+            "Orders": 2,
+            "Lines": 2,
+            "Volume": 3.5,
+            "Value": 3800.0,
+            "Unparsed_lines": 0,
+        },
+        {
+            **organisation,
+            "Volume_unit": "ton",
+            "Price_per_unit_unit": None,
+            "Orders": 1,
+            "Lines": 1,
+            "Volume": 1.0,
+            "Value": 0.0,
+            "Unparsed_lines": 1,
+        },
+        {
+            **organisation,
+            "Volume_unit": None,
+            "Price_per_unit_unit": None,
+            "Orders": 1,
+            "Lines": 0,
+            "Volume": 0.0,
+            "Value": 0.0,
+            "Unparsed_lines": 0,
+        },
+    ]
+
+    response = test_app_with_db.get(
+        "/api/analytics/orders",
+        params={
+            "group_by": ["type", "category"],
+            "organisation_id": organisation_id,
+        },
+    )
+    assert response.status_code == 200
+    assert [
+        (
+            row["Type"],
+            row["Category"],
+            row["Volume_unit"],
+            row["Orders"],
+            row["Volume"],
+            row["Value"],
+        )
+        for row in response.json()
+    ] == [
+        ("BUY", lime, "kg", 1, 3.0, 12.0),
+        ("BUY", mango, "ton", 2, 3.5, 3800.0),
+        ("SELL", mango, "ton", 1, 1.0, 0.0),
+        ("SELL", None, None, 1, 0.0, 0.0),
+    ]
+
+    response = test_app_with_db.get(
+        "/api/analytics/orders",
+        params={"group_by": "type", "category": mango, "type": "BUY"},
+    )
+    assert response.status_code == 200
+    assert [(row["Type"], row["Lines"], row["Value"]) for row in response.json()] == [
+        ("BUY", 2, 3800.0)
+    ]
+
+    response = test_app_with_db.get(
+        "/api/analytics/orders", params={"group_by": "packaging"}
+    )
+    assert response.status_code == 422
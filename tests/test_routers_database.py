@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+from tests.helpers import get_random_string
+
+
+def test_successful_get_database_pool_status(test_app: TestClient) -> None:
+    response = test_app.get("/api/database/pool")
+
+    assert response.status_code == 200
+
+    content = response.json()
+    assert set(content) == {"async", "sync"}
+    assert content["async"]["pool_class"] == "InstrumentedAsyncAdaptedQueuePool"
+    assert content["sync"]["pool_class"] == "InstrumentedQueuePool"
+    assert content["async"]["checked_out"] == 0
+    assert "+Inf" in content["async"]["wait_seconds_histogram"]
+
+
+def test_successful_get_database_cache_status(test_app_with_db: TestClient) -> None:
+    product_response = test_app_with_db.post(
+        "/api/product",
+        json={
+            "Category": "test category 1",
+            "Variety": get_random_string(),
+            "Packaging": "test packaging 1",
+        },
+    )
+    assert product_response.status_code == 201
+    product_id = product_response.json()["id"]
+    for _ in range(2):
+        assert test_app_with_db.get(f"/api/product/{product_id}").status_code == 200
+
+    response = test_app_with_db.get("/api/database/cache")
+
+    assert response.status_code == 200
+
+    content = response.json()
+    assert content["products"]["backend"] == "InMemoryCache"
+    assert content["products"]["hits"] >= 1
+    assert content["products"]["misses"] >= 1
+    assert content["products"]["size"] >= 1
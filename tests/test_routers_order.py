@@ -1,3 +1,4 @@
+import json
 from typing import List
 
 import pytest
@@ -7,6 +8,8 @@ from tests.helpers import get_random_string
 from src.database.models.base import OrderTypeEnum, OrganisationTypeEnum
 from src.database.schemas.order import OrderCreate, OrderUpdate, ProductOrderType
 from src.database.schemas.organisation import OrganisationCreate
+from src.database.schemas.product import ProductCreate
+from src.routers.pagination import encode_cursor
 
 
 @pytest.fixture()
@@ -165,6 +168,59 @@ def test_successful_get_single_order(
     assert get_content["Organisation_id"] == organisation_content["id"]
 
 
+def test_order_without_products_round_trips_as_empty_list(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=[],
+        Organisation_id=organisation_response.json()["id"],
+    )
+
+    post_response = test_app_with_db.post("/api/order", json=order_in.dict())
+    assert post_response.status_code == 201
+    post_content = post_response.json()
+    assert post_content["Products"] == []
+
+    get_response = test_app_with_db.get(f"/api/order/{post_content['id']}")
+    assert get_response.status_code == 200
+    assert get_response.json()["Products"] == []
+
+    list_response = test_app_with_db.get(
+        "/api/order",
+        params={"limit": 1, "cursor": encode_cursor(post_content["id"] - 1)},
+    )
+    assert list_response.status_code == 200
+    assert list_response.json() == [post_content]
+
+    bulk_response = test_app_with_db.post("/api/order/bulk", json=[order_in.dict()])
+    assert bulk_response.status_code == 201
+    bulk_id = bulk_response.json()["results"][0]["id"]
+    get_response = test_app_with_db.get(f"/api/order/{bulk_id}")
+    assert get_response.json()["Products"] == []
+
+    # Emptying the products of an order
+    order_in.Products = test_product_order_type_list_of_two
+    post_response = test_app_with_db.post("/api/order", json=order_in.dict())
+    assert post_response.status_code == 201
+    order_id = post_response.json()["id"]
+    update_response = test_app_with_db.put(
+        f"/api/order/{order_id}", json={"Products": []}
+    )
+    assert update_response.status_code == 201
+    assert update_response.json()["Products"] == []
+    get_response = test_app_with_db.get(f"/api/order/{order_id}")
+    assert get_response.json()["Products"] == []
+
+
 def test_successful_get_many_orders_with_queries(
     test_app_with_db: TestClient,
     test_product_order_type_list_of_two: List[ProductOrderType],
@@ -340,6 +396,66 @@ def test_successful_update_single_order(
     assert get_content["Type"] == order_update.Type
 
 
+def test_successful_update_products_of_single_order(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    # Create organisation
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_content = organisation_response.json()
+
+    # Create order
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=test_product_order_type_list_of_two,
+        Organisation_id=organisation_content["id"],
+    )
+    post_response = test_app_with_db.post("/api/order", json=order_in.dict())
+    assert post_response.status_code == 201
+    post_content = post_response.json()
+
+    # Replace the products of the order, one of them already registered
+    product_in = ProductCreate(
+        Category="test category 1",
+        Variety=get_random_string(),
+        Packaging="test packaging 1",
+    )
+    product_response = test_app_with_db.post("/api/product", json=product_in.dict())
+    assert product_response.status_code == 201
+    product_id = product_response.json()["id"]
+
+    order_update = OrderUpdate(
+        Products=[
+            test_product_order_type_list_of_two[1],
+            ProductOrderType(
+                **product_in.dict(), Volume="2.5 ton", Price_per_unit="900 $/kg"
+            ),
+        ],
+    )
+    update_response = test_app_with_db.put(
+        f"/api/order/{post_content['id']}", json=order_update.dict(exclude_unset=True)
+    )
+    assert update_response.status_code == 201
+    assert update_response.json()["Products"] == order_update.Products
+
+    get_response = test_app_with_db.get(f"/api/order/{post_content['id']}")
+    assert get_response.status_code == 200
+    get_content = get_response.json()
+    assert get_content["Type"] == order_in.Type
+    assert get_content["Products"] == order_update.Products
+
+    # Products of an order can not be deleted
+    delete_response = test_app_with_db.delete(f"/api/product/{product_id}")
+    assert delete_response.status_code == 409
+    assert delete_response.json() == {"detail": "Product is part of existing orders"}
+
+
 def test_unsuccessful_update_single_order(
     test_app_with_db: TestClient,
     test_product_order_type_list_of_two: List[ProductOrderType],
@@ -381,3 +497,433 @@ def test_unsuccessful_update_single_order(
             }
         ]
     }
+
+
+def test_successful_get_many_orders_with_cursor(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    # Create organisation
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_content = organisation_response.json()
+
+    # Create orders
+    order_ids = []
+    for _ in range(3):
+        order_in = OrderCreate(
+            Type=OrderTypeEnum.SELL,
+            Products=test_product_order_type_list_of_two,
+            Organisation_id=organisation_content["id"],
+        )
+        post_response = test_app_with_db.post("/api/order", json=order_in.dict())
+        assert post_response.status_code == 201
+        order_ids.append(post_response.json()["id"])
+
+    # Page through the orders after the first one created
+    skip_response = test_app_with_db.get(f"/api/order?limit={1000}")
+    assert skip_response.status_code == 200
+    position = [order["id"] for order in skip_response.json()].index(order_ids[0])
+    first_page = test_app_with_db.get(f"/api/order?skip={position}&limit=1")
+    assert first_page.json()[0]["id"] == order_ids[0]
+
+    second_page = test_app_with_db.get(
+        f"/api/order?limit=1&cursor={first_page.headers['X-Next-Cursor']}"
+    )
+    assert second_page.status_code == 200
+    assert second_page.json()[0]["id"] == order_ids[1]
+
+    third_page = test_app_with_db.get(
+        f"/api/order?limit=1&cursor={second_page.headers['X-Next-Cursor']}"
+    )
+    assert third_page.status_code == 200
+    assert third_page.json()[0]["id"] == order_ids[2]
+
+
+def test_successful_post_bulk_orders(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    # Create organisation
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_content = organisation_response.json()
+
+    new_product = ProductOrderType(
+        Category="test category bulk",
+        Variety=get_random_string(),
+        Packaging="test packaging bulk",
+        Volume="test volume bulk",
+        Price_per_unit="test price per unit bulk",
+    )
+    order_one = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=[new_product, *test_product_order_type_list_of_two],
+        Organisation_id=organisation_content["id"],
+    )
+    order_two = OrderCreate(
+        Type=OrderTypeEnum.BUY,
+        Products=[new_product],
+        Organisation_id=organisation_content["id"],
+    )
+    bulk_response = test_app_with_db.post(
+        "/api/order/bulk",
+        json=[
+            order_one.dict(),
+            {"Organisation_id": organisation_content["id"]},
+            order_two.dict(),
+            {"Type": OrderTypeEnum.BUY, "Organisation_id": 15641875975986},
+        ],
+    )
+    assert bulk_response.status_code == 201
+
+    bulk_content = bulk_response.json()
+    assert bulk_content["created"] == 2
+    assert bulk_content["failed"] == 2
+    # The product shared by both orders is only created once
+    assert len(bulk_content["product_ids"]) == 1
+    results = bulk_content["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert results[0]["error"] is None
+    assert results[1] == {"index": 1, "id": None, "error": "Type: field required"}
+    assert results[2]["error"] is None
+    assert results[2]["id"] > results[0]["id"]
+    assert results[3]["error"] == "Organisation 15641875975986 not found"
+
+    get_response = test_app_with_db.get(f"/api/order/{results[0]['id']}")
+    assert get_response.status_code == 200
+    get_content = get_response.json()
+    assert get_content["Type"] == order_one.Type
+    assert get_content["Products"] == order_one.Products
+    assert get_content["Organisation_id"] == organisation_content["id"]
+
+    product_response = test_app_with_db.get(
+        f"/api/product/{bulk_content['product_ids'][0]}"
+    )
+    assert product_response.status_code == 200
+    assert product_response.json()["Variety"] == new_product.Variety
+
+
+def test_successful_post_bulk_orders_as_ndjson_with_references(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    # Create organisation
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_content = organisation_response.json()
+
+    # Create Referenced Order
+    order_ref = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=test_product_order_type_list_of_two,
+        Organisation_id=organisation_content["id"],
+    )
+    ref_response = test_app_with_db.post("/api/order", json=order_ref.dict())
+    assert ref_response.status_code == 201
+    ref_content = ref_response.json()
+
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.BUY,
+        Organisation_id=organisation_content["id"],
+        References=ref_content["id"],
+    )
+    missing_ref = OrderCreate(
+        Type=OrderTypeEnum.BUY,
+        Organisation_id=organisation_content["id"],
+        References=15641875975986,
+    )
+    body = "\n".join([order_in.json(), "{not json", "", missing_ref.json()])
+    bulk_response = test_app_with_db.post(
+        "/api/order/bulk",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert bulk_response.status_code == 201
+
+    results = bulk_response.json()["results"]
+    assert results[1] == {"index": 1, "id": None, "error": "Invalid JSON"}
+    assert results[2]["error"] == "Referenced order 15641875975986 not found"
+
+    get_response = test_app_with_db.get(f"/api/order/{results[0]['id']}")
+    assert get_response.status_code == 200
+    get_content = get_response.json()
+    assert get_content["Type"] == order_in.Type
+    assert get_content["Products"] == order_ref.Products
+    assert get_content["References"] == ref_content["id"]
+
+
+def test_failure_to_post_bulk_orders(test_app_with_db: TestClient) -> None:
+    response = test_app_with_db.post("/api/order/bulk", json={"Type": "BUY"})
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Request body must be a JSON array of orders"}
+
+
+def test_conditional_get_single_organisation_and_order(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    # Create organisation
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_id = organisation_response.json()["id"]
+
+    get_response = test_app_with_db.get(f"/api/organisation/{organisation_id}")
+    assert get_response.status_code == 200
+    organisation_etag = get_response.headers["ETag"]
+    not_modified_response = test_app_with_db.get(
+        f"/api/organisation/{organisation_id}",
+        headers={"If-None-Match": organisation_etag},
+    )
+    assert not_modified_response.status_code == 304
+
+    # A new order changes the organisation's version
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=test_product_order_type_list_of_two,
+        Organisation_id=organisation_id,
+    )
+    post_response = test_app_with_db.post("/api/order", json=order_in.dict())
+    assert post_response.status_code == 201
+    order_id = post_response.json()["id"]
+
+    modified_response = test_app_with_db.get(
+        f"/api/organisation/{organisation_id}",
+        headers={"If-None-Match": organisation_etag},
+    )
+    assert modified_response.status_code == 200
+    assert modified_response.headers["ETag"] != organisation_etag
+
+    get_response = test_app_with_db.get(f"/api/order/{order_id}")
+    assert get_response.status_code == 200
+    order_etag = get_response.headers["ETag"]
+    not_modified_response = test_app_with_db.get(
+        f"/api/order/{order_id}", headers={"If-None-Match": order_etag}
+    )
+    assert not_modified_response.status_code == 304
+    assert not_modified_response.content == b""
+
+    # Replacing the order's products changes its version
+    update_response = test_app_with_db.put(
+        f"/api/order/{order_id}",
+        json={"Products": [test_product_order_type_list_of_two[0].dict()]},
+    )
+    assert update_response.status_code == 201
+    modified_response = test_app_with_db.get(
+        f"/api/order/{order_id}", headers={"If-None-Match": order_etag}
+    )
+    assert modified_response.status_code == 200
+    assert modified_response.headers["ETag"] != order_etag
+
+    missing_response = test_app_with_db.get(
+        "/api/order/15641875975986", headers={"If-None-Match": "*"}
+    )
+    assert missing_response.status_code == 404
+
+
+# The test session shares one connection, so the export can't open its own snapshot
+@pytest.mark.filterwarnings("ignore:Connection is already established")
+def test_successful_export_orders(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    # Create organisation
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_id = organisation_response.json()["id"]
+
+    order_in = OrderCreate(
+        Type=OrderTypeEnum.SELL,
+        Products=test_product_order_type_list_of_two,
+        Organisation_id=organisation_id,
+    )
+    post_response = test_app_with_db.post("/api/order", json=order_in.dict())
+    assert post_response.status_code == 201
+    post_content = post_response.json()
+
+    with test_app_with_db.stream("GET", "/api/order/export") as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        orders = [json.loads(line) for line in response.iter_lines() if line]
+
+    assert [order["id"] for order in orders] == sorted(order["id"] for order in orders)
+    assert post_content in orders
+
+    response = test_app_with_db.get("/api/organisation/export")
+    assert response.status_code == 200
+    organisations = [json.loads(line) for line in response.text.splitlines()]
+    organisation = next(
+        organisation
+        for organisation in organisations
+        if organisation["id"] == organisation_id
+    )
+    assert organisation["Orders"] == [post_content]
+    assert organisation["Products"] == post_content["Products"]
+
+    response = test_app_with_db.get("/api/product/export")
+    assert response.status_code == 200
+    varieties = {json.loads(line)["Variety"] for line in response.text.splitlines()}
+    assert {product.Variety for product in test_product_order_type_list_of_two} <= (
+        varieties
+    )
+
+
+def test_successful_import_orders(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_id = organisation_response.json()["id"]
+    products = [product.dict() for product in test_product_order_type_list_of_two]
+
+    # Products are a JSON array in a quoted CSV field, here spanning two lines
+    products_field = json.dumps(products, indent=1).replace('"', '""')
+    csv_body = (
+        "Type,References,Organisation_id,Products\n"
+        f'SELL,,{organisation_id},"{products_field}"\n'
+        f"BUY,,{organisation_id},\n"
+        "SELL,,999999999,\n"
+        f"SELL,,{organisation_id},not json\n"
+        "RENT,,1\n"
+    )
+    response = test_app_with_db.post(
+        "/api/order/import", content=csv_body, headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 201
+    content = response.json()
+    assert content["table"] == "orders"
+    assert content["format"] == "csv"
+    assert content["rows"] == 5
+    assert content["imported"] == 2
+    assert content["rejected"] == 3
+    assert [row["error"] for row in content["rejected_rows"]] == [
+        "Organisation 999999999 not found",
+        "Products: invalid JSON",
+        "Expected 4 columns, got 3",
+    ]
+    line_count = 2 + products_field.count("\n")
+    assert [row["line"] for row in content["rejected_rows"]] == [
+        line_count + 2,
+        line_count + 3,
+        line_count + 4,
+    ]
+
+    response = test_app_with_db.get("/api/order", params={"limit": 1000})
+    imported = [
+        order
+        for order in response.json()
+        if order["Organisation_id"] == organisation_id
+    ]
+    assert [(order["Type"], order["Products"]) for order in imported] == [
+        ("SELL", products),
+        ("BUY", []),
+    ]
+
+    ndjson_body = "\n".join(
+        [
+            json.dumps(
+                {
+                    "Type": "SELL",
+                    "References": imported[0]["id"],
+                    "Organisation_id": organisation_id,
+                    "Products": products[:1],
+                }
+            ),
+            "",
+            json.dumps(
+                {"Type": "SELL", "References": -1, "Organisation_id": organisation_id}
+            ),
+            "{not json",
+            json.dumps({"Type": "SELL"}),
+        ]
+    )
+    response = test_app_with_db.post(
+        "/api/order/import",
+        content=ndjson_body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 201
+    content = response.json()
+    assert content["format"] == "ndjson"
+    assert (content["rows"], content["imported"], content["rejected"]) == (4, 1, 3)
+    assert {row["line"]: row["error"] for row in content["rejected_rows"]} == {
+        3: "Referenced order -1 not found",
+        4: "Invalid JSON",
+        5: "Organisation_id: field required",
+    }
+
+    response = test_app_with_db.post(
+        "/api/order/import", content="{}", headers={"content-type": "text/plain"}
+    )
+    assert response.status_code == 415
+
+
+def test_successful_get_order_chain(
+    test_app_with_db: TestClient,
+    test_product_order_type_list_of_two: List[ProductOrderType],
+) -> None:
+    organisation_in = OrganisationCreate(
+        Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+    )
+    organisation_response = test_app_with_db.post(
+        "/api/organisation", json=organisation_in.dict()
+    )
+    assert organisation_response.status_code == 201
+    organisation_id = organisation_response.json()["id"]
+
+    # Only the first order has products, later amendments copy them over
+    orders = []
+    for products in (test_product_order_type_list_of_two, None, None):
+        order_in = OrderCreate(
+            Type=OrderTypeEnum.SELL,
+            References=orders[-1]["id"] if orders else None,
+            Products=products,
+            Organisation_id=organisation_id,
+        )
+        response = test_app_with_db.post("/api/order", json=order_in.dict())
+        assert response.status_code == 201
+        orders.append(response.json())
+    assert orders[2]["Products"] == orders[0]["Products"]
+
+    response = test_app_with_db.get(f"/api/order/{orders[1]['id']}/chain")
+    assert response.status_code == 200
+    assert response.json() == {
+        "ancestors": [orders[0]],
+        "order": orders[1],
+        "descendants": [orders[2]],
+    }
+
+    response = test_app_with_db.get("/api/order/15641875975986/chain")
+    assert response.status_code == 404
@@ -1,7 +1,11 @@
+import json
+from typing import Any, Dict, Tuple
+
 from fastapi.testclient import TestClient
 from tests.helpers import get_random_string
 
-from src.database.models.base import OrganisationTypeEnum
+from src.database.models.base import OrderTypeEnum, OrganisationTypeEnum
+from src.database.schemas.order import OrderCreate, ProductOrderType
 from src.database.schemas.organisation import OrganisationCreate, OrganisationUpdate
 
 
@@ -255,3 +259,160 @@ def test_no_change_with_empty_update(test_app_with_db: TestClient) -> None:
     assert get_content["id"] == post_content["id"]
     assert get_content["Name"] == organisation_in.Name
     assert get_content["Type"] == organisation_in.Type
+
+
+def test_successful_get_many_organisations_with_cursor(
+    test_app_with_db: TestClient,
+) -> None:
+    organisation_ids = []
+    for _ in range(2):
+        organisation_in = OrganisationCreate(
+            Name=get_random_string(),
+            Type=OrganisationTypeEnum.BUYER,
+        )
+        post_response = test_app_with_db.post(
+            "/api/organisation", json=organisation_in.dict()
+        )
+        assert post_response.status_code == 201
+        organisation_ids.append(post_response.json()["id"])
+
+    first_page = test_app_with_db.get("/api/organisation?limit=1")
+    assert first_page.status_code == 200
+    assert "X-Next-Cursor" in first_page.headers
+
+    next_page = test_app_with_db.get(
+        f"/api/organisation?limit=1&cursor={first_page.headers['X-Next-Cursor']}"
+    )
+    assert next_page.status_code == 200
+    assert next_page.json()[0]["id"] > first_page.json()[0]["id"]
+
+    # The last page is not full so it has no next cursor
+    last_page = test_app_with_db.get(
+        f"/api/organisation?limit=1000&cursor={first_page.headers['X-Next-Cursor']}"
+    )
+    assert last_page.status_code == 200
+    assert last_page.json()[-1]["id"] == organisation_ids[-1]
+    assert "X-Next-Cursor" not in last_page.headers
+
+
+def test_successful_import_organisations(test_app_with_db: TestClient) -> None:
+    names = [get_random_string() for _ in range(3)]
+    body = "\n".join(
+        [
+            f'{{"Name": "{names[0]}", "Type": "BUYER"}}',
+            f'{{"Name": "{names[1]}", "Type": "SELLER"}}',
+            f'{{"Name": "{names[0]}", "Type": "BUYER"}}',
+            f'{{"Name": "{names[2]}", "Type": "unknown"}}',
+        ]
+    )
+    response = test_app_with_db.post(
+        "/api/organisation/import",
+        content=body,
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 201
+    content = response.json()
+    assert content["table"] == "organisations"
+    assert (content["rows"], content["imported"], content["existing"]) == (4, 2, 1)
+    assert [row["line"] for row in content["rejected_rows"]] == [4]
+    assert content["rejected_rows"][0]["error"].startswith("Type: ")
+
+
+def test_successful_get_organisation_catalog(test_app_with_db: TestClient) -> None:
+    organisation_ids = []
+    for _ in range(2):
+        organisation_in = OrganisationCreate(
+            Name=get_random_string(), Type=OrganisationTypeEnum.BUYER
+        )
+        response = test_app_with_db.post(
+            "/api/organisation", json=organisation_in.dict()
+        )
+        assert response.status_code == 201
+        organisation_ids.append(response.json()["id"])
+    organisation_id, other_organisation_id = organisation_ids
+    mango, lime, kiwi = (get_random_string() for _ in range(3))
+
+    def order(category_volumes: Any, organisation: int = organisation_id) -> Any:
+        return OrderCreate(
+            Type=OrderTypeEnum.BUY,
+            Products=[
+                ProductOrderType(
+                    Category=category,
+                    Variety="test variety",
+                    Packaging="test packaging",
+                    Volume=volume,
+                    Price_per_unit="10 $/kg",
+                )
+                for category, volume in category_volumes
+            ],
+            Organisation_id=organisation,
+        ).dict()
+
+    def catalog(organisation: int = organisation_id) -> Dict[str, Tuple[Any, ...]]:
+        response = test_app_with_db.get(f"/api/organisation/{organisation}/catalog")
+        assert response.status_code == 200
+        return {
+            product["Category"]: (
+                product["Orders"],
+                product["Lines"],
+                {volume["Unit"]: volume["Volume"] for volume in product["Volumes"]},
+            )
+            for product in response.json()
+        }
+
+    response = test_app_with_db.post(
+        "/api/order", json=order([(mango, "1 ton"), (mango, "2 ton"), (lime, "x")])
+    )
+    assert response.status_code == 201
+    order_id = response.json()["id"]
+    assert catalog() == {mango: (1, 2, {"ton": 3.0}), lime: (1, 1, {})}
+
+    response = test_app_with_db.post(
+        "/api/order/bulk",
+        json=[order([(mango, "4 ton"), (mango, "500 kg")]), order([(kiwi, "5 kg")])],
+    )
+    assert response.status_code == 201
+    bulk_order_ids = [item["id"] for item in response.json()["results"]]
+    response = test_app_with_db.post(
+        "/api/order/import",
+        content=json.dumps(order([(kiwi, "1 kg")])),
+        headers={"content-type": "application/x-ndjson"},
+    )
+    assert response.status_code == 201
+    # Volumes in different units are totalled apart
+    assert catalog() == {
+        mango: (2, 4, {"kg": 500.0, "ton": 7.0}),
+        lime: (1, 1, {}),
+        kiwi: (2, 2, {"kg": 6.0}),
+    }
+
+    # Replacing the products of an order and moving an order to another organisation
+    response = test_app_with_db.put(
+        f"/api/order/{order_id}", json={"Products": order([(kiwi, "2 kg")])["Products"]}
+    )
+    assert response.status_code == 201
+    response = test_app_with_db.put(
+        f"/api/order/{bulk_order_ids[0]}",
+        json={"Organisation_id": other_organisation_id},
+    )
+    assert response.status_code == 201
+    assert catalog() == {kiwi: (3, 3, {"kg": 8.0})}
+    assert catalog(other_organisation_id) == {mango: (1, 2, {"kg": 500.0, "ton": 4.0})}
+
+    response = test_app_with_db.delete(f"/api/order/{bulk_order_ids[1]}")
+    assert response.status_code == 200
+    assert catalog() == {kiwi: (2, 2, {"kg": 3.0})}
+
+    # Paged by cursor like the other list endpoints
+    response = test_app_with_db.get(
+        f"/api/organisation/{organisation_id}/catalog", params={"limit": 1}
+    )
+    assert len(response.json()) == 1
+    response = test_app_with_db.get(
+        f"/api/organisation/{organisation_id}/catalog",
+        params={"limit": 1, "cursor": response.headers["X-Next-Cursor"]},
+    )
+    assert response.json() == []
+
+    response = test_app_with_db.get("/api/organisation/0/catalog")
+    assert response.status_code == 404
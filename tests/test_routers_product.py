@@ -219,3 +219,173 @@ def test_unsuccessful_update_single_product(test_app_with_db: TestClient) -> Non
             }
         ]
     }
+
+
+def test_successful_get_many_products_with_cursor(test_app_with_db: TestClient) -> None:
+    product_ids = []
+    for _ in range(3):
+        product_in = ProductCreate(
+            Category="test category 1",
+            Variety=get_random_string(),
+            Packaging="test packaging 1",
+        )
+        post_response = test_app_with_db.post("/api/product", json=product_in.dict())
+        assert post_response.status_code == 201
+        product_ids.append(post_response.json()["id"])
+
+    first_page = test_app_with_db.get(f"/api/product?skip=0&limit={1}")
+    assert first_page.status_code == 200
+    cursor = first_page.headers["X-Next-Cursor"]
+
+    # Walk the pages with the cursor until the created products have been seen
+    seen_ids = [first_page.json()[0]["id"]]
+    while product_ids[-1] not in seen_ids:
+        page = test_app_with_db.get(f"/api/product?limit=2&cursor={cursor}")
+        assert page.status_code == 200
+        page_ids = [product["id"] for product in page.json()]
+        assert page_ids == sorted(page_ids)
+        assert page_ids[0] > seen_ids[-1]
+        seen_ids.extend(page_ids)
+        cursor = page.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert seen_ids == sorted(set(seen_ids))
+    assert set(product_ids) <= set(seen_ids)
+
+
+def test_unsuccessful_get_many_products_with_invalid_cursor(
+    test_app_with_db: TestClient,
+) -> None:
+    response = test_app_with_db.get("/api/product?cursor=not-a-cursor")
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Invalid cursor"}
+
+
+def test_conditional_get_single_product(test_app_with_db: TestClient) -> None:
+    product_in = ProductCreate(
+        Category="test category 1",
+        Variety=get_random_string(),
+        Packaging="test packaging 1",
+    )
+    post_response = test_app_with_db.post("/api/product", json=product_in.dict())
+    assert post_response.status_code == 201
+    post_content = post_response.json()
+
+    get_response = test_app_with_db.get(f"/api/product/{post_content['id']}")
+    assert get_response.status_code == 200
+    etag = get_response.headers["ETag"]
+
+    not_modified_response = test_app_with_db.get(
+        f"/api/product/{post_content['id']}", headers={"If-None-Match": etag}
+    )
+    assert not_modified_response.status_code == 304
+    assert not_modified_response.headers["ETag"] == etag
+    assert not_modified_response.content == b""
+
+    update_response = test_app_with_db.put(
+        f"/api/product/{post_content['id']}", json={"Packaging": "test packaging 2"}
+    )
+    assert update_response.status_code == 201
+
+    modified_response = test_app_with_db.get(
+        f"/api/product/{post_content['id']}", headers={"If-None-Match": etag}
+    )
+    assert modified_response.status_code == 200
+    assert modified_response.headers["ETag"] != etag
+    assert modified_response.json()["Packaging"] == "test packaging 2"
+
+
+def test_conditional_get_many_products(test_app_with_db: TestClient) -> None:
+    get_response = test_app_with_db.get("/api/product", params={"limit": 2})
+    assert get_response.status_code == 200
+    etag = get_response.headers["ETag"]
+
+    not_modified_response = test_app_with_db.get(
+        "/api/product", params={"limit": 2}, headers={"If-None-Match": etag}
+    )
+    assert not_modified_response.status_code == 304
+    assert not_modified_response.headers["ETag"] == etag
+    assert not_modified_response.content == b""
+
+    other_page_response = test_app_with_db.get(
+        "/api/product", params={"limit": 1}, headers={"If-None-Match": etag}
+    )
+    assert other_page_response.status_code == 200
+
+
+def test_successful_import_products(test_app_with_db: TestClient) -> None:
+    existing = ProductCreate(
+        Category="test category 1",
+        Variety=get_random_string(),
+        Packaging="test packaging 1",
+    )
+    assert (
+        test_app_with_db.post("/api/product", json=existing.dict()).status_code == 201
+    )
+
+    variety = get_random_string()
+    body = (
+        "Category,Variety,Packaging\n"
+        f"{existing.Category},{existing.Variety},{existing.Packaging}\n"
+        f'"test, category",{variety},test packaging 1\n'
+        f'"test, category",{variety},test packaging 1\n'
+        "test category 1,,test packaging 1\n"
+    )
+    response = test_app_with_db.post(
+        "/api/product/import", content=body, headers={"content-type": "text/csv"}
+    )
+    assert response.status_code == 201
+    content = response.json()
+    assert (content["rows"], content["imported"], content["existing"]) == (4, 1, 2)
+    assert content["rejected_rows"] == [{"line": 5, "error": "Variety: field required"}]
+    assert content["rows_per_second"] > 0
+
+    response = test_app_with_db.get("/api/product", params={"limit": 1000})
+    assert {
+        (product["Category"], product["Variety"]) for product in response.json()
+    } >= {(existing.Category, existing.Variety), ("test, category", variety)}
+
+
+def test_successful_get_many_products_with_filters(
+    test_app_with_db: TestClient,
+) -> None:
+    category = get_random_string()
+    products = []
+    for variety, packaging in (("a", "box"), ("a", "crate"), ("b", "box")):
+        product_in = ProductCreate(
+            Category=category, Variety=variety, Packaging=packaging
+        )
+        response = test_app_with_db.post("/api/product", json=product_in.dict())
+        assert response.status_code == 201
+        products.append(response.json())
+
+    response = test_app_with_db.get("/api/product", params={"category": category})
+    assert response.json() == products
+
+    response = test_app_with_db.get(
+        "/api/product", params={"category": category, "packaging": "box"}
+    )
+    assert response.json() == [products[0], products[2]]
+
+    # Page through the filtered Products with the cursor
+    first_page = test_app_with_db.get(
+        "/api/product", params={"category": category, "variety": "a", "limit": 1}
+    )
+    assert first_page.json() == [products[0]]
+    second_page = test_app_with_db.get(
+        "/api/product",
+        params={
+            "category": category,
+            "variety": "a",
+            "limit": 1,
+            "cursor": first_page.headers["X-Next-Cursor"],
+        },
+    )
+    assert second_page.json() == [products[1]]
+
+    response = test_app_with_db.get(
+        "/api/product",
+        params={"category": category, "variety": "b", "packaging": "crate"},
+    )
+    assert response.status_code == 404
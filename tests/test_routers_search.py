@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+from tests.helpers import get_random_string
+
+from src.database.models.base import OrganisationTypeEnum
+from src.database.schemas.organisation import OrganisationCreate
+from src.database.schemas.product import ProductCreate
+
+
+def test_successful_search(test_app_with_db: TestClient) -> None:
+    word = get_random_string()
+    organisations = []
+    for name in (f"{word} Farms", f"{word[:-1]} Orchards", f"Fresh {word}"):
+        organisation_in = OrganisationCreate(
+            Name=name.title(), Type=OrganisationTypeEnum.SELLER
+        )
+        response = test_app_with_db.post(
+            "/api/organisation", json=organisation_in.dict()
+        )
+        assert response.status_code == 201
+        organisations.append(response.json())
+    product_in = ProductCreate(
+        Category=word.upper(), Variety=get_random_string(), Packaging="box"
+    )
+    product_response = test_app_with_db.post("/api/product", json=product_in.dict())
+    assert product_response.status_code == 201
+
+    # Prefixes match whatever the case, best match first
+    response = test_app_with_db.get("/api/search", params={"q": word[:-1]})
+    assert response.status_code == 200
+    content = response.json()
+    assert [result["id"] for result in content["organisations"]] == [
+        organisations[1]["id"],
+        organisations[0]["id"],
+        organisations[2]["id"],
+    ]
+    assert [result["prefix"] for result in content["organisations"]] == [
+        True,
+        True,
+        False,
+    ]
+    assert content["organisations"][0] == {
+        "id": organisations[1]["id"],
+        "Name": organisations[1]["Name"],
+        "Type": "SELLER",
+        "prefix": True,
+        "score": 1.0,
+    }
+    assert content["products"][0]["id"] == product_response.json()["id"]
+
+    # A typo still finds the word
+    typo = word[:4] + word[5:]
+    response = test_app_with_db.get("/api/search", params={"q": typo, "limit": 2})
+    content = response.json()
+    assert {result["id"] for result in content["organisations"]} <= {
+        organisation["id"] for organisation in organisations
+    }
+    assert len(content["organisations"]) == 2
+    assert not any(result["prefix"] for result in content["organisations"])
+
+    response = test_app_with_db.get("/api/search", params={"q": "", "limit": 100})
+    assert response.status_code == 422
+
+
+def test_search_prefixes_ending_with_the_last_code_points(
+    test_app_with_db: TestClient,
+) -> None:
+    word = get_random_string()
+    # Incrementing these would make a surrogate or go past the last code point
+    for last in ("\ud7ff", "\U0010ffff"):
+        organisation_in = OrganisationCreate(
+            Name=f"{word}{last}{last}", Type=OrganisationTypeEnum.SELLER
+        )
+        response = test_app_with_db.post(
+            "/api/organisation", json=organisation_in.dict()
+        )
+        assert response.status_code == 201
+        organisation_id = response.json()["id"]
+
+        for text in (f"{word}{last}", f"{word}{last}{last}"):
+            response = test_app_with_db.get("/api/search", params={"q": text})
+            assert response.status_code == 200
+            results = response.json()["organisations"]
+            assert results[0]["id"] == organisation_id
+            assert results[0]["prefix"]
@@ -0,0 +1,82 @@
+import logging
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+from tests.helpers import get_random_string
+
+from src.database.profiling import RequestProfile
+from src.database.schemas.product import ProductCreate
+from src.routers.timing import ServerTimingMiddleware, server_timing
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", orm;dur=[\d.]+, '
+    r"serialize;dur=[\d.]+, total;dur=[\d.]+"
+)
+
+
+def test_server_timing_splits_the_request() -> None:
+    profile = RequestProfile()
+    profile.start = 10.0
+    profile.observe_query("SELECT 1", 0.004)
+    profile.observe_query("SELECT 2", 0.002)
+    profile.serialize_seconds = 0.001
+    profile.handler_end = 10.010
+
+    assert server_timing(profile, 10.012) == (
+        'db;dur=6.0;desc="2 queries", orm;dur=1.0, serialize;dur=3.0, total;dur=12.0'
+    )
+
+
+def test_server_timing_header_counts_queries(test_app_with_db: TestClient) -> None:
+    product_in = ProductCreate(
+        Category="timing category",
+        Variety=get_random_string(),
+        Packaging="timing packaging",
+    )
+    response = test_app_with_db.post("/api/product", json=product_in.dict())
+    assert response.status_code == 201
+
+    match = SERVER_TIMING.fullmatch(response.headers["Server-Timing"])
+    assert match is not None
+    assert int(match.group(1)) > 0
+
+
+def test_server_timing_header_without_queries(test_app: TestClient) -> None:
+    response = test_app.get("/docs")
+
+    match = SERVER_TIMING.fullmatch(response.headers["Server-Timing"])
+    assert match is not None
+    assert match.group(1) == "0"
+
+
+def _timing_middleware(test_client: TestClient) -> ServerTimingMiddleware:
+    app = test_client.app.middleware_stack  # type: ignore
+    while not isinstance(app, ServerTimingMiddleware):
+        app = app.app
+    return app
+
+
+def test_slow_requests_are_logged_with_their_statements(
+    test_app_with_db: TestClient,
+    caplog: pytest.LogCaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    product_in = ProductCreate(
+        Category="timing category",
+        Variety=get_random_string(),
+        Packaging="timing packaging",
+    )
+    response = test_app_with_db.post("/api/product", json=product_in.dict())
+    product_id = response.json()["id"]
+    middleware = _timing_middleware(test_app_with_db)
+    monkeypatch.setattr(middleware, "slow_request_seconds", 0)
+
+    with caplog.at_level(logging.WARNING, logger="src.routers.timing"):
+        response = test_app_with_db.get(f"/api/product/{product_id}")
+
+    assert response.status_code == 200
+    slow = [r.message for r in caplog.records if r.name == "src.routers.timing"]
+    assert len(slow) == 1
+    assert slow[0].startswith(f"Slow request GET /api/product/{product_id} (200)")
+    assert "FROM products" in slow[0]